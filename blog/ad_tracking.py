@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:14:08 2026
+
+Buffered ad impression/click recording (bulk inserts + aggregated counters)
+@author: Abbas Mahdavi
+"""
+
+# blog/ad_tracking.py
+import atexit
+import ipaddress
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .ads import mark_exhausted
+from .models import Ad, AdView, AdClick
+
+logger = logging.getLogger(__name__)
+
+# آستانه‌های flush: هر کدام زودتر برسد
+FLUSH_SIZE = 500        # تعداد رویداد در بافر
+FLUSH_INTERVAL = 5.0    # ثانیه از اولین رویداد بافر
+
+VIEW = 'view'
+CLICK = 'click'
+
+_EVENT_MODELS = {VIEW: AdView, CLICK: AdClick}
+_COUNTER_FIELDS = {VIEW: 'impressions_count', CLICK: 'clicks_count'}
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(proxies):
+    return tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies if proxy.strip())
+
+
+def _is_trusted(addr, networks):
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request):
+    """
+    IP بازدیدکننده: REMOTE_ADDR، مگر اینکه درخواست از یک proxy مورد اعتماد (BLOG_TRUSTED_PROXIES)
+    رسیده باشد؛ آنگاه راست‌ترین آدرس X-Forwarded-For که خودش proxy مورد اعتماد نیست.
+    سمت چپ این هدر را خود کاربر می‌فرستد و قابل جعل است.
+    """
+    remote = request.META.get('REMOTE_ADDR', '')
+    networks = _trusted_networks(tuple(settings.BLOG_TRUSTED_PROXIES))
+    if networks and _is_trusted(remote, networks):
+        for addr in reversed(request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')):
+            addr = addr.strip()
+            if addr and not _is_trusted(addr, networks):
+                return addr[:45]
+    return remote[:45]
+
+
+class AdEventBuffer:
+    """
+    بافر رویدادهای آگهی در حافظهٔ هر پروسه. به جای یک INSERT و یک UPDATE برای هر نمایش،
+    در هر flush برای هر نوع رویداد یک bulk_create و یک UPDATE (با CASE روی شناسهٔ آگهی‌ها) اجرا می‌شود.
+    زمان ثبت AdView/AdClick زمان flush است (حداکثر FLUSH_INTERVAL تأخیر).
+    """
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events = {VIEW: [], CLICK: []}
+        self._size = 0
+        self._timer = None
+
+    def record(self, kind, ad_id, ip=''):
+        with self._lock:
+            self._events[kind].append((ad_id, ip))
+            self._size += 1
+            full = self._size >= self.flush_size
+            if not full and self._timer is None:
+                # flush زمان‌دار حتی اگر رویداد دیگری نیاید
+                self._timer = threading.Timer(self.flush_interval, self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            # نوشتن در thread جدا تا درخواست جاری منتظر دیتابیس نماند
+            threading.Thread(target=self._flush_in_thread, daemon=True).start()
+
+    def _take(self):
+        with self._lock:
+            events, self._events = self._events, {VIEW: [], CLICK: []}
+            self._size = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return events
+
+    def flush(self):
+        """
+        نوشتن همهٔ رویدادهای بافر. تعداد رویدادهای نوشته‌شده را برمی‌گرداند.
+        """
+        with self._flush_lock:
+            events = self._take()
+            total = 0
+            try:
+                with transaction.atomic():
+                    for kind, rows in events.items():
+                        if rows:
+                            self._write(kind, rows)
+                            total += len(rows)
+            except Exception:
+                logger.exception("ad events flush failed (%s events dropped)", sum(len(r) for r in events.values()))
+                return 0
+            return total
+
+    def _write(self, kind, rows):
+        # آگهی‌هایی که در این فاصله حذف شده‌اند کل flush را خراب نکنند
+        existing = set(Ad.objects.filter(pk__in={ad_id for ad_id, _ip in rows}).values_list('pk', flat=True))
+        rows = [row for row in rows if row[0] in existing]
+        if not rows:
+            return
+        model = _EVENT_MODELS[kind]
+        model.objects.bulk_create(
+            [model(ad_id=ad_id, ip_address=ip) for ad_id, ip in rows],
+            batch_size=500,
+        )
+        counts = Counter(ad_id for ad_id, _ip in rows)
+        field = _COUNTER_FIELDS[kind]
+        Ad.objects.filter(pk__in=list(counts)).update(**{
+            field: F(field) + Case(
+                *[When(pk=ad_id, then=Value(n)) for ad_id, n in counts.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        })
+        if kind == VIEW:
+            # آگهی‌هایی که با این flush به سقف نمایش رسیدند از موجودی همهٔ پروسه‌ها کنار می‌روند
+            exhausted = list(Ad.objects.filter(
+                pk__in=list(counts), max_impressions__gt=0,
+                impressions_count__gte=F('max_impressions'),
+            ).values_list('pk', flat=True))
+            if exhausted:
+                transaction.on_commit(lambda: mark_exhausted(exhausted))
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def pending(self):
+        with self._lock:
+            return self._size
+
+
+buffer = AdEventBuffer()
+
+# هنگام خاموش شدن worker (SIGTERM در gunicorn هم به exit عادی ختم می‌شود) بافر خالی می‌شود
+atexit.register(buffer.flush)
+
+
+def record_impression(ad_id, ip=''):
+    buffer.record(VIEW, ad_id, ip)
+
+
+def record_click(ad_id, ip=''):
+    buffer.record(CLICK, ad_id, ip)
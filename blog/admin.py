@@ -5,7 +5,7 @@ Created on Sat Sep 27 17:05:06 2025
 @author: Abbas Mahdavi
 """
 #blog\admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.admin import UserAdmin
 from accounts.models import CustomUser
@@ -13,9 +13,12 @@ from .models import (
     Post, Album, AlbumImage,
     Ad, Category,
     Menu, MenuItem,
-    SiteSetting, FooterLink, FooterIcon
+    SiteSetting, FooterLink, FooterIcon,
+    Task,
 )
 from django.utils.html import format_html
+from django.utils import timezone
+from django.db import IntegrityError, transaction
 from ckeditor_uploader.widgets import CKEditorUploadingWidget
 from django import forms
 
@@ -110,16 +113,6 @@ class AlbumAdmin(admin.ModelAdmin):
     }),
 )
 
-    def save_related(self, request, form, formsets, change):
-        super().save_related(request, form, formsets, change)
-
-        album = form.instance
-        if not album.cover_image and album.images.exists():
-            first_image = album.images.order_by('order', 'id').first()
-            if first_image:
-                album.cover_image = first_image.image
-                album.save(update_fields=['cover_image'])
-
 
 # -------------------------------
 # 3️⃣ آگهی‌ها
@@ -132,15 +125,16 @@ class CurrentlyActiveAdFilter(admin.SimpleListFilter):
         return [('active', 'در حال نمایش'), ('inactive', 'غیرفعال یا منقضی')]
 
     def queryset(self, request, queryset):
+        # همان شرط is_currently_active به صورت SQL؛ خروجی queryset می‌ماند (صفحه‌بندی و شمارش)
         if self.value() == 'active':
-            return [ad for ad in queryset if ad.is_currently_active()]
+            return queryset.currently_active()
         elif self.value() == 'inactive':
-            return [ad for ad in queryset if not ad.is_currently_active()]
+            return queryset.not_currently_active()
         return queryset
 
 @admin.register(Ad)
 class AdAdmin(admin.ModelAdmin):
-    list_display = ("name", "group", "is_active", "start_date", "end_date", "created_at")
+    list_display = ("name", "group", "is_active", "weight", "start_date", "end_date", "created_at")
     list_filter = ("group", "is_active", CurrentlyActiveAdFilter)
     search_fields = ("name",)
 
@@ -230,3 +224,34 @@ class CustomUserAdmin(UserAdmin):
             "fields": ("username", "email", "password1", "password2", "is_staff", "is_superuser", "is_active"),
         }),
     )
+
+# -------------------------------
+# 8️⃣ صف کارهای پس‌زمینه
+# -------------------------------
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "max_attempts", "run_after", "locked_by", "updated_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("key", "locked_by", "locked_at", "last_error", "created_at", "updated_at")
+    actions = ["retry_tasks"]
+
+    @admin.action(description="اجرای دوباره")
+    def retry_tasks(self, request, queryset):
+        # مثل enqueue: pending_key از key پر می‌شود تا یکتایی صف حفظ شود؛ کاری که نسخهٔ دیگری از آن
+        # (یا ردیف دیگری از همین انتخاب) در صف است رد می‌شود
+        retried = skipped = 0
+        for job in queryset.exclude(status=Task.STATUS_RUNNING).only("pk", "key"):
+            try:
+                with transaction.atomic():
+                    Task.objects.filter(pk=job.pk).exclude(status=Task.STATUS_RUNNING).update(
+                        status=Task.STATUS_PENDING, pending_key=job.key or None, attempts=0,
+                        run_after=timezone.now(), last_error="",
+                    )
+                retried += 1
+            except IntegrityError:
+                skipped += 1
+        message = f"{retried} کار دوباره در صف قرار گرفت."
+        if skipped:
+            message += f" {skipped} کار رد شد چون نسخهٔ دیگری از آن در صف است."
+        self.message_user(request, message, messages.WARNING if skipped else messages.SUCCESS)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:20:14 2026
+
+Ad serving: eligible ads per group in one indexed query, weighted rotation,
+and a per-process inventory with scheduled activation/expiry
+@author: Abbas Mahdavi
+"""
+
+# blog/ads.py
+import random
+import time
+
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Ad
+
+AD_GROUPS = tuple(g for g, _ in Ad.GROUP_CHOICES)
+
+# حداکثر عمر موجودی حتی اگر مرز زمانی نزدیکی نباشد
+INVENTORY_MAX_AGE = 3600
+
+# آگهی‌هایی که به سقف نمایش رسیده‌اند (از blog/ad_tracking.py)؛ مشترک بین پروسه‌ها
+EXHAUSTED_KEY = 'blog:ads:exhausted'
+EXHAUSTED_CHECK_INTERVAL = 5  # ثانیه
+# پس از این مدت همهٔ موجودی‌ها دست‌کم یک بار بازسازی شده‌اند و خودشان این آگهی‌ها را کنار گذاشته‌اند
+EXHAUSTED_TIMEOUT = INVENTORY_MAX_AGE * 2
+
+EMPTY_INVENTORY = {'ads': [], 'next_boundary': None}
+
+
+def select_ads(groups=AD_GROUPS, now=None):
+    """
+    آگهی‌های قابل نمایش همهٔ گروه‌ها با یک کوئری (ایندکس blog_ad_eligible_idx)؛
+    خروجی: {group: [ad, ...]} به ترتیب تازه‌ترین.
+    """
+    by_group = {g: [] for g in groups}
+    qs = Ad.objects.currently_active(now).filter(group__in=list(groups)).order_by('-created_at')
+    for ad in qs:
+        by_group[ad.group].append(ad)
+    return by_group
+
+
+def weighted_order(ads, rng=random):
+    """
+    جایگشت تصادفی وزن‌دار (Efraimidis–Spirakis): آگهی با وزن بیشتر بیشتر در ابتدا می‌آید.
+    """
+    return sorted(ads, key=lambda ad: rng.random() ** (1.0 / max(ad.weight or 1, 1)), reverse=True)
+
+
+def rotate_ads_by_group(ads_by_group, rng=random):
+    """
+    چرخش هر گروه برای درخواست جاری؛ لیست‌های کش‌شده تغییر نمی‌کنند.
+    """
+    return {group: weighted_order(ads, rng) for group, ads in ads_by_group.items()}
+
+
+# ---------------------------
+# Inventory
+# ---------------------------
+def build_inventory(now=None):
+    """
+    همهٔ آگهی‌هایی که الان یا بعداً ممکن است نمایش داده شوند (فعال، منقضی‌نشده، زیر سقف)
+    و نزدیک‌ترین مرز start_date/end_date آینده. شرط زمان هر درخواست در ads_from_inventory.
+    """
+    now = now or timezone.now()
+    ads = list(
+        Ad.objects.filter(is_active=True, group__in=list(AD_GROUPS))
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=now))
+        .filter(
+            Q(max_impressions__isnull=True)
+            | Q(max_impressions=0)
+            | Q(impressions_count__lt=F('max_impressions'))
+        )
+        .order_by('-created_at')
+    )
+    boundaries = [d for ad in ads for d in (ad.start_date, ad.end_date) if d and d > now]
+    return {'ads': ads, 'next_boundary': min(boundaries) if boundaries else None}
+
+
+def inventory_timeout(inventory):
+    """
+    عمر موجودی: تا مرز زمانی بعدی (شروع یا پایان نمایش یک آگهی)، حداکثر INVENTORY_MAX_AGE.
+    """
+    boundary = inventory.get('next_boundary')
+    if boundary is None:
+        return INVENTORY_MAX_AGE
+    seconds = (boundary - timezone.now()).total_seconds()
+    return max(1, min(INVENTORY_MAX_AGE, int(seconds) + 1))
+
+
+_exhausted_local = {'checked_at': 0.0, 'ids': frozenset()}
+
+
+def exhausted_ads():
+    """
+    شناسهٔ آگهی‌های به سقف رسیده؛ از cache مشترک و حداکثر هر EXHAUSTED_CHECK_INTERVAL ثانیه یک بار.
+    """
+    now = time.monotonic()
+    if now - _exhausted_local['checked_at'] >= EXHAUSTED_CHECK_INTERVAL:
+        _exhausted_local['ids'] = frozenset(cache.get(EXHAUSTED_KEY) or ())
+        _exhausted_local['checked_at'] = now
+    return _exhausted_local['ids']
+
+
+def mark_exhausted(ad_ids):
+    ad_ids = set(ad_ids)
+    if not ad_ids:
+        return
+    current = set(cache.get(EXHAUSTED_KEY) or ())
+    if not ad_ids <= current:
+        cache.set(EXHAUSTED_KEY, sorted(current | ad_ids), timeout=EXHAUSTED_TIMEOUT)
+    # همین پروسه بلافاصله ببیند
+    _exhausted_local['ids'] = frozenset(current | ad_ids)
+
+
+def clear_exhausted(ad_id):
+    """
+    وقتی آگهی ویرایش می‌شود (مثلاً سقف نمایش بالا رفته) از لیست به سقف رسیده‌ها خارج شود؛
+    اگر هنوز به سقف رسیده باشد موجودی جدید خودش آن را کنار می‌گذارد.
+    """
+    current = set(cache.get(EXHAUSTED_KEY) or ())
+    if ad_id in current:
+        current.discard(ad_id)
+        cache.set(EXHAUSTED_KEY, sorted(current), timeout=EXHAUSTED_TIMEOUT)
+    _exhausted_local['ids'] = frozenset(current)
+
+
+def ads_from_inventory(inventory, now=None, rng=random):
+    """
+    آگهی‌های قابل نمایش این درخواست از موجودی داخل حافظه (بدون کوئری دیتابیس):
+    {group: [ad, ...]} با چرخش وزن‌دار.
+    """
+    now = now or timezone.now()
+    exhausted = exhausted_ads()
+    by_group = {g: [] for g in AD_GROUPS}
+    for ad in inventory.get('ads', ()):
+        if ad.pk in exhausted:
+            continue
+        if ad.start_date and now < ad.start_date:
+            continue
+        if ad.end_date and now > ad.end_date:
+            continue
+        by_group[ad.group].append(ad)
+    return rotate_ads_by_group(by_group, rng)
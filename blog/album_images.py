@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 02:07:34 2026
+
+Cached, cursor-paginated payloads of the album images API (single and batch)
+@author: Abbas Mahdavi
+"""
+
+# blog/album_images.py
+import base64
+import bisect
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .caching import album_scope, get_version, version_key
+from .helpers import _safe_image_url
+from .images import IMAGE_SIZES
+from .models import Album, AlbumImage, Category
+
+ALBUM_IMAGES_PAGE_SIZE = 50
+ALBUM_IMAGES_MAX_PAGE_SIZE = 100
+# سقف شناسه‌ها در یک درخواست پیش‌نمایش دسته‌ای
+ALBUM_PREVIEWS_MAX_IDS = 50
+
+ALBUM_IMAGES_KEY_PREFIX = 'blog:album_images:'
+# کلید با نسخهٔ آلبوم باطل می‌شود؛ این فقط عمر نسخه‌های قدیمی را محدود می‌کند
+ALBUM_IMAGES_TIMEOUT = 60 * 60 * 24
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(order, pk):
+    raw = json.dumps([order, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        order, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return int(order), int(pk)
+    except Exception as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _image_item(im):
+    try:
+        original = im.image.url
+    except Exception:
+        return None
+    if not original:
+        return None
+    # ابعاد اصلی برای رزرو جای تصویر پیش از بارگذاری (فقط وقتی نسخه‌ها ساخته شده‌اند)
+    entry = im._image_entry('image') or {}
+    return {
+        'id': im.pk,
+        'order': im.order,
+        'url': _safe_image_url(im, field_names=('image',), size='content') or original,
+        'thumb': im.image_variant_url('image', IMAGE_SIZES['thumb']) or original,
+        'srcset': im.image_srcset('image'),
+        'original': original,
+        'width': entry.get('width'),
+        'height': entry.get('height'),
+        'caption': im.caption or '',
+    }
+
+
+def _album_payload(album):
+    # album با images (به ترتیب order, id) و categories از قبل prefetch شده
+    images = []
+    for im in album.images.all():
+        item = _image_item(im)
+        if item is not None:
+            images.append(item)
+    categories = album.categories.all()
+    return {
+        'title': album.title,
+        'description': album.order_instructions or '',
+        'category_slug': categories[0].slug if categories else '',
+        'images': images,
+    }
+
+
+def _albums_queryset(album_ids):
+    images = AlbumImage.objects.only(
+        'id', 'album_id', 'image', 'caption', 'order', 'image_variants',
+    ).order_by('order', 'id')
+    return Album.objects.filter(pk__in=album_ids).only('id', 'title', 'order_instructions').prefetch_related(
+        Prefetch('images', queryset=images),
+        Prefetch('categories', queryset=Category.objects.only('id', 'slug')),
+    )
+
+
+def build_album_images(album_ids):
+    """
+    همهٔ تصاویر هر آلبوم به ترتیب (order, id) با آدرس‌های آماده: {album_id: payload}.
+    تعداد کوئری به تعداد آلبوم‌ها بستگی ندارد (یکی برای آلبوم‌ها و یکی برای هر prefetch)؛
+    آلبوم ناموجود در خروجی None است. صفحه‌ها از همین فهرست بریده می‌شوند.
+    """
+    found = {album.pk: _album_payload(album) for album in _albums_queryset(album_ids)}
+    return {album_id: found.get(album_id) for album_id in album_ids}
+
+
+def _payload_key(album_id):
+    return f'{ALBUM_IMAGES_KEY_PREFIX}{album_id}'
+
+
+def album_images_many(album_ids):
+    """
+    {album_id: (نسخه، payload)}؛ نسخه‌ها و payloadها با یک get_many خوانده می‌شوند و فقط
+    آلبوم‌های بدون کش معتبر (با هم) ساخته می‌شوند. درخواست تکراری (مثلاً باز کردن دوبارهٔ modal)
+    هیچ کوئری دیتابیسی ندارد. آلبوم ناموجود هم (None) کش می‌شود.
+    """
+    keys = {}
+    for album_id in album_ids:
+        keys[album_id] = (version_key(album_scope(album_id)), _payload_key(album_id))
+    found = cache.get_many([key for pair in keys.values() for key in pair])
+    result = {}
+    missing = []
+    for album_id, (vkey, key) in keys.items():
+        version = found.get(vkey)
+        entry = found.get(key)
+        if version is not None and entry and entry.get('version') == version:
+            result[album_id] = (version, entry['value'])
+        else:
+            missing.append(album_id)
+    if missing:
+        # نسخه پیش از ساختن خوانده می‌شود تا تغییر همزمان payload تازه را قدیمی علامت بزند
+        versions = {album_id: found.get(keys[album_id][0]) or get_version(album_scope(album_id)) for album_id in missing}
+        built = build_album_images(missing)
+        cache.set_many({
+            _payload_key(album_id): {'version': versions[album_id], 'value': built[album_id]}
+            for album_id in missing
+        }, timeout=ALBUM_IMAGES_TIMEOUT)
+        for album_id in missing:
+            result[album_id] = (versions[album_id], built[album_id])
+    return result
+
+
+def album_images(album_id):
+    return album_images_many([album_id])[album_id]
+
+
+def album_images_etag(album_id, version, cursor, limit):
+    raw = f'{album_id}:{version}:{cursor or ""}:{limit}'
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def album_previews_etag(versions, limit):
+    raw = ','.join(f'{album_id}:{version}' for album_id, version in versions) + f':{limit}'
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def album_images_page(payload, cursor=None, limit=ALBUM_IMAGES_PAGE_SIZE):
+    """
+    یک صفحه از payload بعد از cursor (keyset روی (order, id))؛ next برای صفحهٔ بعد یا None.
+    """
+    images = payload['images']
+    start = 0
+    if cursor is not None:
+        keys = [(item['order'], item['id']) for item in images]
+        start = bisect.bisect_right(keys, cursor)
+    page = images[start:start + limit]
+    has_more = start + limit < len(images)
+    return {
+        'title': payload['title'],
+        'description': payload['description'],
+        'category_slug': payload['category_slug'],
+        'total': len(images),
+        'images': page,
+        'next': encode_cursor(page[-1]['order'], page[-1]['id']) if has_more and page else None,
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        # ثبت سیگنال‌های بی‌اعتبارسازی cache
+        from . import signals  # noqa: F401
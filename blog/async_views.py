@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 02:58:13 2026
+
+Async (ASGI) versions of the read-heavy views
+@author: Abbas Mahdavi
+"""
+
+# blog/async_views.py
+import asyncio
+import contextvars
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+
+from . import views
+from .album_images import album_images, InvalidCursor as InvalidAlbumCursor
+from .chrome import warm_chrome
+from .db_pool import pool_executor, pooled
+from .http_cache import conditional_page
+from .models import Category
+from .snapshot import get_homepage_snapshot, homepage_parts
+
+
+def _in_worker(part):
+    def run():
+        # مثل شروع/پایان هر درخواست: اتصال کهنه یا خراب این thread بسته می‌شود
+        close_old_connections()
+        try:
+            return part()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_parts(parts):
+    """
+    اجرای همزمان بخش‌های مستقل یک صفحه (توابع همگام با کوئری ORM).
+    ORM async جنگو هر کوئری را روی همان thread درخواست و پشت سر هم اجرا می‌کند؛ اینجا هر بخش
+    در یک thread جدا با اتصال دیتابیس خودش اجرا می‌شود و زمان صفحه به کندترین بخش می‌رسد.
+    با BLOG_DB_POOL_SIZE بخش‌ها در مخزن ثابت blog/db_pool.py با اتصال‌های ماندگار اجرا می‌شوند.
+    """
+    executor = pool_executor()
+    if executor is not None:
+        loop = asyncio.get_running_loop()
+        # contextvarها (مثلاً اندازه‌گیری درخواست در blog/instrumentation.py) به thread مخزن هم برسند
+        return await asyncio.gather(*(
+            loop.run_in_executor(executor, contextvars.copy_context().run, pooled(part)) for part in parts
+        ))
+    return await asyncio.gather(*(sync_to_async(_in_worker(part), thread_sensitive=False)() for part in parts))
+
+
+def _merge(parts):
+    context = {}
+    for part in parts:
+        context.update(part)
+    return context
+
+
+@conditional_page(('post', 'album', 'category'))
+async def post_list(request, slug=None):
+    selected_category = None
+    if slug:
+        selected_category = await Category.objects.filter(slug=slug).afirst()
+
+    if selected_category is None:
+        context = dict(await sync_to_async(get_homepage_snapshot)())
+    else:
+        # پست‌ها، تب‌های آلبوم، شمارنده‌های دسته و chrome همزمان
+        context = _merge(await gather_parts(
+            homepage_parts(selected_category) + [lambda: warm_chrome(views.COMMON_CHROME)]
+        ))
+    return await sync_to_async(views.render_post_list)(request, context)
+
+
+@conditional_page(('post', 'album', 'category'))
+async def category_albums(request, slug):
+    category = await aget_object_or_404(Category, slug=slug)
+    parts = await gather_parts(
+        views.category_albums_parts(category) + [lambda: warm_chrome(views.COMMON_CHROME)]
+    )
+    context = await sync_to_async(views.category_albums_context)(category, parts)
+    return await sync_to_async(views.render_category_albums)(request, context)
+
+
+@conditional_page(('post', 'album', 'category'))
+async def search(request):
+    q = request.GET.get('q', '').strip()
+    scope = request.GET.get('scope', 'all')
+    post_hits = []
+    album_hits = []
+
+    if q:
+        category_id = await sync_to_async(views.search_category_id)(scope)
+        post_hits, album_hits, _chrome = await gather_parts(
+            views.search_parts(q, category_id) + [lambda: warm_chrome(views.COMMON_CHROME)]
+        )
+    return await sync_to_async(views.render_search)(request, q, scope, post_hits, album_hits)
+
+
+async def ajax_album_images(request, album_id):
+    try:
+        params = views.album_images_params(request)
+    except InvalidAlbumCursor:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    found = await sync_to_async(album_images)(album_id)
+    return views.album_images_response(request, album_id, found, *params)
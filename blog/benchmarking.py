@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 05:31:12 2026
+
+Shared helpers for the benchmark commands (URL discovery, load drivers, reports)
+@author: Abbas Mahdavi
+"""
+
+# blog/benchmarking.py
+import http.client
+import re
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, resolve, reverse
+
+from .models import Post, Album, AlbumImage, Category, Menu, MenuItem, Ad
+from .timeline import encode_cursor, timeline_page, _as_datetime
+
+# مسیرهای غیرعمومی یا با اثر جانبی (نوشتن، شمارش کلیک، ورود لازم) اندازه گرفته نمی‌شوند
+SKIPPED_URL_NAMES = {
+    'post_new', 'post_edit', 'post_delete', 'user_dashboard', 'ops_metrics', 'ad_click',
+}
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values, ratio):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+
+def summarize(results, elapsed):
+    """
+    results: فهرست (status, ms). خروجی همان کلیدهایی است که در فایل JSON ذخیره می‌شود.
+    """
+    timings = sorted(ms for _, ms in results)
+    return {
+        'requests': len(results),
+        'rps': round(len(results) / elapsed, 1) if elapsed else None,
+        'p50': round(percentile(timings, 0.5), 2),
+        'p95': round(percentile(timings, 0.95), 2),
+        'p99': round(percentile(timings, 0.99), 2),
+        'statuses': {str(k): v for k, v in Counter(status for status, _ in results).items()},
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def dataset_counts():
+    return {
+        model.__name__: model.objects.count()
+        for model in (Post, Album, AlbumImage, Category, Menu, MenuItem, Ad)
+    }
+
+
+def _sample_objects():
+    post = Post.objects.exclude(code__isnull=True).exclude(slug='').order_by('-created_at', '-id').first()
+    album = Album.objects.filter(images__isnull=False).order_by('-created_at', '-id').first()
+    category = Category.objects.order_by('-post_count', '-album_count', 'id').first()
+    return post, album, category
+
+
+def public_urls():
+    """
+    (نام، مسیر) همهٔ مسیرهای عمومی blog/urls.py با مقادیر نمونه از دیتابیس برای پارامترها؛
+    مسیری که شیء نمونه ندارد (دیتابیس خالی) کنار گذاشته می‌شود.
+    """
+    from . import urls as blog_urls
+
+    post, album, category = _sample_objects()
+    values = {}
+    if post:
+        values.update(pk=post.pk, code=post.code)
+    if album:
+        values['album_id'] = album.pk
+    slugs = {
+        'post': post.slug if post else None,
+        'album': album.slug if album else None,
+        'category': category.slug if category else None,
+    }
+    queries = {
+        'search': {'q': post.title.split()[0] if post else 'خانه'},
+        'ajax_album_previews': {
+            'ids': ','.join(str(pk) for pk in Album.objects.order_by('-created_at').values_list('pk', flat=True)[:6]),
+        },
+    }
+
+    found = []
+    seen = set()
+    for pattern in blog_urls.urlpatterns:
+        name = pattern.name
+        if not name or name in SKIPPED_URL_NAMES:
+            continue
+        kwargs = {}
+        for param in pattern.pattern.converters:
+            if param == 'slug':
+                kind = next((k for k in ('category', 'album') if k in name), 'post')
+                kwargs[param] = slugs[kind]
+            else:
+                kwargs[param] = values.get(param)
+        if any(v is None for v in kwargs.values()):
+            continue
+        try:
+            path = reverse(f'{blog_urls.app_name}:{name}', kwargs=kwargs)
+        except NoReverseMatch:
+            continue
+        # مسیری که الگوی زودتری آن را می‌گیرد (post/<pk>/ زیر post/<code>/) به این view نمی‌رسد
+        if resolve(unquote(path)).url_name != name:
+            continue
+        query = queries.get(name)
+        if query:
+            path += '?' + urlencode(query)
+        # نام تکراری (category_albums) یا دو نام با یک مسیر
+        if path in seen:
+            continue
+        seen.add(path)
+        found.append((name, path))
+    return found
+
+
+def timeline_urls(depths=(0.5, 0.99)):
+    """
+    (نام، مسیر) صفحه‌های cursor دار ajax_timeline: صفحهٔ دوم (cursor صفحهٔ اول) و صفحه‌هایی در
+    عمق depths از کل پست‌ها. cursor عمیق مستقیم از ردیف همان موقعیت ساخته می‌شود (پیمودن هزاران صفحه
+    لازم نیست)؛ زمان این صفحه‌ها باید با صفحهٔ اول برابر باشد چون keyset به عمق بستگی ندارد.
+    """
+    base = reverse('blog:ajax_timeline')
+    first = timeline_page()
+    if not first['next_cursor']:
+        return []
+    found = [('ajax_timeline@page2', f"{base}?{urlencode({'cursor': first['next_cursor']})}")]
+    total = Post.objects.count()
+    ordered = Post.objects.order_by('-created_at', '-pk').only('pk', 'created_at')
+    for depth in depths:
+        post = ordered[min(total - 1, int(total * depth))]
+        cursor = encode_cursor(_as_datetime(post.created_at), 'post', post.pk)
+        found.append((f'ajax_timeline@{depth:.0%}', f"{base}?{urlencode({'cursor': cursor})}"))
+    return found
+
+
+def client_run(path, requests, host='localhost'):
+    """
+    درون پروسه با django.test.Client: کوئری‌های درخواست سرد (پس از خالی کردن cache) و گرم،
+    و زمان requests درخواست گرم پشت سر هم (بدون شبکه و بدون همزمانی).
+    """
+    # خطای view (مثلاً قالب نبودن) به صورت پاسخ 500 ثبت می‌شود، نه توقف کل اجرا
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    cache.clear()
+    # len() همان لحظه: CaptureQueriesContext از لاگ کوئری اتصال برش می‌زند و درخواست بعدی آن را خالی می‌کند
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(path)
+    queries_cold = len(captured)
+    with CaptureQueriesContext(connection) as captured:
+        client.get(path)
+    queries_warm = len(captured)
+    results = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        status = client.get(path).status_code
+        results.append((status, (time.perf_counter() - t0) * 1000))
+    elapsed = time.perf_counter() - started
+    report = summarize(results, elapsed)
+    report.update(status=response.status_code, queries_cold=queries_cold, queries_warm=queries_warm)
+    return report
+
+
+def http_load(parts, paths, requests, concurrency, warmup=0, host=None):
+    """
+    GET همزمان با اتصال keep-alive برای هر thread روی سرور در حال اجرا (parts از urlsplit).
+    خروجی: (فهرست (status, ms)، زمان کل ثانیه).
+    """
+    local = threading.local()
+    host_header = host or parts.netloc
+    prefix = parts.path.rstrip('/')
+
+    def fetch(i):
+        # یک اتصال keep-alive برای هر thread (مثل مرورگر/پروکسی)
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        started = time.perf_counter()
+        try:
+            conn.request('GET', prefix + paths[i % len(paths)], headers={'Host': host_header})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except Exception as exc:
+            conn.close()
+            local.conn = None
+            status = type(exc).__name__
+        return status, (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def http_queries(parts, path, host=None):
+    """
+    تعداد کوئری یک درخواست از هدر Server-Timing (RequestMetricsMiddleware)؛ None اگر درخواست
+    نمونه‌برداری نشده است (برای هر درخواست: DJANGO_METRICS_SAMPLE_RATE=1 روی سرور).
+    """
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    try:
+        conn.request('GET', parts.path.rstrip('/') + path, headers={'Host': host or parts.netloc})
+        response = conn.getresponse()
+        response.read()
+        match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+        return response.status, int(match.group(1)) if match else None
+    finally:
+        conn.close()
+
+
+def compare_reports(old, new):
+    """
+    سطرهای مقایسهٔ دو گزارش JSON (بر اساس نام مسیر): req/s، p95 و کوئری‌های گرم.
+    """
+    before = {row['name']: row for row in old['results']}
+    lines = []
+    for row in new['results']:
+        prev = before.get(row['name'])
+        if prev is None:
+            lines.append(f"{row['name']:<28} (new)")
+            continue
+
+        def delta(key, fmt='{:+.1f}'):
+            if prev.get(key) is None or row.get(key) is None:
+                return '   n/a'
+            change = row[key] - prev[key]
+            if prev[key]:
+                return f"{fmt.format(change)} ({change / prev[key] * 100:+.0f}%)"
+            return fmt.format(change)
+
+        lines.append(
+            f"{row['name']:<28} req/s {delta('rps')}  p95 {delta('p95')} ms  "
+            f"queries {delta('queries_warm', '{:+d}')}"
+        )
+    return lines
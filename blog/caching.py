@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+Versioned cache helpers shared by snapshots and fragments
+@author: Abbas Mahdavi
+"""
+
+# blog/caching.py
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# محدوده‌های نسخه: هر تغییری در داده‌های یک محدوده فقط شمارندهٔ آن را بالا می‌برد
+# و کلیدهای قدیمی خودبه‌خود بی‌اعتبار می‌شوند (نیازی به حذف تک‌تک کلیدها نیست).
+CONTENT_SCOPE = 'content'
+
+VERSION_KEY_PREFIX = 'blog:version:'
+
+
+def album_scope(album_id):
+    # نسخهٔ جداگانهٔ هر آلبوم (تصاویر و مشخصات نمایش آن در API تصاویر)
+    return f'album:{album_id}'
+
+
+def version_key(scope):
+    return f'{VERSION_KEY_PREFIX}{scope}'
+
+
+def _initial_version():
+    # اگر cache پاک شده باشد نسخهٔ جدید نباید با نسخه‌های قبلی برابر شود
+    return int(time.time() * 1000)
+
+
+def get_version(scope=CONTENT_SCOPE):
+    key = version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*scopes):
+    for scope in scopes or (CONTENT_SCOPE,):
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # کلید وجود نداشت (cache تازه یا پاک‌شده)
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def get_versioned(key, scope, builder, timeout=DEFAULT_TIMEOUT):
+    """
+    مقدار کش‌شده برای key را برمی‌گرداند به شرطی که با نسخهٔ فعلی scope ساخته شده باشد.
+    نسخه و مقدار با یک get_many خوانده می‌شوند (یک رفت‌وبرگشت به cache).
+    در صورت نبودن یا قدیمی بودن، builder() صدا زده و نتیجه ذخیره می‌شود.
+    """
+    vkey = version_key(scope)
+    found = cache.get_many([vkey, key])
+    version = found.get(vkey)
+    entry = found.get(key)
+    if version is not None and entry and entry.get('version') == version:
+        return entry['value']
+    if version is None:
+        version = get_version(scope)
+    value = builder()
+    cache.set(key, {'version': version, 'value': value}, timeout=timeout)
+    return value
+
+
+def store_versioned(key, scope, value, timeout=DEFAULT_TIMEOUT):
+    cache.set(key, {'version': get_version(scope), 'value': value}, timeout=timeout)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 06:12:45 2026
+
+Post card serialization for list views (fixed query count, no full post bodies)
+@author: Abbas Mahdavi
+"""
+
+# blog/cards.py
+from django.db.models import Prefetch, QuerySet
+
+from .helpers import _safe_image_url, _image_srcset, _get_post_url, _get_album_url, _short_summary_from_obj
+from .models import Post, Album, Category
+
+# ستون‌هایی که کارت پست لازم دارد؛ متن کامل (content) خوانده نمی‌شود
+POST_CARD_FIELDS = (
+    'id', 'title', 'slug', 'code', 'created_at', 'updated_at',
+    'summary', 'short_description', 'excerpt', 'excerpt_long', 'featured_image', 'image_variants',
+)
+ALBUM_CARD_FIELDS = ('id', 'title', 'slug', 'code', 'created_at', 'cover_image', 'image_variants')
+# هر لیست کارت پست دقیقاً همین تعداد کوئری دارد: ردیف‌ها + یک prefetch دسته‌ها
+POST_CARDS_QUERIES = 2
+
+
+def post_cards_queryset(qs=None, with_categories=True):
+    """
+    queryset پست‌ها با فقط ستون‌های کارت (خلاصه از گزیده‌های ذخیره‌شده، بدون content) و prefetch دسته‌ها.
+    """
+    qs = Post.objects.all() if qs is None else qs
+    qs = qs.only(*POST_CARD_FIELDS)
+    if with_categories:
+        qs = qs.prefetch_related(Prefetch('categories', queryset=Category.objects.only('id', 'slug')))
+    return qs
+
+
+def album_cards_queryset(qs=None):
+    qs = Album.objects.all() if qs is None else qs
+    return qs.only(*ALBUM_CARD_FIELDS)
+
+
+def post_card(p, summary_length=200):
+    return {
+        'id': p.id,
+        'title': p.title,
+        'created_at': p.created_at,
+        'get_absolute_url': _get_post_url(p),
+        'categories': [c.slug for c in p.categories.all()],
+        'short_summary': _short_summary_from_obj(p, summary_length),
+    }
+
+
+def post_cards(qs, summary_length=200):
+    """
+    کارت‌های پست؛ queryset (حتی برش‌خورده) آماده می‌شود و لیست از پیش خوانده‌شده همان‌طور استفاده می‌شود.
+    """
+    if isinstance(qs, QuerySet):
+        qs = post_cards_queryset(qs)
+    return [post_card(p, summary_length) for p in qs]
+
+
+def featured_post_card(post):
+    if not post:
+        return None
+    return {
+        'id': post.id,
+        'title': post.title,
+        'created_at': post.created_at,
+        'content': post.excerpt_long,
+        'summary': post.summary or post.excerpt,
+        'image_url': _safe_image_url(post, size='content'),
+        'image_srcset': _image_srcset(post),
+        'get_absolute_url': _get_post_url(post),
+    }
+
+
+def timeline_items(posts=(), albums=()):
+    """
+    آیتم‌های سایدبار «تازه‌ها» (kind، title، created_at، url) به ترتیب زمان نزولی.
+    """
+    items = [
+        {'kind': 'post', 'title': p.title, 'created_at': p.created_at, 'url': _get_post_url(p)} for p in posts
+    ] + [
+        {'kind': 'album', 'title': a.title, 'created_at': a.created_at, 'url': _get_album_url(a)} for a in albums
+    ]
+    return sorted(items, key=lambda x: x['created_at'] or 0, reverse=True)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:20:31 2026
+
+Site chrome provider (settings, menu, footer, sidebar categories, ads)
+@author: Abbas Mahdavi
+"""
+
+# blog/chrome.py
+import time
+
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .ads import build_inventory, inventory_timeout, ads_from_inventory, EMPTY_INVENTORY
+from .caching import get_version
+from .menus import compile_menus
+from .models import SiteSetting, FooterLink, FooterIcon, Ad
+from .stats import category_sidebar_list
+
+CHROME_SCOPE = 'chrome'
+CHROME_KEY_PREFIX = 'blog:chrome:'
+
+# ثبت تکه‌های chrome: name -> (builder, timeout, default, transform)
+# timeout=None یعنی تا تغییر نسخهٔ chrome معتبر است؛ timeout می‌تواند تابعی از مقدار ساخته‌شده
+# باشد (مثلاً تا مرز زمانی بعدی آگهی‌ها)؛ default در صورت خطای builder؛
+# transform (اختیاری) در هر درخواست روی مقدار کش‌شده اجرا می‌شود (مثلاً چرخش آگهی‌ها).
+_PIECES = {}
+
+# لایهٔ اول: کش داخل پروسه؛ name -> (version, expires_at, value)
+_local_cache = {}
+
+
+def chrome_piece(name, timeout=None, default=None, transform=None):
+    def decorator(builder):
+        _PIECES[name] = (builder, timeout, default, transform)
+        return builder
+    return decorator
+
+
+# ---------------------------
+# Builders (فقط هنگام miss در هر دو لایه اجرا می‌شوند)
+# ---------------------------
+@chrome_piece('site_settings')
+def _build_site_settings():
+    return SiteSetting.objects.first()  # singleton-like approach
+
+
+# همهٔ منوهای فعال با یک کوئری و URLهای resolve‌شده؛ در قالب: menus.footer.items و ...
+@chrome_piece('menus', default={})
+def _build_menus():
+    return compile_menus()
+
+
+@chrome_piece('main_menu')
+def _build_main_menu():
+    return ChromeProvider().get('menus').get('main')
+
+
+@chrome_piece('footer_links', default=[])
+def _build_footer_links():
+    # footer links/icons (prefer those linked to site, otherwise all visible)
+    site = ChromeProvider().get('site_settings')
+    qs = FooterLink.objects.filter(show=True)
+    if site:
+        qs = qs.filter(site=site)
+    return list(qs.order_by('order'))
+
+
+@chrome_piece('footer_icons', default=[])
+def _build_footer_icons():
+    site = ChromeProvider().get('site_settings')
+    qs = FooterIcon.objects.filter(show=True)
+    if site:
+        qs = qs.filter(site=site)
+    return list(qs.order_by('order'))
+
+
+@chrome_piece('categories', default=[])
+def _build_categories():
+    return category_sidebar_list()
+
+
+# آگهی‌ها به زمان (start_date/end_date) وابسته‌اند؛ پس عمر محدود دارند
+ADS_TIMEOUT = 60
+
+
+# موجودی آگهی‌ها فقط با تغییر یک Ad (نسخهٔ chrome) یا رسیدن به مرز شروع/پایان بعدی بازسازی می‌شود؛
+# انتخاب آگهی‌های هر درخواست در حافظه و بدون کوئری است (blog/ads.py)
+@chrome_piece('ads_by_group', timeout=inventory_timeout, default=EMPTY_INVENTORY, transform=ads_from_inventory)
+def _build_ads_by_group():
+    return build_inventory()
+
+
+@chrome_piece('ads', timeout=ADS_TIMEOUT, default=[])
+def _build_ads():
+    ads_list = []
+    for a in Ad.objects.filter(is_active=True).order_by('-created_at')[:10]:
+        try:
+            img = a.image.url
+        except Exception:
+            img = ''
+        ads_list.append({
+            'name': getattr(a, 'name', str(a)),
+            'image': img,
+            'html': getattr(a, 'external_code', '') or '',
+        })
+    return ads_list
+
+
+# ---------------------------
+# Provider
+# ---------------------------
+class ChromeProvider:
+    """
+    دسترسی دو لایه به تکه‌های chrome:
+      1) کش داخل پروسه (بدون هیچ I/O) به شرط برابر بودن نسخه
+      2) cache مشترک (Django cache) برای پروسه‌های دیگر
+    نسخهٔ chrome فقط یک بار در طول عمر provider (یک درخواست) خوانده می‌شود.
+    """
+
+    def __init__(self):
+        self._version = None
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = get_version(CHROME_SCOPE)
+        return self._version
+
+    def get(self, name):
+        builder, timeout, default, transform = _PIECES[name]
+        value = self._cached(name, builder, timeout, default)
+        return transform(value) if transform else value
+
+    def _cached(self, name, builder, timeout, default):
+        version = self.version
+        now = time.monotonic()
+        local = _local_cache.get(name)
+        if local and local[0] == version and (local[1] is None or local[1] > now):
+            return local[2]
+
+        key = f'{CHROME_KEY_PREFIX}{name}'
+        entry = cache.get(key)
+        if entry and entry.get('version') == version:
+            value = entry['value']
+            ttl = timeout(value) if callable(timeout) else timeout
+        else:
+            try:
+                value = builder()
+            except Exception:
+                value = default
+            ttl = timeout(value) if callable(timeout) else timeout
+            cache.set(key, {'version': version, 'value': value}, timeout=ttl)
+        _local_cache[name] = (version, now + ttl if ttl else None, value)
+        return value
+
+    def lazy(self, name):
+        return SimpleLazyObject(lambda: self.get(name))
+
+    def context(self, names=None):
+        """
+        dict از تکه‌ها به صورت lazy؛ تکه‌ای که قالب از آن استفاده نکند هزینه‌ای ندارد.
+        """
+        return {name: self.lazy(name) for name in (names or _PIECES)}
+
+
+    def warm(self, names=None):
+        """
+        تکه‌ها را بدون transform در کش داخل پروسه بارگذاری می‌کند تا رندر بعدی I/O نداشته باشد
+        (نسخهٔ async این کار را همزمان با کوئری‌های صفحه انجام می‌دهد).
+        """
+        for name in names or _PIECES:
+            builder, timeout, default, _transform = _PIECES[name]
+            self._cached(name, builder, timeout, default)
+
+
+def chrome_context(names=None):
+    return ChromeProvider().context(names)
+
+
+def warm_chrome(names=None):
+    ChromeProvider().warm(names)
+    return {}
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:05:52 2026
+
+Collision-free 6-digit code allocation (keyed permutation of a per-model counter)
+@author: Abbas Mahdavi
+"""
+
+# blog/codes.py
+import hashlib
+import hmac
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import CodeSequence
+
+CODE_DIGITS = 6
+CODE_SPACE = 10 ** CODE_DIGITS
+# فضای کد به صورت دو نیمهٔ سه‌رقمی (شبکهٔ Feistel متوازن روی 1000 × 1000)
+_HALF = 1000
+_ROUNDS = 8
+
+# بررسی کدهای قدیمی (تصادفی) در دسته‌های این اندازه
+_CHECK_CHUNK = 1000
+
+
+class CodeSpaceExhausted(Exception):
+    pass
+
+
+@lru_cache(maxsize=16)
+def _round_tables(key):
+    # جدول تابع هر دور برای همهٔ 1000 مقدار نیمه؛ یک بار برای هر کلید
+    secret = key.encode()
+    return tuple(
+        tuple(
+            int.from_bytes(hmac.new(secret, f'{r}:{x}'.encode(), hashlib.sha256).digest()[:4], 'big') % _HALF
+            for x in range(_HALF)
+        )
+        for r in range(_ROUNDS)
+    )
+
+
+def permute(index, key):
+    """
+    جایگشت کلیددار [0, CODE_SPACE): هر شمارنده دقیقاً یک کد ۶ رقمی و کدها قابل حدس نیستند.
+    """
+    left, right = divmod(index, _HALF)
+    for table in _round_tables(key):
+        left, right = right, (left + table[right]) % _HALF
+    return left * _HALF + right
+
+
+def unpermute(value, key):
+    left, right = divmod(value, _HALF)
+    for table in reversed(_round_tables(key)):
+        left, right = (right - table[left]) % _HALF, left
+    return left * _HALF + right
+
+
+def format_code(value):
+    return str(value).zfill(CODE_DIGITS)
+
+
+def _scope(model):
+    return model._meta.concrete_model._meta.model_name
+
+
+def _reserve(scope, count):
+    """
+    رزرو یک بازهٔ پیوسته از شمارنده؛ UPDATE اول قفل سطر را می‌گیرد و workerهای همزمان بازه‌های جدا می‌گیرند.
+    """
+    with transaction.atomic():
+        updated = CodeSequence.objects.filter(scope=scope).update(next_index=F('next_index') + count)
+        if not updated:
+            CodeSequence.objects.get_or_create(scope=scope)
+            CodeSequence.objects.filter(scope=scope).update(next_index=F('next_index') + count)
+        seq = CodeSequence.objects.get(scope=scope)
+    start = seq.next_index - count
+    if start >= CODE_SPACE:
+        raise CodeSpaceExhausted(f"all {CODE_SPACE} codes of '{scope}' are allocated")
+    return seq.key, start, min(CODE_SPACE, seq.next_index)
+
+
+def allocate_codes(model, count, taken=None):
+    """
+    count کد یکتای جدید برای model. بدون حلقهٔ آزمون و خطا: هر کد از یک شمارندهٔ رزروشده می‌آید؛
+    فقط کدهای قدیمی (تصادفی، پیش از این شمارنده) کنار گذاشته می‌شوند: از مجموعهٔ taken
+    (برای کارهای انبوه که کدهای موجود را یک بار می‌خوانند) یا با یک کوئری برای هر دسته.
+    """
+    scope = _scope(model)
+    codes = []
+    while len(codes) < count:
+        key, start, stop = _reserve(scope, count - len(codes))
+        for chunk_start in range(start, stop, _CHECK_CHUNK):
+            candidates = [
+                format_code(permute(i, key))
+                for i in range(chunk_start, min(stop, chunk_start + _CHECK_CHUNK))
+            ]
+            if taken is None:
+                used = set(model._default_manager.filter(code__in=candidates).values_list('code', flat=True))
+            else:
+                used = taken
+            codes.extend(code for code in candidates if code not in used)
+    if taken is not None:
+        taken.update(codes)
+    return codes
+
+
+def allocate_code(model):
+    return allocate_codes(model, 1)[0]
+
+
+def capacity_report(model):
+    """
+    وضعیت فضای کد: تعداد تخصیص‌یافته، کدهای قدیمی که شمارنده در آینده از رویشان می‌پرد،
+    و تعداد کدهای باقی‌مانده.
+    """
+    scope = _scope(model)
+    seq, _ = CodeSequence.objects.get_or_create(scope=scope)
+    used = model._default_manager.exclude(code__isnull=True).exclude(code='')
+    allocated = min(seq.next_index, CODE_SPACE)
+    legacy_ahead = 0
+    for code in used.values_list('code', flat=True).iterator():
+        if code.isdigit() and len(code) == CODE_DIGITS and unpermute(int(code), seq.key) >= allocated:
+            legacy_ahead += 1
+    remaining = CODE_SPACE - allocated - legacy_ahead
+    return {
+        'scope': scope,
+        'space': CODE_SPACE,
+        'allocated': allocated,
+        'used': used.count(),
+        'legacy_ahead': legacy_ahead,
+        'remaining': remaining,
+        'fill_ratio': 1 - remaining / CODE_SPACE,
+    }
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 03:52:06 2026
+
+Fixed thread pool with persistent per-thread DB connections for async views
+@author: Abbas Mahdavi
+"""
+
+# blog/db_pool.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+_executor = None
+_executor_lock = threading.Lock()
+# زمان باز شدن اتصال هر alias در thread جاری (برای DB_POOL_RECYCLE)
+_opened = threading.local()
+
+
+def pool_executor():
+    """
+    executor مخزن یا None اگر BLOG_DB_POOL_SIZE صفر است. threadها عمر پروسه را دارند و اتصال
+    دیتابیس هر کدام (اتصال‌ها در جنگو برای هر thread جدا هستند) بین درخواست‌ها باز می‌ماند؛
+    در نتیجه تعداد اتصال‌های هر پروسه حداکثر BLOG_DB_POOL_SIZE است.
+    """
+    global _executor
+    if settings.BLOG_DB_POOL_SIZE <= 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BLOG_DB_POOL_SIZE, thread_name_prefix='blog-db',
+                )
+    return _executor
+
+
+def _checkout():
+    # به جای close_old_connections (که با CONN_MAX_AGE=0 زیر ASGI همیشه می‌بندد)
+    opened = _opened.__dict__.setdefault('at', {})
+    now = time.monotonic()
+    for conn in connections.all(initialized_only=True):
+        if conn.connection is None:
+            opened.pop(conn.alias, None)
+            continue
+        expired = now - opened.get(conn.alias, now) >= settings.BLOG_DB_POOL_RECYCLE
+        broken = conn.errors_occurred or (conn.settings_dict['CONN_HEALTH_CHECKS'] and not conn.is_usable())
+        if expired or broken:
+            conn.close()
+            opened.pop(conn.alias, None)
+
+
+def _checkin():
+    opened = _opened.__dict__.setdefault('at', {})
+    for conn in connections.all(initialized_only=True):
+        if conn.connection is None:
+            opened.pop(conn.alias, None)
+        elif conn.in_atomic_block or conn.errors_occurred:
+            # تراکنش نیمه‌کاره یا خطا نباید به کار بعدی این thread برسد
+            conn.close()
+            opened.pop(conn.alias, None)
+        else:
+            opened.setdefault(conn.alias, time.monotonic())
+
+
+def pooled(part):
+    def run():
+        _checkout()
+        try:
+            return part()
+        finally:
+            _checkin()
+    return run
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 06:47:18 2026
+
+Plain-text post excerpts precomputed on save (list views never read the HTML body)
+@author: Abbas Mahdavi
+"""
+
+# blog/excerpts.py
+import html
+import re
+
+from django.utils.html import strip_tags
+
+# (طول، فیلد) ستون‌های متن سادهٔ Post، از کوتاه به بلند؛ کارت‌ها ۲۰۰ و پست ویژه ۴۰۰ کاراکتر لازم دارند
+EXCERPT_FIELDS = ((200, 'excerpt'), (400, 'excerpt_long'))
+ELLIPSIS = '…'
+
+_WHITESPACE = re.compile(r'\s+')
+_BLOCK_TAG = re.compile(r'<(?=/?(?:p|div|br|li|ul|ol|h[1-6]|tr|td|th|table|blockquote)\b)', re.IGNORECASE)
+
+
+def plain_text(content):
+    """
+    متن سادهٔ HTML خروجی CKEditor: بدون تگ، entityها (&nbsp; و &zwnj; و ...) باز و فاصله‌ها یکی.
+    """
+    if not content:
+        return ''
+    # فاصله پیش از تگ‌های بلوکی تا کلمه‌های دو بلوک (</p><p>) به هم نچسبند؛ تگ‌های درون‌خطی دست نمی‌خورند
+    text = html.unescape(strip_tags(_BLOCK_TAG.sub(r' \g<0>', content)))
+    # \s در re یونیکد است و فاصلهٔ نشکن (\xa0) را هم شامل می‌شود؛ نیم‌فاصله (\u200c) دست نمی‌خورد
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def truncate_text(text, length, preserve_words=True):
+    """
+    برش تا length کاراکتر با «…»؛ با preserve_words تا آخرین فاصله (اگر متن خیلی کوتاه نشود).
+    """
+    text = (text or '').strip()
+    if len(text) <= length:
+        return text
+    truncated = text[:length].rstrip()
+    if preserve_words:
+        last_space = truncated.rfind(' ')
+        if last_space > max(0, int(length * 0.4)):
+            truncated = truncated[:last_space]
+    return truncated.rstrip() + ELLIPSIS
+
+
+def compute_excerpts(content):
+    """
+    مقدار همهٔ ستون‌های EXCERPT_FIELDS از content (یک بار strip برای همهٔ طول‌ها).
+    """
+    text = plain_text(content)
+    return {field: truncate_text(text, length) for length, field in EXCERPT_FIELDS}
+
+
+def stored_excerpt(obj, length):
+    """
+    خلاصهٔ length کاراکتری از ستون‌های ذخیره‌شده (کوتاه‌ترین ستونی که کافی است)؛
+    None اگر شیء ستون مناسبی ندارد یا خالی است.
+    """
+    deferred = obj.get_deferred_fields() if hasattr(obj, 'get_deferred_fields') else set()
+    for size, field in EXCERPT_FIELDS:
+        if size < length or field in deferred:
+            continue
+        text = getattr(obj, field, None)
+        if not text:
+            return None
+        if size == length:
+            return text
+        cut = text.endswith(ELLIPSIS)
+        short = truncate_text(text[:-1] if cut else text, length)
+        # ستون بلندتر خودش بریده شده بود؛ برش کوتاه‌تر هم باید «…» داشته باشد
+        return short if short.endswith(ELLIPSIS) or not cut else short + ELLIPSIS
+    return None
+
+
+def backfill_excerpts(model, batch_size=500, only_missing=True):
+    """
+    محاسبهٔ ستون‌های خلاصه برای ردیف‌های موجود (keyset روی pk، فقط id و content خوانده می‌شود).
+    model می‌تواند مدل تاریخی migration باشد. تعداد ردیف‌های به‌روزشده را برمی‌گرداند.
+    """
+    fields = [field for _, field in EXCERPT_FIELDS]
+    qs = model._default_manager.order_by('pk')
+    if only_missing:
+        qs = qs.filter(**{fields[0]: ''}).exclude(content='')
+    count = 0
+    last_pk = 0
+    while True:
+        rows = list(qs.filter(pk__gt=last_pk).only('pk', 'content', *fields)[:batch_size])
+        if not rows:
+            return count
+        for row in rows:
+            for field, value in compute_excerpts(row.content).items():
+                setattr(row, field, value)
+        model._default_manager.bulk_update(rows, fields)
+        last_pk = rows[-1].pk
+        count += len(rows)
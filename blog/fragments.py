@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 01:18:26 2026
+
+Cached fragments for post_detail (article body + shared latest items)
+@author: Abbas Mahdavi
+"""
+
+# blog/fragments.py
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .caching import CONTENT_SCOPE, get_versioned
+from .helpers import _get_post_url, _get_album_url
+from .models import Post, Album
+
+LATEST_ITEMS_KEY = 'blog:fragment:latest_items'
+LATEST_ITEMS_LIMIT = 20
+
+POST_BODY_KEY_PREFIX = 'blog:fragment:post:'
+# کلید با updated_at عوض می‌شود؛ این فقط عمر نسخه‌های قدیمی (و تغییراتی مثل نام نویسنده) را محدود می‌کند
+POST_BODY_TIMEOUT = 60 * 60 * 24
+
+
+def build_latest_items():
+    """
+    تازه‌ترین پست‌ها و آلبوم‌ها (هر کدام LATEST_ITEMS_LIMIT تا) برای سایدبار، با URL از پیش ساخته‌شده.
+    """
+    items = []
+    for p in Post.objects.only('id', 'title', 'slug', 'code', 'created_at').order_by('-created_at')[:LATEST_ITEMS_LIMIT]:
+        items.append({
+            'kind': 'post',
+            'title': p.title,
+            'created_at': p.created_at,
+            'url': _get_post_url(p),
+        })
+    for a in Album.objects.only('id', 'title', 'slug', 'created_at').order_by('-created_at')[:LATEST_ITEMS_LIMIT]:
+        items.append({
+            'kind': 'album',
+            'title': a.title,
+            'created_at': a.created_at,
+            'url': _get_album_url(a),
+        })
+    return sorted(items, key=lambda x: x['created_at'] or 0, reverse=True)
+
+
+def latest_items():
+    """
+    لیست مشترک همهٔ صفحه‌های جزئیات؛ با نسخهٔ محتوا (هر ذخیره/حذف پست یا آلبوم) بازسازی می‌شود.
+    """
+    return get_versioned(LATEST_ITEMS_KEY, CONTENT_SCOPE, build_latest_items, timeout=None)
+
+
+def post_body_key(post):
+    return f'{POST_BODY_KEY_PREFIX}{post.code}:{post.updated_at.timestamp()}'
+
+
+def post_body_html(post):
+    """
+    HTML بدنهٔ مقاله (تصویر، عنوان، متا و متن CKEditor) کش‌شده با کلید code + updated_at؛
+    هر ذخیرهٔ پست updated_at و در نتیجه کلید را عوض می‌کند و پست حذف‌شده دیگر خوانده نمی‌شود.
+    """
+    key = post_body_key(post)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('partials/post_body.html', {'post': post})
+        cache.set(key, html, timeout=POST_BODY_TIMEOUT)
+    return html
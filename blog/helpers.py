@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+Shared presentation helpers (image urls, object urls, short summaries)
+@author: Abbas Mahdavi
+"""
+
+# blog/helpers.py
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.urls import get_script_prefix, reverse
+from django.utils.html import strip_tags
+
+from .excerpts import stored_excerpt
+from .images import IMAGE_SIZES
+
+
+def _safe_image_url(obj, field_names=('featured_image', 'image', 'cover_image', 'featured'), size=None, fmt='webp'):
+    """
+    آدرس اولین تصویر موجود؛ با size (thumb/card/content/full در blog/images.py)
+    نسخهٔ تغییر اندازه‌یافته برگردانده می‌شود و اگر هنوز ساخته نشده، فایل اصلی.
+    """
+    if not obj:
+        return None
+    width = IMAGE_SIZES.get(size) if size else None
+    for f in field_names:
+        if hasattr(obj, f):
+            val = getattr(obj, f)
+            if not val:
+                continue
+            if width and hasattr(obj, 'image_variant_url'):
+                variant = obj.image_variant_url(f, width, fmt)
+                if variant:
+                    return variant
+            try:
+                return val.url
+            except Exception:
+                if isinstance(val, str) and val:
+                    return val
+                continue
+    if hasattr(obj, 'image_url'):
+        try:
+            return getattr(obj, 'image_url')
+        except Exception:
+            return None
+    return None
+
+
+# همان کاراکترهای امنی که reverse() در مسیر نگه می‌دارد
+_URL_SAFE = "!$&'()*+,;=/~:@"
+
+
+@lru_cache(maxsize=None)
+def _route_template(name, params, prefix):
+    # مسیر با نشانگر به جای پارامترها؛ برای هر script prefix یک بار reverse()
+    url = reverse(name, kwargs={p: f'__{p}__' for p in params})
+    for p in params:
+        url = url.replace(f'__{p}__', '{%s}' % p)
+    return url
+
+
+def route_url(name, **values):
+    """
+    معادل reverse(name, kwargs=values) برای پارامترهای str بدون «/» (code و slug) بدون تطبیق
+    الگوهای URLconf برای هر ردیف؛ مقادیر مثل reverse() کدگذاری (percent-encode) می‌شوند.
+    """
+    template = _route_template(name, tuple(sorted(values)), get_script_prefix())
+    return template.format(**{k: quote(str(v), safe=_URL_SAFE) for k, v in values.items()})
+
+
+def _get_post_url(post):
+    if not post:
+        return '#'
+    if hasattr(post, 'get_absolute_url'):
+        try:
+            return post.get_absolute_url()
+        except Exception:
+            pass
+    code = getattr(post, 'code', None)
+    slug = getattr(post, 'slug', None)
+    if code and '/' not in code:
+        if slug and '/' not in slug:
+            return route_url('blog:object_by_code_with_slug', code=code, slug=slug)
+        return route_url('blog:object_by_code', code=code)
+    return '#'
+
+
+# ---------- helper for short summary ----------
+def _short_summary_from_obj(obj, length=200, preserve_words=True):
+    if not obj:
+        return ''
+    # اگر summary پر است، ناملموس (HTML) را بازگردان
+    if hasattr(obj, 'summary') and getattr(obj, 'summary'):
+        return getattr(obj, 'summary') or ''
+    # در غیر این صورت از short_description استفاده کن
+    if hasattr(obj, 'short_description') and getattr(obj, 'short_description'):
+        text = getattr(obj, 'short_description') or ''
+        # short_description معمولاً متن ساده است؛ درصورت تمایل truncate کن:
+        return (text if len(text) <= length else text[:length].rsplit(' ',1)[0] + "…")
+    # گزیدهٔ متن سادهٔ ذخیره‌شده (Post.excerpt، blog/excerpts.py)؛ لیست‌ها content را نمی‌خوانند
+    excerpt = stored_excerpt(obj, length)
+    if excerpt is not None:
+        return excerpt
+    if hasattr(obj, 'get_deferred_fields') and 'content' in obj.get_deferred_fields():
+        return ''
+    # fallback: پاک کردن تگ‌های HTML از content و truncate
+    content = getattr(obj, 'content', '') or ''
+    plain = strip_tags(content).strip()
+    if len(plain) <= length:
+        return plain
+    truncated = plain[:length].rstrip()
+    if not preserve_words:
+        return truncated + "…"
+    last_space = truncated.rfind(' ')
+    if last_space > max(0, int(length * 0.4)):
+        truncated = truncated[:last_space]
+    return truncated.rstrip() + "…"
+
+
+def _get_album_url(album):
+    if not album:
+        return '#'
+    if hasattr(album, 'get_absolute_url'):
+        try:
+            return album.get_absolute_url()
+        except Exception:
+            pass
+    slug = getattr(album, 'slug', '')
+    return route_url('blog:album_detail', slug=slug) if slug and '/' not in slug else '#'
+
+
+def _image_srcset(obj, field_names=('featured_image', 'image', 'cover_image'), fmt='webp'):
+    """
+    srcset اولین فیلد تصویری که نسخه‌هایش ساخته شده؛ رشتهٔ خالی در غیر این صورت.
+    """
+    if not obj or not hasattr(obj, 'image_srcset'):
+        return ''
+    for f in field_names:
+        if getattr(obj, f, None):
+            return obj.image_srcset(f, fmt)
+    return ''
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 00:41:53 2026
+
+HTTP validators (ETag) and Cache-Control for public pages
+@author: Abbas Mahdavi
+"""
+
+# blog/http_cache.py
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from .caching import CONTENT_SCOPE, get_version
+from .chrome import CHROME_SCOPE
+from .models import Post, Album, AlbumImage, Category
+
+# مدل‌هایی که صفحه‌های عمومی از آن‌ها ساخته می‌شوند؛ برای هر کدام بزرگ‌ترین زمان، بزرگ‌ترین pk و تعداد
+# (تعداد برای حذف‌ها) در مُهر صفحه می‌آید
+STAMP_MODELS = {
+    'post': (Post, 'updated_at'),
+    'album': (Album, 'created_at'),
+    'albumimage': (AlbumImage, None),
+    'category': (Category, None),
+}
+
+STAMP_KEY_PREFIX = 'blog:http:stamp:'
+
+
+def _model_stamp(name):
+    model, time_field = STAMP_MODELS[name]
+    aggregates = {'top': Max('pk'), 'count': Count('pk')}
+    if time_field:
+        aggregates['latest'] = Max(time_field)
+    found = model.objects.aggregate(**aggregates)
+    latest = found.get('latest')
+    return f"{name}:{found['count']}:{found['top']}:{latest.timestamp() if latest else ''}"
+
+
+def content_stamp(names, version=None):
+    """
+    مُهر دیتابیسی مدل‌های names. با نسخهٔ محتوا کش می‌شود (هر ذخیره/حذف آن را باطل می‌کند) و
+    حداکثر BLOG_HTTP_STAMP_TTL ثانیه معتبر است تا cache محلی هر پروسه هم دیر به‌روز نشود.
+    """
+    names = tuple(sorted(names))
+    version = get_version(CONTENT_SCOPE) if version is None else version
+    key = f"{STAMP_KEY_PREFIX}{version}:{','.join(names)}"
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = '|'.join(_model_stamp(name) for name in names)
+        cache.set(key, stamp, timeout=settings.BLOG_HTTP_STAMP_TTL)
+    return stamp
+
+
+def page_etag(request, names):
+    user = request.user
+    version = get_version(CONTENT_SCOPE)
+    parts = [
+        # نسخهٔ محتوا با هر ذخیره/حذف پست، آلبوم، تصویر آلبوم و دسته بالا می‌رود (blog/signals.py)، حتی
+        # ویرایشی که در مُهر دیتابیسی دیده نمی‌شود (عنوان آلبوم، caption تصویر)؛ مُهر برای تغییرات بدون
+        # سیگنال (bulk_create، update) است
+        str(version),
+        content_stamp(names, version),
+        str(get_version(CHROME_SCOPE)),
+        # صفحه برای کاربر واردشده (لینک ویرایش و ...) و برای درخواست AJAX متفاوت است
+        str(user.pk) if user.is_authenticated else 'anon',
+        request.headers.get('x-requested-with', ''),
+    ]
+    return '"%s"' % hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+def _finish(request, response, etag, max_age, s_maxage):
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, max_age=0)
+        else:
+            proxy_age = settings.BLOG_HTTP_S_MAXAGE if s_maxage is None else s_maxage
+            patch_cache_control(response, public=True, max_age=max_age, s_maxage=proxy_age)
+        patch_vary_headers(response, ('Cookie', 'X-Requested-With'))
+    return response
+
+
+def conditional_page(models, max_age=0, s_maxage=None):
+    """
+    ETag از مُهر models (+ نسخهٔ chrome و کاربر) و پاسخ 304 بدون اجرای view وقتی If-None-Match
+    برابر است. Cache-Control برای reverse proxy: عمومی برای مهمان، private برای کاربر واردشده.
+    برای viewهای async (blog/async_views.py) هم کار می‌کند.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                # page_etag کاربر (session) و cache را می‌خواند؛ I/O همگام است
+                etag = await sync_to_async(page_etag)(request, models)
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, max_age, s_maxage)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag = page_etag(request, models)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(request, response, etag, max_age, s_maxage)
+        return wrapper
+    return decorator
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:10:26 2026
+
+Responsive image derivatives (multiple widths, WebP/AVIF/JPEG) with Pillow
+@author: Abbas Mahdavi
+"""
+
+# blog/images.py
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from .caching import CONTENT_SCOPE, bump_version
+
+logger = logging.getLogger(__name__)
+
+# عرض‌های خروجی؛ عرض‌های بزرگ‌تر از اصل تصویر ساخته نمی‌شوند
+IMAGE_WIDTHS = (320, 640, 1024, 1600)
+
+# اندازهٔ مناسب هر جایگاه (برای _safe_image_url)
+IMAGE_SIZES = {
+    'thumb': 320,
+    'card': 640,
+    'content': 1024,
+    'full': 1600,
+}
+
+_FORMATS = {
+    # fmt: (Pillow format, ext, save options)
+    'avif': ('AVIF', 'avif', {'quality': 55}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# فقط فرمت‌هایی که Pillow نصب‌شده پشتیبانی می‌کند
+IMAGE_FORMATS = tuple(
+    fmt for fmt in ('avif', 'webp', 'jpeg')
+    if fmt == 'jpeg' or features.check(fmt)
+)
+
+HASH_LENGTH = 12
+
+
+def _content_hash(fieldfile):
+    digest = hashlib.sha1()
+    fieldfile.open('rb')
+    try:
+        for chunk in fieldfile.chunks():
+            digest.update(chunk)
+    finally:
+        fieldfile.close()
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def derivative_name(source_name, digest, width, fmt):
+    """
+    کنار فایل اصلی با نام وابسته به محتوا: posts/featured/a.jpg -> posts/featured/a.<hash>.640w.webp
+    """
+    directory, filename = posixpath.split(source_name)
+    stem = filename.rsplit('.', 1)[0]
+    return posixpath.join(directory, f'{stem}.{digest}.{width}w.{_FORMATS[fmt][1]}')
+
+
+def _target_widths(width):
+    # عرض‌های استاندارد کوچک‌تر از اصل + خود اصل (حداکثر بزرگ‌ترین عرض)
+    top = min(width, IMAGE_WIDTHS[-1])
+    return [w for w in IMAGE_WIDTHS if w < top] + [top]
+
+
+def _encode(image, fmt):
+    pil_format, _ext, options = _FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        # JPEG شفافیت ندارد؛ روی زمینهٔ سفید
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.getchannel('A'))
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    buf = io.BytesIO()
+    image.save(buf, pil_format, **options)
+    return buf.getvalue()
+
+
+def generate_derivatives(fieldfile):
+    """
+    ساخت همهٔ نسخه‌های یک فایل تصویر. idempotent: نام‌ها به محتوای فایل وابسته‌اند
+    و فایلی که از قبل وجود دارد دوباره ساخته نمی‌شود.
+    خروجی: ورودی image_variants برای همین فیلد.
+    """
+    storage = fieldfile.storage
+    digest = _content_hash(fieldfile)
+    fieldfile.open('rb')
+    try:
+        with Image.open(fieldfile) as source:
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ('RGB', 'RGBA'):
+                source = source.convert('RGBA' if 'A' in source.getbands() or source.mode == 'P' else 'RGB')
+            width, height = source.size
+
+            variants = {fmt: [] for fmt in IMAGE_FORMATS}
+            for target in _target_widths(width):
+                resized = None
+                for fmt in IMAGE_FORMATS:
+                    name = derivative_name(fieldfile.name, digest, target, fmt)
+                    if not storage.exists(name):
+                        if resized is None:
+                            resized = source if target >= width else source.resize(
+                                (target, max(1, round(height * target / width))), Image.LANCZOS,
+                            )
+                        saved = storage.save(name, ContentFile(_encode(resized, fmt)))
+                        if saved != name:
+                            # پروسهٔ دیگری همزمان همین نسخه را ساخته است؛ همان را نگه دار
+                            storage.delete(saved)
+                    variants[fmt].append([target, name])
+    finally:
+        fieldfile.close()
+
+    return {
+        'source': fieldfile.name,
+        'hash': digest,
+        'width': width,
+        'height': height,
+        'variants': variants,
+    }
+
+
+def needs_derivatives(instance, force=False):
+    current = instance.image_variants or {}
+    for field in instance.IMAGE_FIELDS:
+        file = getattr(instance, field)
+        entry = current.get(field)
+        if file and (force or not entry or entry.get('source') != file.name):
+            return True
+        if not file and entry:
+            return True
+    return False
+
+
+def process_instance(instance, force=False):
+    """
+    نسخه‌های همهٔ فیلدهای تصویری یک شیء را (در صورت نیاز) می‌سازد و ذخیره می‌کند.
+    ذخیره با update() انجام می‌شود تا سیگنال‌های save دوباره اجرا نشوند.
+    از مسیر درخواست صدا زده نمی‌شود؛ کار 'images.derivatives' در blog/jobs.py.
+    """
+    if not needs_derivatives(instance, force):
+        return False
+    variants = dict(instance.image_variants or {})
+    for field in instance.IMAGE_FIELDS:
+        file = getattr(instance, field)
+        if not file:
+            variants.pop(field, None)
+            continue
+        entry = variants.get(field)
+        if force or not entry or entry.get('source') != file.name:
+            try:
+                variants[field] = generate_derivatives(file)
+            except Exception:
+                logger.exception("image derivatives failed for %s.%s (pk=%s)", instance._meta.label, field, instance.pk)
+                variants.pop(field, None)
+    instance.image_variants = variants
+    type(instance).objects.filter(pk=instance.pk).update(image_variants=variants)
+    # آدرس تصاویر در snapshot و کش‌های محتوا (و مثلاً API تصاویر آلبوم) عوض شده است
+    bump_version(CONTENT_SCOPE, *instance.cache_scopes())
+    return True
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 04:41:25 2026
+
+Sampled per-request SQL/template/latency metrics, Server-Timing and query budgets
+@author: Abbas Mahdavi
+"""
+
+# blog/instrumentation.py
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+# تعداد آخرین نمونه‌هایی که برای هر URL name نگه داشته می‌شود
+METRICS_WINDOW = 512
+
+# اندازه‌گیری درخواست جاری؛ None برای درخواست‌های نمونه‌گیری‌نشده (هزینهٔ wrapperها فقط یک get است).
+# contextvar به threadهای sync_to_async (و مخزن blog/db_pool.py) هم می‌رسد
+_current = contextvars.ContextVar('blog_request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql_time', 'template_time', 'template_depth', 'lock')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        # بخش‌های همزمان نماهای async از چند thread کوئری می‌زنند
+        self.lock = threading.Lock()
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        with metrics.lock:
+            metrics.queries += 1
+            metrics.sql_time += elapsed
+
+
+def _install_query_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+_template_render = Template.render
+
+
+def _timed_render(self, context):
+    metrics = _current.get()
+    # includeهای داخل قالب هم از Template.render رد می‌شوند؛ فقط بیرونی‌ترین رندر شمرده می‌شود
+    if metrics is None or metrics.template_depth:
+        return _template_render(self, context)
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        metrics.template_time += time.perf_counter() - started
+        metrics.template_depth -= 1
+
+
+def install():
+    """
+    wrapper کوئری‌ها و زمان‌سنج رندر قالب؛ فقط وقتی RequestMetricsMiddleware واقعاً در MIDDLEWARE
+    است (از __init__ آن) صدا زده می‌شود و import این ماژول به‌تنهایی چیزی را عوض نمی‌کند.
+    """
+    connection_created.connect(_install_query_wrapper, dispatch_uid='blog.instrumentation')
+    if Template.render is not _timed_render:
+        Template.render = _timed_render
+
+
+# ---------- هیستوگرام داخل پروسه ----------
+_samples = {}
+_samples_lock = threading.Lock()
+
+
+def _record(name, total, metrics):
+    with _samples_lock:
+        window = _samples.get(name)
+        if window is None:
+            window = _samples[name] = deque(maxlen=METRICS_WINDOW)
+        window.append((total, metrics.sql_time, metrics.queries, metrics.template_time))
+
+
+def _percentile(sorted_values, ratio):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+
+def metrics_snapshot():
+    """
+    خلاصهٔ آخرین METRICS_WINDOW نمونهٔ هر URL name (زمان‌ها به میلی‌ثانیه)؛ فقط همین پروسه.
+    """
+    with _samples_lock:
+        samples = {name: list(window) for name, window in _samples.items()}
+    report = {}
+    for name, rows in sorted(samples.items()):
+        totals = sorted(row[0] * 1000 for row in rows)
+        queries = sorted(row[2] for row in rows)
+        report[name] = {
+            'count': len(rows),
+            'total_ms': {p: round(_percentile(totals, r), 2) for p, r in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))},
+            'queries': {'p50': _percentile(queries, 0.5), 'max': queries[-1]},
+            'sql_ms_mean': round(sum(row[1] for row in rows) * 1000 / len(rows), 2),
+            'template_ms_mean': round(sum(row[3] for row in rows) * 1000 / len(rows), 2),
+        }
+    return report
+
+
+def reset_metrics():
+    with _samples_lock:
+        _samples.clear()
+
+
+# ---------- middleware ----------
+def _sampled():
+    if settings.BLOG_QUERY_BUDGET_ACTION == 'raise':
+        # بودجه در تست‌ها برای همهٔ درخواست‌ها بررسی می‌شود
+        return True
+    rate = settings.BLOG_METRICS_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def _start():
+    # اتصال‌هایی که پیش از بارگذاری این ماژول باز شده‌اند سیگنال connection_created را ندیده‌اند
+    for conn in connections.all(initialized_only=True):
+        _install_query_wrapper(conn)
+    return RequestMetrics()
+
+
+def _finish(request, response, metrics, started):
+    total = time.perf_counter() - started
+    name = _view_name(request)
+    _record(name, total, metrics)
+    if settings.BLOG_METRICS_SERVER_TIMING:
+        response.headers['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'tpl;dur={metrics.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+    budget = settings.BLOG_QUERY_BUDGETS.get(name)
+    if budget is not None and metrics.queries > budget:
+        message = f"{name}: {metrics.queries} queries (budget {budget}) for {request.path}"
+        if settings.BLOG_QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        if settings.BLOG_QUERY_BUDGET_ACTION == 'log':
+            logger.warning("query budget exceeded: %s", message)
+    return response
+
+
+class RequestMetricsMiddleware:
+    """
+    برای درصدی از درخواست‌ها (BLOG_METRICS_SAMPLE_RATE) تعداد و زمان SQL، زمان رندر قالب و کل
+    درخواست را اندازه می‌گیرد؛ هدر Server-Timing، هیستوگرام هر URL name و بودجهٔ کوئری
+    (BLOG_QUERY_BUDGETS). باید اولین middleware باشد تا زمان کل درست باشد.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+        metrics = _start()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+        metrics = _start()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _finish(request, response, metrics, started)
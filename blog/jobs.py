@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:31:17 2026
+
+Background jobs: image derivatives, album covers, search index, cache warming
+@author: Abbas Mahdavi
+"""
+
+# blog/jobs.py
+from django.apps import apps
+from django.db.models import Q
+
+from . import search
+from .caching import CONTENT_SCOPE, bump_version
+from .images import process_instance
+from .models import Post, Album, SearchDocument
+from .snapshot import rebuild_homepage_snapshot
+from .tasks import task, enqueue
+
+
+@task('images.derivatives')
+def build_image_derivatives(label, pk):
+    instance = apps.get_model(label).objects.filter(pk=pk).first()
+    if instance is not None and process_instance(instance):
+        enqueue('cache.warm_homepage')
+
+
+@task('albums.select_cover')
+def select_album_cover(album_id):
+    """
+    اگر آلبوم عکس شاخص ندارد، اولین عکس آلبوم شاخص می‌شود (به جای ذخیرهٔ دوم در Album.save و admin).
+    """
+    album = Album.objects.filter(pk=album_id).first()
+    if album is None or album.cover_image:
+        return
+    first_image = album.images.order_by('order', 'id').first()
+    if first_image is None:
+        return
+    # update شرطی: اگر در این فاصله عکس شاخص دستی تنظیم شده، دست نمی‌خورد
+    updated = Album.objects.filter(
+        Q(cover_image='') | Q(cover_image__isnull=True), pk=album_id,
+    ).update(cover_image=first_image.image.name)
+    if updated:
+        album.cover_image = first_image.image.name
+        process_instance(album)
+        bump_version(CONTENT_SCOPE)
+        enqueue('cache.warm_homepage')
+
+
+@task('search.index')
+def index_search_document(kind, pk):
+    model = Post if kind == SearchDocument.KIND_POST else Album
+    obj = model.objects.filter(pk=pk).prefetch_related('categories').first()
+    if obj is None:
+        search.remove_object(kind, pk)
+    else:
+        search.index_object(obj)
+
+
+@task('search.refresh_categories')
+def refresh_search_categories(kind, object_ids):
+    search.refresh_categories(kind, object_ids)
+
+
+@task('cache.warm_homepage', max_attempts=1)
+def warm_homepage():
+    # snapshot را پیش از اولین درخواست بازسازی کن
+    rebuild_homepage_snapshot()
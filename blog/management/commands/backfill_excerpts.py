@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 07:05:51 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/backfill_excerpts.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.caching import CONTENT_SCOPE, bump_version
+from blog.excerpts import backfill_excerpts
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the stored plain-text excerpts of posts (rows saved without Post.save(), "
+        "e.g. bulk imports; --all recomputes every post after changing blog/excerpts.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per bulk_update.")
+        parser.add_argument('--all', action='store_true', help="Recompute all posts, not only empty excerpts.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = backfill_excerpts(Post, max(1, options['batch_size']), only_missing=not options['all'])
+        if not count:
+            self.stdout.write(self.style.WARNING("No posts without excerpts found."))
+            return
+        # bulk_update سیگنال ندارد؛ کش‌های لیست‌ها (snapshot صفحهٔ اصلی) باطل شوند
+        bump_version(CONTENT_SCOPE)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} posts updated in {elapsed:.1f} s ({count / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
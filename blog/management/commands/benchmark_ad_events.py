@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:58:30 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_ad_events.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from blog.ad_tracking import AdEventBuffer, FLUSH_SIZE, VIEW
+from blog.models import Ad, AdView
+
+
+class Command(BaseCommand):
+    help = "Compare per-event ad impression writes with the buffered bulk pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pageviews', type=int, default=2000)
+        parser.add_argument('--ads-per-page', type=int, default=6, help="Header + main + sidebar ads on one page.")
+        parser.add_argument('--flush-size', type=int, default=FLUSH_SIZE)
+        parser.add_argument('--keep', action='store_true', help="Keep the recorded rows (default: roll back).")
+
+    def _report(self, label, events, elapsed, queries):
+        self.stdout.write(
+            f"{label:<9} events={events:<7} {elapsed * 1000:9.1f} ms  "
+            f"{events / elapsed if elapsed else 0:10.0f} events/s  queries={queries}"
+        )
+
+    def _counting(self):
+        counter = {'queries': 0}
+
+        def wrapper(execute, sql, params, many, context):
+            counter['queries'] += 1
+            return execute(sql, params, many, context)
+        return counter, connection.execute_wrapper(wrapper)
+
+    def handle(self, *args, **options):
+        ad_ids = list(Ad.objects.values_list('pk', flat=True))
+        created = []
+        if not ad_ids:
+            created = [
+                Ad(name=f'benchmark {i}', group=Ad.GROUP_SIDEBAR, is_active=False) for i in range(10)
+            ]
+            Ad.objects.bulk_create(created)
+            ad_ids = list(Ad.objects.filter(name__startswith='benchmark ').values_list('pk', flat=True))
+        rnd = random.Random(7)
+        events = [
+            (rnd.choice(ad_ids), f'10.0.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}')
+            for _ in range(options['pageviews'] * options['ads_per_page'])
+        ]
+
+        # حالت ساده: یک INSERT و یک UPDATE برای هر نمایش
+        with transaction.atomic():
+            counter, wrapped = self._counting()
+            with wrapped:
+                t0 = time.perf_counter()
+                for ad_id, ip in events:
+                    AdView.objects.create(ad_id=ad_id, ip_address=ip)
+                    Ad.objects.filter(pk=ad_id).update(impressions_count=F('impressions_count') + 1)
+                elapsed = time.perf_counter() - t0
+            self._report('naive', len(events), elapsed, counter['queries'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        # حالت بافر: bulk_create + یک UPDATE تجمیعی در هر flush
+        buffer = AdEventBuffer(flush_size=10 ** 9, flush_interval=3600)
+        with transaction.atomic():
+            counter, wrapped = self._counting()
+            with wrapped:
+                t0 = time.perf_counter()
+                for n, (ad_id, ip) in enumerate(events, 1):
+                    buffer.record(VIEW, ad_id, ip)
+                    if n % options['flush_size'] == 0:
+                        buffer.flush()
+                buffer.flush()
+                elapsed = time.perf_counter() - t0
+            self._report('buffered', len(events), elapsed, counter['queries'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+        if created and not options['keep']:
+            Ad.objects.filter(pk__in=ad_ids).delete()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:41:09 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_ad_selection.py
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog.ads import AD_GROUPS, select_ads
+from blog.models import Ad
+
+
+def _python_filter():
+    # روش قبلی: همهٔ آگهی‌های فعال و فیلتر is_currently_active در پایتون
+    by_group = {g: [] for g in AD_GROUPS}
+    for ad in Ad.objects.filter(is_active=True).order_by('-created_at'):
+        if ad.group in by_group and ad.is_currently_active():
+            by_group[ad.group].append(ad)
+    return by_group
+
+
+class Command(BaseCommand):
+    help = "Benchmark SQL-side ad eligibility selection against Python-side filtering (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ads', type=int, default=10000)
+        parser.add_argument('--runs', type=int, default=50)
+
+    def _seed(self, count):
+        rnd = random.Random(11)
+        now = timezone.now()
+        ads = []
+        for i in range(count):
+            start = now + timedelta(days=rnd.randint(-60, 30)) if rnd.random() < 0.7 else None
+            end = now + timedelta(days=rnd.randint(-30, 60)) if rnd.random() < 0.7 else None
+            cap = rnd.choice([None, 0, 100, 1000])
+            ads.append(Ad(
+                name=f'benchmark {i}',
+                group=rnd.choice(AD_GROUPS),
+                is_active=rnd.random() < 0.6,
+                start_date=start,
+                end_date=end,
+                max_impressions=cap,
+                impressions_count=rnd.randint(0, 1500),
+                weight=rnd.randint(1, 5),
+            ))
+        Ad.objects.bulk_create(ads, batch_size=1000)
+
+    def _time(self, label, func, runs):
+        timings = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"{label:<14} p50={timings[len(timings) // 2]:8.2f} ms  "
+            f"p99={timings[min(len(timings) - 1, int(len(timings) * 0.99))]:8.2f} ms  "
+            f"selected={sum(len(v) for v in result.values())}"
+        )
+        return result
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['ads'])
+            self.stdout.write(f"ads={Ad.objects.count()} active={Ad.objects.filter(is_active=True).count()}")
+
+            old = self._time('python filter', _python_filter, options['runs'])
+            new = self._time('select_ads', select_ads, options['runs'])
+            same = all({a.pk for a in old[g]} == {a.pk for a in new[g]} for g in AD_GROUPS)
+            self.stdout.write(f"same result: {same}")
+
+            sql, params = Ad.objects.currently_active().filter(group__in=list(AD_GROUPS)).query.sql_with_params()
+            explain = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+            with connection.cursor() as cursor:
+                cursor.execute(explain + sql, params)
+                for row in cursor.fetchall():
+                    self.stdout.write(f"  plan: {row}")
+            transaction.set_rollback(True)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 04:10:33 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_db_connections.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog.models import Post, Category
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-request connection setup against a persistent connection (CONN_MAX_AGE)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=20, help="Queries per simulated request.")
+
+    def _request(self, queries):
+        # کوئری‌های کوچک مثل یک صفحه (شمارنده‌ها، exists و ...)
+        for i in range(queries):
+            if i % 2:
+                Category.objects.exists()
+            else:
+                Post.objects.filter(pk=i).exists()
+
+    def _time(self, label, runs, func):
+        timings = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        mean = sum(timings) / len(timings)
+        self.stdout.write(
+            f"{label:<22} mean={mean:8.3f} ms  p50={timings[len(timings) // 2]:8.3f} ms  "
+            f"p99={timings[min(len(timings) - 1, int(len(timings) * 0.99))]:8.3f} ms"
+        )
+        return mean
+
+    def handle(self, *args, **options):
+        runs, queries = options['requests'], options['queries']
+        db = settings.DATABASES['default']
+        self.stdout.write(
+            f"{connection.vendor}: CONN_MAX_AGE={db.get('CONN_MAX_AGE')} "
+            f"CONN_HEALTH_CHECKS={db.get('CONN_HEALTH_CHECKS')} queries/request={queries}"
+        )
+
+        def connect_only():
+            connection.close()
+            connection.ensure_connection()
+
+        def new_connection_request():
+            # CONN_MAX_AGE=0: هر درخواست اتصال تازه می‌سازد و در پایان می‌بندد
+            connection.close()
+            self._request(queries)
+            connection.close()
+
+        def persistent_request():
+            # اتصال ماندگار؛ health check یک ping در ابتدای هر درخواست است
+            connection.ensure_connection()
+            if db.get('CONN_HEALTH_CHECKS'):
+                connection.is_usable()
+            self._request(queries)
+
+        connect = self._time('connect', runs, connect_only)
+        fresh = self._time('new connection/request', runs, new_connection_request)
+        connection.ensure_connection()
+        persistent = self._time('persistent', runs, persistent_request)
+        self.stdout.write(
+            f"connection setup ≈ {connect:.3f} ms; persistent saves {fresh - persistent:.3f} ms/request "
+            f"({(fresh - persistent) / fresh * 100 if fresh else 0:.0f}%)"
+        )
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 03:21:40 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_http.py
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarking import http_load, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers with concurrent keep-alive GETs. To compare WSGI and ASGI run e.g. "
+        "`gunicorn mysite.wsgi -w 4` and `DJANGO_ASYNC_VIEWS=1 uvicorn mysite.asgi:application --workers 4` "
+        "on two ports and pass both base URLs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('bases', nargs='+', help="Base URLs, e.g. http://127.0.0.1:8000 http://127.0.0.1:8001")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to request (repeatable, round-robin). Default: /")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--host', default=None, help="Host header (default: from the URL).")
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/']
+        for base in options['bases']:
+            parts = urlsplit(base)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f"only http:// base URLs are supported: {base}")
+            self._run(parts, paths, options)
+
+    def _run(self, parts, paths, options):
+        results, elapsed = http_load(
+            parts, paths, options['requests'], options['concurrency'],
+            warmup=options['warmup'], host=options['host'],
+        )
+        timings = sorted(ms for _, ms in results)
+        statuses = Counter(status for status, _ in results)
+        self.stdout.write(
+            f"{parts.scheme}://{parts.netloc}: {len(results) / elapsed:8.1f} req/s  "
+            f"p50={percentile(timings, 0.5):7.1f} ms  p95={percentile(timings, 0.95):7.1f} ms  "
+            f"p99={percentile(timings, 0.99):7.1f} ms  "
+            f"c={options['concurrency']}  status={dict(statuses)}"
+        )
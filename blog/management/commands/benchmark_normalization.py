@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:40:12 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_normalization.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.persian import normalize, to_latin_digits, slug_base
+from blog.search import html_to_text
+from blog.models import Post
+
+# واژه‌ها عمداً با انواع مختلف نوشتاری: ی/ک عربی، اعراب، کشیده، نیم‌فاصله و ارقام
+_WORDS = [
+    'کتاب', 'كتاب', 'ایران', 'ايران', 'می‌خواهم', 'مي خواهم', 'کلاس‌‌ها',
+    'خانه​‌ی', 'عِلم', 'مــدرسه', 'رحمةً', 'مقاله‍', '۱۴۰۳', '١٤٠٣', '2024',
+    'سفارش', 'آلبوم', 'عکس‌های', 'نمایشگاه', 'هنر', '&zwnj;', '&nbsp;', 'ساختمانِ',
+]
+
+
+def _corpus(size, seed):
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(size):
+        words = rnd.choices(_WORDS, k=rnd.randint(40, 400))
+        docs.append(' '.join(words))
+    return docs
+
+
+class Command(BaseCommand):
+    help = "Benchmark Persian text normalization (search indexing, queries, slugs, codes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, default=20000, help="Number of synthetic documents.")
+        parser.add_argument('--seed', type=int, default=1404)
+        parser.add_argument(
+            '--from-db', action='store_true',
+            help="Use the content of existing posts instead of a synthetic corpus.",
+        )
+
+    def _run(self, label, func, items):
+        chars = sum(len(i) for i in items)
+        t0 = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - t0
+        rate = chars / elapsed / 1e6 if elapsed else 0.0
+        self.stdout.write(
+            f"{label:<16} items={len(items):<8} chars={chars:<11} "
+            f"{elapsed * 1000:9.1f} ms  {rate:7.2f} Mchar/s  {elapsed / len(items) * 1e6:8.2f} us/item"
+        )
+
+    def handle(self, *args, **options):
+        if options['from_db']:
+            docs = [html_to_text(c) for c in Post.objects.values_list('content', flat=True) if c]
+        else:
+            docs = _corpus(options['docs'], options['seed'])
+        if not docs:
+            self.stdout.write(self.style.WARNING("No documents to benchmark."))
+            return
+
+        titles = [d[:60] for d in docs]
+        codes = ['۱۲۳۴۵۶', '١٢٣٤٥٦', '123456'] * max(1, len(docs) // 3)
+
+        self._run('normalize', normalize, docs)
+        self._run('slug_base', lambda t: slug_base(t, 'post'), titles)
+        self._run('to_latin_digits', to_latin_digits, codes)
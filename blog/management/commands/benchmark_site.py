@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 05:48:20 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_site.py
+import json
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.benchmarking import (
+    client_run, compare_reports, current_commit, dataset_counts, http_load, http_queries, public_urls, summarize,
+    timeline_urls,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every public URL in blog/urls.py (throughput, p50/p95/p99, query counts) in-process "
+        "with the test client or over HTTP against a running server; save JSON to compare commits. "
+        "Seed data first with `seed_benchmark_data` (timeline at scale: "
+        "`seed_benchmark_data --posts 100000 --albums 100000 --images 1`, then `--only ajax_timeline`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('client', 'http'), default='client')
+        parser.add_argument('--base', default='http://127.0.0.1:8000', help="Server base URL (http mode).")
+        parser.add_argument('--host', default=None, help="Host header (default: localhost / from --base).")
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per URL.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent connections (http mode).")
+        parser.add_argument('--warmup', type=int, default=20, help="Untimed requests per URL (http mode).")
+        parser.add_argument('--only', action='append', help="URL name to run (repeatable).")
+        parser.add_argument(
+            '--timeline-depth', type=float, action='append', dest='timeline_depths',
+            help="Also run ajax_timeline with a cursor this deep into the posts, 0-1 (repeatable; default 0.5 and 0.99).",
+        )
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--compare', help="Earlier JSON report to print deltas against.")
+
+    def handle(self, *args, **options):
+        urls = public_urls() + timeline_urls(tuple(options['timeline_depths'] or (0.5, 0.99)))
+        if options['only']:
+            # ajax_timeline صفحه‌های cursor دار (ajax_timeline@...) را هم شامل می‌شود
+            urls = [(name, path) for name, path in urls if name.partition('@')[0] in options['only']]
+        if not urls:
+            raise CommandError("no URLs to benchmark (empty database? run seed_benchmark_data first)")
+
+        if options['mode'] == 'http':
+            parts = urlsplit(options['base'])
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f"only http:// base URLs are supported: {options['base']}")
+
+        rows = []
+        for name, path in urls:
+            if options['mode'] == 'client':
+                row = client_run(path, max(1, options['requests']), host=options['host'] or 'localhost')
+            else:
+                row = self._http_row(parts, path, options)
+            row = {'name': name, 'path': path, **row}
+            rows.append(row)
+            self.stdout.write(
+                f"{name:<28} {row['status']!s:>4} {row['rps'] or 0:8.1f} req/s  p50={row['p50']:7.1f} "
+                f"p95={row['p95']:7.1f} p99={row['p99']:7.1f} ms  "
+                f"queries cold={row['queries_cold']} warm={row['queries_warm']}"
+            )
+
+        report = {
+            'commit': current_commit(),
+            'created': timezone.now().isoformat(),
+            'mode': options['mode'],
+            'base': options['base'] if options['mode'] == 'http' else None,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'] if options['mode'] == 'http' else 1,
+            'dataset': dataset_counts(),
+            'results': rows,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as fh:
+                old = json.load(fh)
+            self.stdout.write(f"Compared with {old.get('commit') or options['compare']}:")
+            for line in compare_reports(old, report):
+                self.stdout.write(line)
+
+    def _http_row(self, parts, path, options):
+        # اولین درخواست پس از راه‌اندازی/تغییر داده سرد است؛ سپس یکی گرم، بعد بار اصلی
+        status, queries_cold = http_queries(parts, path, options['host'])
+        _, queries_warm = http_queries(parts, path, options['host'])
+        results, elapsed = http_load(
+            parts, [path], max(1, options['requests']), options['concurrency'],
+            warmup=options['warmup'], host=options['host'],
+        )
+        row = summarize(results, elapsed)
+        row.update(status=status, queries_cold=queries_cold, queries_warm=queries_warm)
+        return row
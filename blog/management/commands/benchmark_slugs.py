@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 00:06:14 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/benchmark_slugs.py
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog.models import Post
+from blog.persian import slug_base
+
+
+def _legacy_slug(base_slug):
+    # روش قبلی: یک .exists() برای هر شماره تا اولین slug آزاد
+    slug_candidate = base_slug
+    counter = 1
+    while Post.objects.filter(slug=slug_candidate).exists():
+        slug_candidate = f"{base_slug}-{counter}"
+        counter += 1
+    return slug_candidate
+
+
+class Command(BaseCommand):
+    help = "Benchmark inserting many posts with the same title (unique slug allocation, rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--title', default='عنوان تکراری')
+        parser.add_argument(
+            '--legacy', type=int, default=0,
+            help="Also time the old per-number .exists() loop for this many extra inserts.",
+        )
+
+    def _counting(self):
+        counter = {'queries': 0}
+
+        def wrapper(execute, sql, params, many, context):
+            counter['queries'] += 1
+            return execute(sql, params, many, context)
+        return counter, connection.execute_wrapper(wrapper)
+
+    def _slug_queries(self, func):
+        counter, wrapped = self._counting()
+        with wrapped:
+            func()
+        return counter['queries']
+
+    def handle(self, *args, **options):
+        author = get_user_model().objects.order_by('pk').first()
+        if author is None:
+            self.stderr.write("No user found; create one first.")
+            return
+        title = options['title']
+        base = slug_base(title, 'post')
+        with transaction.atomic():
+            t0 = time.perf_counter()
+            for i in range(options['posts']):
+                Post.objects.create(title=title, content='benchmark', author=author)
+            elapsed = time.perf_counter() - t0
+            self.stdout.write(
+                f"{options['posts']} posts in {elapsed:.1f} s ({options['posts'] / elapsed:.0f} posts/s), "
+                f"last slug: {Post.objects.filter(title=title).latest('pk').slug}"
+            )
+            queries = self._slug_queries(lambda: Post(title=title)._get_unique_slug(base))
+            self.stdout.write(f"slug allocation after {options['posts']} duplicates: {queries} query(s)")
+
+            if options['legacy']:
+                t0 = time.perf_counter()
+                queries = self._slug_queries(lambda: _legacy_slug(base))
+                one = time.perf_counter() - t0
+                self.stdout.write(
+                    f"legacy loop for the next slug: {queries} queries, {one * 1000:.0f} ms "
+                    f"(x{options['legacy']} inserts ~ {one * options['legacy']:.0f} s)"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:21:36 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/code_capacity.py
+from django.core.management.base import BaseCommand
+
+from blog.codes import capacity_report
+from blog.models import Post, Album
+
+
+class Command(BaseCommand):
+    help = "Report allocated/remaining 6-digit codes for Post and Album"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--warn-at', type=float, default=0.8,
+            help="Warn when the code space is filled beyond this ratio (default 0.8).",
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, Album):
+            report = capacity_report(model)
+            line = (
+                f"{model.__name__}: allocated={report['allocated']} used={report['used']} "
+                f"legacy_ahead={report['legacy_ahead']} remaining={report['remaining']}/{report['space']} "
+                f"({report['fill_ratio']:.1%} full)"
+            )
+            if report['remaining'] <= 0:
+                self.stdout.write(self.style.ERROR(line + " -- exhausted"))
+            elif report['fill_ratio'] >= options['warn_at']:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:32:05 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/generate_image_derivatives.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.images import IMAGE_FORMATS, IMAGE_WIDTHS, process_instance
+from blog.models import Post, Album, AlbumImage
+
+MODELS = {
+    'post': Post,
+    'album': Album,
+    'albumimage': AlbumImage,
+}
+
+
+class Command(BaseCommand):
+    help = "Generate responsive image derivatives (widths x formats) for posts, albums and album images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=sorted(MODELS), action='append',
+            help="Limit to one model (can be repeated). Default: all.",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Re-check every image even if its derivatives are recorded (existing files are reused).",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"widths={IMAGE_WIDTHS} formats={IMAGE_FORMATS}")
+        started = time.perf_counter()
+        total = 0
+        for key in options['model'] or MODELS:
+            model = MODELS[key]
+            processed = 0
+            for obj in model.objects.order_by('pk').iterator(chunk_size=200):
+                if process_instance(obj, force=options['force']):
+                    processed += 1
+            total += processed
+            self.stdout.write(f"{model._meta.label}: {processed} updated")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Done: {total} objects updated in {elapsed:.1f} s."))
@@ -6,32 +6,83 @@ Created on Sat Sep 27 18:36:09 2025
 """
 
 #blog/management/commands/populate_codes.py
+import time
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from blog.caching import CONTENT_SCOPE, bump_version
+from blog.codes import allocate_codes
 from blog.models import Post, Album
-from random import randint
+
+# ردیف در هر دستور UPDATE؛ CASE بزرگ‌تر برای هر ردیف کندتر ارزیابی می‌شود
+UPDATE_CHUNK = 500
+
+
+def write_codes(model, pairs):
+    """
+    همان UPDATE ... CASE که bulk_update می‌سازد، بدون ساختن Case/When برای هر ردیف در ORM
+    (که در دسته‌های بزرگ چند برابر خود کوئری زمان می‌برد).
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = qn(model._meta.pk.column)
+    code = qn(model._meta.get_field('code').column)
+    with connection.cursor() as cursor:
+        for i in range(0, len(pairs), UPDATE_CHUNK):
+            chunk = pairs[i:i + UPDATE_CHUNK]
+            whens = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+            placeholders = ', '.join(['%s'] * len(chunk))
+            params = [value for pair in chunk for value in pair] + [pk_value for pk_value, _code in chunk]
+            cursor.execute(
+                f"UPDATE {table} SET {code} = CASE {pk} {whens} END WHERE {pk} IN ({placeholders})",
+                params,
+            )
+
 
 class Command(BaseCommand):
-    help = "Populate missing 6-digit unique codes for Post and Album models"
+    help = "Populate missing 6-digit unique codes for Post and Album models (bulk, resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per transaction, written with raw UPDATE ... CASE statements.")
+        parser.add_argument('--dry-run', action='store_true', help="Count rows without codes; write nothing.")
 
     def handle(self, *args, **options):
-        self.populate_model(Post)
-        self.populate_model(Album)
+        for model in (Post, Album):
+            self.populate_model(model, max(1, options['batch_size']), options['dry_run'])
 
-    def generate_unique_code(self, model):
-        """Generates a unique 6-digit code not used in the given model."""
-        while True:
-            code = randint(100000, 999999)
-            if not model.objects.filter(code=code).exists():
-                return code
+    def populate_model(self, model, batch_size, dry_run):
+        missing = model.objects.filter(Q(code__isnull=True) | Q(code=''))
+        total = missing.count()
+        if not total:
+            self.stdout.write(self.style.WARNING(f"No missing codes found in {model.__name__}."))
+            return
+        if dry_run:
+            self.stdout.write(f"{model.__name__}: {total} objects would get a code (dry run).")
+            return
 
-    def populate_model(self, model):
-        items = model.objects.filter(code__isnull=True)
+        # کدهای موجود یک بار خوانده می‌شوند؛ برای هر ردیف کوئری .exists() لازم نیست
+        taken = set(model.objects.exclude(Q(code__isnull=True) | Q(code='')).values_list('code', flat=True))
+        started = time.perf_counter()
         count = 0
-        for item in items:
-            item.code = self.generate_unique_code(model)
-            item.save()
-            count += 1
-        if count:
-            self.stdout.write(self.style.SUCCESS(f"{count} {model.__name__} objects updated."))
-        else:
-            self.stdout.write(self.style.WARNING(f"No missing codes found in {model.__name__}."))
+        last_pk = 0
+        while True:
+            # هر دسته در تراکنش خودش؛ اجرای دوباره پس از قطع شدن از ردیف‌های بدون کد ادامه می‌دهد
+            with transaction.atomic():
+                pks = list(missing.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                # UPDATE دسته‌ای به جای save(): منطق slug/سیگنال‌ها برای هر ردیف اجرا نمی‌شود
+                write_codes(model, list(zip(pks, allocate_codes(model, len(pks), taken=taken))))
+            last_pk = pks[-1]
+            count += len(pks)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"  {model.__name__}: {count}/{total} ({count / elapsed if elapsed else 0:.0f} rows/s)")
+        # UPDATE مستقیم سیگنال ندارد؛ کش‌های محتوا (snapshot صفحهٔ اصلی شامل کدهاست) باطل شوند
+        bump_version(CONTENT_SCOPE)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} {model.__name__} objects updated in {elapsed:.1f} s "
+            f"({count / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/rebuild_homepage_snapshot.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.snapshot import rebuild_homepage_snapshot, get_homepage_snapshot
+from blog.models import Post, Album, Category
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cached homepage snapshot (optionally benchmark snapshot reads)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark', type=int, default=0, metavar='N',
+            help="After rebuilding, read the snapshot N times and report p50/p99 latency and query count.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        context = rebuild_homepage_snapshot()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"Homepage snapshot rebuilt in {elapsed:.1f} ms "
+            f"({len(context['album_tabs'])} album tabs, {len(context['combined_items'])} combined items)."
+        ))
+
+        runs = options['benchmark']
+        if runs <= 0:
+            return
+
+        timings = []
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                get_homepage_snapshot()
+                timings.append((time.perf_counter() - t0) * 1000)
+        self.stdout.write(
+            f"rows: posts={Post.objects.count()} albums={Album.objects.count()} categories={Category.objects.count()}\n"
+            f"reads={runs} p50={_percentile(timings, 50):.3f} ms p99={_percentile(timings, 99):.3f} ms "
+            f"queries={len(ctx.captured_queries)}"
+        )
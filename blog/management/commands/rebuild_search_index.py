@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:10:05 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/rebuild_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.search import rebuild_index, get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for posts and albums"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            total = rebuild_index(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} documents indexed with {type(get_backend()).__name__} in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:12 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/reconcile_category_counts.py
+from django.core.management.base import BaseCommand
+
+from blog.stats import reconcile_category_counts
+
+
+class Command(BaseCommand):
+    help = "Recount posts/albums per category and fix drifted denormalized counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report mismatches, do not write.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        changed = reconcile_category_counts(dry_run=dry_run)
+        for cat, old_posts, old_albums in changed:
+            self.stdout.write(
+                f"{cat.name}: posts {old_posts} -> {cat.post_count}, albums {old_albums} -> {cat.album_count}"
+            )
+        if not changed:
+            self.stdout.write(self.style.SUCCESS("All category counters are in sync."))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f"{len(changed)} categories out of sync (dry run, nothing written)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(changed)} categories reconciled."))
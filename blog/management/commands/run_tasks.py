@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:52:39 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/run_tasks.py
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog import jobs  # noqa: F401  (ثبت کارها)
+from blog.tasks import claim, requeue_stale, run_claimed, purge, worker_id
+
+
+def _init_process():
+    # پروسه‌های فرزند (spawn روی ویندوز/مک) باید Django را خودشان راه‌اندازی کنند
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Run the background task worker (database-backed queue, no external broker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Number of concurrent tasks.")
+        parser.add_argument(
+            '--executor', choices=('thread', 'process'), default='thread',
+            help="Run tasks in a thread pool (default) or a process pool (CPU-heavy image work).",
+        )
+        parser.add_argument('--once', action='store_true', help="Process ready tasks and exit.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Poll interval in seconds when idle.")
+        parser.add_argument(
+            '--purge-days', type=int, default=7,
+            help="Delete finished tasks older than this many days (0 disables).",
+        )
+
+    def handle(self, *args, **options):
+        # کارهایی که این worker صف می‌کند را خودش برمی‌دارد؛ اجرای inline لازم نیست
+        settings.BLOG_TASKS_INLINE = False
+        workers = max(1, options['workers'])
+        me = worker_id()
+        if options['executor'] == 'process':
+            # اتصال‌های باز نباید به پروسه‌های fork‌شده منتقل شوند
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='blog-worker')
+
+        stale = requeue_stale()
+        if stale:
+            self.stdout.write(f"requeued {stale} stale task(s)")
+        if options['purge_days'] > 0:
+            purge(options['purge_days'])
+
+        self.stdout.write(f"worker {me} started ({options['executor']} x {workers})")
+        running = {}
+        done = 0
+        last_maintenance = time.monotonic()
+        try:
+            while True:
+                free = workers - len(running)
+                if free > 0:
+                    for pk in claim(me, limit=free):
+                        running[pool.submit(run_claimed, pk)] = pk
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                else:
+                    finished, _ = wait(running, timeout=options['sleep'], return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        pk = running.pop(future)
+                        try:
+                            status = future.result()
+                        except Exception as exc:
+                            status = f'crashed: {exc}'
+                        done += 1
+                        self.stdout.write(f"task #{pk}: {status}")
+                if time.monotonic() - last_maintenance > 60:
+                    requeue_stale()
+                    last_maintenance = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write("stopping...")
+        finally:
+            pool.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(f"worker stopped after {done} task(s)."))
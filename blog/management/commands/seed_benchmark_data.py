@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 05:14:37 2026
+
+@author: Abbas Mahdavi
+"""
+
+#blog/management/commands/seed_benchmark_data.py
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import jdatetime
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.ads import AD_GROUPS
+from blog.caching import CONTENT_SCOPE, bump_version
+from blog.chrome import CHROME_SCOPE
+from blog.codes import allocate_codes
+from blog.excerpts import compute_excerpts
+from blog.models import Post, Album, AlbumImage, Category, Menu, MenuItem, Ad
+from blog.persian import slug_base
+from blog.snapshot import rebuild_homepage_snapshot
+
+# همهٔ داده‌های ساختگی با این پیشوندها شناخته و با --clear حذف می‌شوند
+USER_PREFIX = 'bench_'
+CATEGORY_SLUG_PREFIX = 'bench-'
+AD_PREFIX = 'benchmark '
+IMAGE_DIR = 'bench'
+
+SCALES = {
+    'small': {'users': 5, 'categories': 8, 'posts': 500, 'albums': 100, 'images': 6, 'ads': 20, 'menu_items': 12},
+    'medium': {'users': 20, 'categories': 20, 'posts': 5000, 'albums': 1000, 'images': 8, 'ads': 60, 'menu_items': 24},
+    'large': {'users': 50, 'categories': 40, 'posts': 50000, 'albums': 10000, 'images': 10, 'ads': 200, 'menu_items': 40},
+}
+
+WORDS = (
+    'خانه', 'طراحی', 'دکوراسیون', 'آشپزخانه', 'نور', 'چوب', 'فرش', 'پرده', 'مبلمان', 'رنگ', 'دیوار',
+    'سقف', 'کاشی', 'سرامیک', 'باغ', 'پذیرایی', 'اتاق', 'خواب', 'کودک', 'مدرن', 'کلاسیک', 'سنتی',
+    'ایرانی', 'مینیمال', 'گرم', 'روشن', 'آرام', 'ساده', 'زیبا', 'کاربردی', 'ارزان', 'باکیفیت', 'تازه',
+    'راهنمای', 'انتخاب', 'نگهداری', 'نصب', 'ترکیب', 'ایده', 'نمونه', 'پروژه', 'سفارش', 'قیمت', 'جدید',
+)
+PALETTE = ((198, 120, 80), (70, 110, 160), (120, 160, 90), (210, 190, 120), (90, 90, 110), (180, 80, 110))
+
+
+def _words(rnd, low, high):
+    return ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(low, high)))
+
+
+def _rich_html(rnd):
+    # ساختار رایج خروجی CKEditor: عنوان، پاراگراف با تأکید و لینک، فهرست، تصویر و جدول
+    parts = []
+    for _ in range(rnd.randint(3, 7)):
+        kind = rnd.random()
+        if kind < 0.15:
+            parts.append(f'<h2>{_words(rnd, 2, 5)}</h2>')
+        elif kind < 0.3:
+            items = ''.join(f'<li>{_words(rnd, 2, 6)}</li>' for _ in range(rnd.randint(2, 5)))
+            parts.append(f'<ul>{items}</ul>')
+        elif kind < 0.38:
+            parts.append(
+                f'<p><img alt="{_words(rnd, 1, 3)}" src="/media/{IMAGE_DIR}/inline.jpg" '
+                f'style="width:{rnd.choice((400, 640, 800))}px" /></p>'
+            )
+        elif kind < 0.42:
+            rows = ''.join(
+                f'<tr><td>{_words(rnd, 1, 2)}</td><td>{rnd.randint(10, 999)}</td></tr>' for _ in range(3)
+            )
+            parts.append(f'<table border="1" cellpadding="1" cellspacing="1"><tbody>{rows}</tbody></table>')
+        else:
+            sentences = ' '.join(f'{_words(rnd, 6, 14)}.' for _ in range(rnd.randint(2, 5)))
+            parts.append(
+                f'<p>{sentences} <strong>{_words(rnd, 1, 3)}</strong> '
+                f'<a href="/category/{CATEGORY_SLUG_PREFIX}{rnd.randint(0, 5)}/">{_words(rnd, 1, 2)}</a>&nbsp;</p>'
+            )
+    return '\n'.join(parts)
+
+
+@contextmanager
+def _manual_timestamps(*fields):
+    # bulk_create مقدار auto_now/auto_now_add را با «اکنون» جایگزین می‌کند؛ تاریخ‌ها باید پخش باشند
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic Persian posts, albums with images, categories, menus, ads and users "
+        "for benchmarking (--scale small|medium|large, each count overridable)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        for name in SCALES['small']:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None, dest=name)
+        parser.add_argument('--seed', type=int, default=1404, help="Random seed (same seed, same data).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--image-pool', type=int, default=12, help="Distinct image files shared by all rows.")
+        parser.add_argument('--clear', action='store_true', help="Delete previously seeded data first.")
+        parser.add_argument('--derivatives', action='store_true', help="Also build responsive image variants.")
+        parser.add_argument('--no-index', action='store_true', help="Skip rebuilding the search index.")
+
+    def handle(self, *args, **options):
+        counts = dict(SCALES[options['scale']])
+        counts.update({k: options[k] for k in counts if options.get(k) is not None})
+        self.rnd = random.Random(options['seed'])
+        self.batch_size = max(1, options['batch_size'])
+        started = time.perf_counter()
+
+        if options['clear']:
+            self.clear()
+        with transaction.atomic():
+            users = self.seed_users(counts['users'])
+            categories = self.seed_categories(counts['categories'])
+            images = self.seed_image_pool(options['image_pool'])
+            self.seed_posts(counts['posts'], users, categories, images)
+            self.seed_albums(counts['albums'], counts['images'], users, categories, images)
+            self.seed_ads(counts['ads'], images)
+            self.seed_menu(counts['menu_items'], categories)
+
+        # bulk_create سیگنال ندارد: شمارنده‌ها، ایندکس جستجو، نسخه‌ها و snapshot جداگانه به‌روز می‌شوند
+        call_command('reconcile_category_counts', stdout=io.StringIO())
+        if not options['no_index']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        if options['derivatives']:
+            call_command('generate_image_derivatives', stdout=self.stdout)
+        bump_version(CONTENT_SCOPE, CHROME_SCOPE)
+        rebuild_homepage_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {counts} (scale={options['scale']}, seed={options['seed']}) "
+            f"in {time.perf_counter() - started:.1f} s."
+        ))
+
+    def clear(self):
+        # حذف کاربرها پست‌ها و آلبوم‌ها (و تصاویر آلبوم) آن‌ها را هم حذف می‌کند
+        deleted, _ = get_user_model().objects.filter(username__startswith=USER_PREFIX).delete()
+        deleted += Category.objects.filter(slug__startswith=CATEGORY_SLUG_PREFIX).delete()[0]
+        deleted += Ad.objects.filter(name__startswith=AD_PREFIX).delete()[0]
+        deleted += MenuItem.objects.filter(url__startswith=f'/category/{CATEGORY_SLUG_PREFIX}').delete()[0]
+        self.stdout.write(f"Cleared {deleted} previously seeded rows.")
+
+    def _log(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {label}: {count} ({count / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def seed_users(self, count):
+        User = get_user_model()
+        # هش رمز عبور یک بار (PBKDF2 برای هر کاربر ثانیه‌ها طول می‌کشد)
+        password = make_password('benchmark')
+        existing = set(User.objects.filter(username__startswith=USER_PREFIX).values_list('username', flat=True))
+        User.objects.bulk_create([
+            User(username=f'{USER_PREFIX}{i}', email=f'{USER_PREFIX}{i}@example.com', password=password)
+            for i in range(count) if f'{USER_PREFIX}{i}' not in existing
+        ])
+        return list(User.objects.filter(username__startswith=USER_PREFIX).values_list('pk', flat=True))
+
+    def seed_categories(self, count):
+        existing = set(Category.objects.filter(slug__startswith=CATEGORY_SLUG_PREFIX).values_list('slug', flat=True))
+        Category.objects.bulk_create([
+            Category(
+                name=f'{self.rnd.choice(WORDS)} {self.rnd.choice(WORDS)} {i + 1}',
+                slug=f'{CATEGORY_SLUG_PREFIX}{i}',
+                description=_words(self.rnd, 8, 20),
+            )
+            for i in range(count) if f'{CATEGORY_SLUG_PREFIX}{i}' not in existing
+        ], ignore_conflicts=True)
+        return list(Category.objects.filter(slug__startswith=CATEGORY_SLUG_PREFIX).values_list('pk', flat=True))
+
+    def seed_image_pool(self, count):
+        names = []
+        for i in range(count):
+            name = f'{IMAGE_DIR}/pool-{i}.jpg'
+            if not default_storage.exists(name):
+                width, height = self.rnd.choice(((1600, 1067), (1200, 800), (1024, 1024), (900, 1200)))
+                buf = io.BytesIO()
+                Image.new('RGB', (width, height), PALETTE[i % len(PALETTE)]).save(buf, 'JPEG', quality=80)
+                name = default_storage.save(name, ContentFile(buf.getvalue()))
+            names.append(name)
+        return names
+
+    def _dates(self, count, days=730):
+        now = timezone.now()
+        return sorted(now - timedelta(minutes=self.rnd.randint(0, days * 24 * 60)) for _ in range(count))
+
+    def _link_categories(self, through, field, pks, categories):
+        rows = []
+        for pk in pks:
+            for category_id in self.rnd.sample(categories, k=min(len(categories), self.rnd.randint(1, 3))):
+                rows.append(through(**{field: pk, 'category_id': category_id}))
+        through.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def seed_posts(self, count, users, categories, images):
+        started = time.perf_counter()
+        serial = (Post.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        taken = set(Post.objects.exclude(code__isnull=True).values_list('code', flat=True))
+        dates = self._dates(count)
+        fields = (Post._meta.get_field('created_at'), Post._meta.get_field('updated_at'))
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            codes = allocate_codes(Post, size, taken=taken)
+            posts = []
+            for i in range(size):
+                n = serial + offset + i
+                title = f'{_words(self.rnd, 3, 8)} {n}'
+                created = dates[offset + i]
+                content = _rich_html(self.rnd)
+                posts.append(Post(
+                    title=title,
+                    slug=f"{slug_base(title, 'post')}-{n}",
+                    code=codes[i],
+                    content=content,
+                    # bulk_create از Post.save() رد نمی‌شود
+                    **compute_excerpts(content),
+                    summary=_words(self.rnd, 15, 30) if self.rnd.random() < 0.5 else None,
+                    author_id=self.rnd.choice(users),
+                    featured_image=self.rnd.choice(images) if self.rnd.random() < 0.7 else None,
+                    created_at=jdatetime.datetime.fromgregorian(datetime=created),
+                    updated_at=created,
+                ))
+            with _manual_timestamps(*fields):
+                created_posts = Post.objects.bulk_create(posts)
+            self._link_categories(Post.categories.through, 'post_id', [p.pk for p in created_posts], categories)
+        self._log('posts', count, started)
+
+    def seed_albums(self, count, images_per_album, users, categories, images):
+        started = time.perf_counter()
+        serial = (Album.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        taken = set(Album.objects.exclude(code__isnull=True).values_list('code', flat=True))
+        dates = self._dates(count)
+        fields = (Album._meta.get_field('created_at'),)
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            codes = allocate_codes(Album, size, taken=taken)
+            albums = []
+            for i in range(size):
+                n = serial + offset + i
+                title = f'{_words(self.rnd, 2, 5)} {n}'
+                albums.append(Album(
+                    title=title,
+                    slug=f"{slug_base(title, 'album')}-{n}",
+                    code=codes[i],
+                    cover_image=self.rnd.choice(images),
+                    order_instructions=_rich_html(self.rnd) if self.rnd.random() < 0.6 else '',
+                    author_id=self.rnd.choice(users),
+                    created_at=dates[offset + i],
+                ))
+            with _manual_timestamps(*fields):
+                created_albums = Album.objects.bulk_create(albums)
+            AlbumImage.objects.bulk_create([
+                AlbumImage(
+                    album_id=album.pk,
+                    image=self.rnd.choice(images),
+                    caption=_words(self.rnd, 1, 4) if self.rnd.random() < 0.5 else '',
+                    order=order,
+                )
+                for album in created_albums
+                for order in range(self.rnd.randint(max(1, images_per_album // 2), images_per_album * 3 // 2))
+            ], batch_size=self.batch_size)
+            self._link_categories(Album.categories.through, 'album_id', [a.pk for a in created_albums], categories)
+        self._log('albums', count, started)
+
+    def seed_ads(self, count, images):
+        now = timezone.now()
+        ads = []
+        for i in range(count):
+            starts = now - timedelta(days=self.rnd.randint(0, 30)) if self.rnd.random() < 0.5 else None
+            ends = now + timedelta(days=self.rnd.randint(1, 60)) if self.rnd.random() < 0.5 else None
+            ads.append(Ad(
+                name=f'{AD_PREFIX}{i}',
+                group=AD_GROUPS[i % len(AD_GROUPS)],
+                image=self.rnd.choice(images) if self.rnd.random() < 0.8 else None,
+                link_url=f'/category/{CATEGORY_SLUG_PREFIX}{i % 5}/',
+                is_active=self.rnd.random() < 0.8,
+                start_date=starts,
+                end_date=ends,
+                max_impressions=self.rnd.choice((None, None, 1000, 100000)),
+                weight=self.rnd.randint(1, 5),
+            ))
+        Ad.objects.bulk_create(ads)
+
+    def seed_menu(self, count, categories):
+        menu, _ = Menu.objects.get_or_create(slug='main', defaults={'name': 'main'})
+        slugs = list(Category.objects.filter(pk__in=categories).values_list('slug', 'name'))
+        if not slugs or not count:
+            return
+        # یک سوم آیتم‌ها سطح اول و بقیه زیرمنوی آن‌ها
+        top_count = max(1, count // 3)
+        parents = MenuItem.objects.bulk_create([
+            MenuItem(menu=menu, title=name, url=f'/category/{slug}/', order=i)
+            for i, (slug, name) in enumerate(slugs[:top_count])
+        ])
+        MenuItem.objects.bulk_create([
+            MenuItem(
+                menu=menu, parent=parents[i % len(parents)], title=name,
+                url=f'/category/{slug}/', order=i,
+            )
+            for i, (slug, name) in enumerate((slugs * count)[top_count:count])
+        ])
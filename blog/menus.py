@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 07:26:40 2026
+
+Menus compiled to nested dicts of final URLs (one query, cached as a chrome piece)
+@author: Abbas Mahdavi
+"""
+
+# blog/menus.py
+from django.urls import reverse
+
+# ستون‌هایی که برای ساختن درخت لازم است (menu با join در همان کوئری)
+_ITEM_FIELDS = (
+    'id', 'parent_id', 'title', 'url', 'named_url', 'url_params', 'icon', 'show',
+    'menu__slug', 'menu__name',
+)
+
+
+def parse_url_params(url_params):
+    """
+    url_params مثل "pk=1,slug=abc" (kwargs) یا "1,abc" (position-based) -> (args, kwargs).
+    """
+    parts = [p.strip() for p in (url_params or '').split(',') if p.strip()]
+    # تشخیص سریع: اگر شامل '=' باشد فرض kwargs
+    if any('=' in p for p in parts):
+        kwargs = {}
+        for p in parts:
+            if '=' in p:
+                k, v = p.split('=', 1)
+                kwargs[k.strip()] = v.strip()
+        return [], kwargs
+    return parts, {}
+
+
+def resolve_menu_url(named_url, url_params, url):
+    """
+    URL نهایی آیتم منو: reverse(named_url) با url_params، در غیر این صورت url و در نهایت "#".
+    """
+    if named_url:
+        args, kwargs = parse_url_params(url_params)
+        try:
+            return reverse(named_url, args=args, kwargs=kwargs)
+        except Exception:
+            # fallback به url فیلد
+            pass
+    return url or '#'
+
+
+def compile_menus(slugs=None):
+    """
+    همهٔ منوهای فعال (یا فقط slugs) با یک کوئری روی آیتم‌ها به صورت
+    {slug: {'slug', 'name', 'items': [{'id', 'title', 'url', 'icon', 'children': [...]}, ...]}}.
+    URLها همین‌جا resolve می‌شوند؛ آیتم‌های مخفی (show=False) با زیرشاخه‌هایشان کنار می‌روند.
+    منوی فعالی که آیتمی ندارد در خروجی نیست.
+    """
+    from .models import MenuItem
+
+    qs = MenuItem.objects.filter(menu__enabled=True)
+    if slugs is not None:
+        qs = qs.filter(menu__slug__in=list(slugs))
+    rows = list(qs.order_by('order', 'id').values(*_ITEM_FIELDS))
+
+    nodes = {}
+    for row in rows:
+        nodes[row['id']] = {
+            'id': row['id'],
+            'title': row['title'],
+            'url': resolve_menu_url(row['named_url'], row['url_params'], row['url']),
+            'icon': row['icon'] or '',
+            'children': [],
+        }
+
+    menus = {}
+    for row in rows:
+        if not row['show']:
+            continue
+        node = nodes[row['id']]
+        parent_id = row['parent_id']
+        if parent_id is None:
+            menu = menus.setdefault(row['menu__slug'], {
+                'slug': row['menu__slug'], 'name': row['menu__name'], 'items': [],
+            })
+            menu['items'].append(node)
+        elif parent_id in nodes:
+            # ترتیب ردیف‌ها (order, id) ترتیب فرزندان را هم حفظ می‌کند
+            nodes[parent_id]['children'].append(node)
+    return menus
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:03
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _related_count(through):
+    # کپی ثابت blog.stats.related_count (subquery همبسته به‌جای دو Count روی join حاصل‌ضربی)
+    counts = (
+        through._default_manager.filter(category_id=OuterRef("pk")).order_by()
+        .values("category_id").annotate(n=Count("pk")).values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def fill_category_counts(apps, schema_editor):
+    Category = apps.get_model("blog", "Category")
+    rows = Category.objects.annotate(
+        n_posts=_related_count(Category.posts.through),
+        n_albums=_related_count(Category.albums.through),
+    )
+    for cat in rows:
+        cat.post_count = cat.n_posts
+        cat.album_count = cat.n_albums
+    Category.objects.bulk_update(rows, ["post_count", "album_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_remove_album_description_alter_album_title"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="album_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="تعداد آلبوم‌ها"
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="post_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="تعداد پست‌ها"
+            ),
+        ),
+        migrations.RunPython(fill_category_counts, migrations.RunPython.noop),
+    ]
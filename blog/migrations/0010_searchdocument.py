@@ -0,0 +1,200 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:09
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# جدول FTS5 روی SQLite (external content روی blog_searchdocument + triggerها)
+SQLITE_FTS_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_search_fts USING fts5(
+        title, body,
+        content='blog_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_search_fts_ai AFTER INSERT ON blog_searchdocument BEGIN
+        INSERT INTO blog_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_search_fts_ad AFTER DELETE ON blog_searchdocument BEGIN
+        INSERT INTO blog_search_fts(blog_search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_search_fts_au AFTER UPDATE ON blog_searchdocument BEGIN
+        INSERT INTO blog_search_fts(blog_search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO blog_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS blog_search_fts_au",
+    "DROP TRIGGER IF EXISTS blog_search_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_search_fts_ai",
+    "DROP TABLE IF EXISTS blog_search_fts",
+]
+
+# ایندکس FULLTEXT با parser ngram روی MySQL (مناسب متن فارسی)
+MYSQL_FTS_CREATE = [
+    "ALTER TABLE blog_searchdocument ADD FULLTEXT INDEX blog_searchdoc_ft (title, body) WITH PARSER ngram",
+]
+MYSQL_FTS_DROP = [
+    "ALTER TABLE blog_searchdocument DROP INDEX blog_searchdoc_ft",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FTS_CREATE)
+    elif vendor == "mysql":
+        _run(schema_editor, MYSQL_FTS_CREATE)
+
+
+def drop_fulltext(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FTS_DROP)
+    elif vendor == "mysql":
+        _run(schema_editor, MYSQL_FTS_DROP)
+
+
+# نسخهٔ ثابت نرمال‌سازی blog/persian.py و ساخت سند blog/search.py در زمان این migration؛
+# عمداً import نمی‌شوند تا تغییرات بعدی آن ماژول‌ها نصب تازه را عوض نکند یا نشکند.
+ZWNJ = "\u200c"
+_DIGITS = {
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+}
+NORMALIZE_TABLE = str.maketrans({
+    **_DIGITS,
+    "\u064a": "\u06cc", "\u0649": "\u06cc", "\u0643": "\u06a9", "\u06c0": "\u0647", "\u0629": "\u0647",
+    "\u0623": "\u0627", "\u0625": "\u0627", "\u0671": "\u0627",
+    **{chr(c): None for c in range(0x064B, 0x0656)},
+    "\u0670": None, "\u0640": None,
+    "\u200b": ZWNJ, "\u00ad": ZWNJ, "\u200d": None, "\u200e": None, "\u200f": None,
+    "\u202a": None, "\u202b": None, "\u202c": None, "\u202d": None, "\u202e": None, "\ufeff": None,
+    "\u00a0": " ", "\u2009": " ", "\u202f": " ", "\u3000": " ",
+})
+_SPACE_RUN_RE = re.compile("[\\s\u200c]*\\s[\\s\u200c]*")
+_ZWNJ_RUN_RE = re.compile("\u200c{2,}")
+
+
+def _normalize(text):
+    if not text:
+        return ""
+    if "&" in text:
+        text = text.replace("&zwnj;", ZWNJ).replace("&nbsp;", " ")
+    text = _SPACE_RUN_RE.sub(" ", text.translate(NORMALIZE_TABLE))
+    if ZWNJ in text:
+        text = _ZWNJ_RUN_RE.sub(ZWNJ, text)
+    return text.strip(" " + ZWNJ)
+
+
+def _html_to_text(value):
+    return html.unescape(strip_tags(value or ""))
+
+
+def _document(kind, obj):
+    if kind == "post":
+        body = " ".join(filter(None, [obj.short_description, obj.summary, _html_to_text(obj.content)]))
+        created_at = obj.created_at.togregorian() if hasattr(obj.created_at, "togregorian") else obj.created_at
+    else:
+        body = _html_to_text(obj.order_instructions)
+        created_at = obj.created_at
+    ids = sorted(c.pk for c in obj.categories.all())
+    return {
+        "kind": kind,
+        "object_id": obj.pk,
+        "title": _normalize(obj.title),
+        "body": _normalize(body),
+        "categories": f",{','.join(str(i) for i in ids)}," if ids else "",
+        "created_at": created_at,
+    }
+
+
+def fill_search_index(apps, schema_editor):
+    # پست‌ها و آلبوم‌های موجود از همان ابتدا قابل جستجو باشند (بدون اجرای دستی rebuild_search_index)؛
+    # triggerهای FTS5 که بالاتر ساخته شدند جدول FTS را همراه INSERTها پر می‌کنند
+    db = schema_editor.connection.alias
+    SearchDocument = apps.get_model("blog", "SearchDocument")
+    batch = []
+    for kind, name in (("post", "Post"), ("album", "Album")):
+        model = apps.get_model("blog", name)
+        rows = model.objects.using(db).order_by("pk").prefetch_related("categories")
+        for obj in rows.iterator(chunk_size=500):
+            batch.append(SearchDocument(**_document(kind, obj)))
+            if len(batch) >= 500:
+                SearchDocument.objects.using(db).bulk_create(batch)
+                batch = []
+    if batch:
+        SearchDocument.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0009_post_album_created_id_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("post", "پست"), ("album", "آلبوم")],
+                        max_length=10,
+                        verbose_name="نوع",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="شناسه")),
+                ("title", models.TextField(blank=True, verbose_name="عنوان")),
+                ("body", models.TextField(blank=True, verbose_name="متن")),
+                (
+                    "categories",
+                    models.CharField(
+                        blank=True, max_length=500, verbose_name="دسته‌ها"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="تاریخ ایجاد"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "سند جستجو",
+                "verbose_name_plural": "اسناد جستجو",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"),
+                        name="blog_searchdoc_kind_object_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_fulltext, drop_fulltext),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0010_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="نسخه‌های تصویر",
+            ),
+        ),
+        migrations.AddField(
+            model_name="albumimage",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="نسخه‌های تصویر",
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="نسخه‌های تصویر",
+            ),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0011_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Task",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="نام کار")),
+                (
+                    "args",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="آرگومان‌ها"
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(db_index=True, max_length=64, verbose_name="کلید"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "در صف"),
+                            ("running", "در حال اجرا"),
+                            ("done", "انجام شد"),
+                            ("failed", "ناموفق"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="وضعیت",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="تعداد تلاش"
+                    ),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(
+                        default=3, verbose_name="حداکثر تلاش"
+                    ),
+                ),
+                (
+                    "run_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="اجرا پس از"
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(blank=True, max_length=100, verbose_name="worker"),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="زمان برداشتن"
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="آخرین خطا")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="به‌روز رسانی"),
+                ),
+            ],
+            options={
+                "verbose_name": "کار پس‌زمینه",
+                "verbose_name_plural": "کارهای پس‌زمینه",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "run_after", "id"],
+                        name="blog_task_ready_idx",
+                    )
+                ],
+            },
+        ),
+    ]
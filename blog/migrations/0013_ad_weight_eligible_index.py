@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0012_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="weight",
+            field=models.PositiveSmallIntegerField(
+                default=1, verbose_name="وزن نمایش"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                fields=["group", "is_active", "start_date", "end_date"],
+                name="blog_ad_eligible_idx",
+            ),
+        ),
+    ]
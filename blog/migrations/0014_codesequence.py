@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:26
+
+import blog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0013_ad_weight_eligible_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CodeSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(max_length=50, unique=True, verbose_name="دامنه"),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        default=blog.models._new_code_key,
+                        editable=False,
+                        max_length=64,
+                        verbose_name="کلید",
+                    ),
+                ),
+                (
+                    "next_index",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="شمارندهٔ بعدی"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="به‌روز رسانی"),
+                ),
+            ],
+            options={
+                "verbose_name": "شمارندهٔ کد",
+                "verbose_name_plural": "شمارنده‌های کد",
+            },
+        ),
+    ]
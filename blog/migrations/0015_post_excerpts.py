@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:14
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# نسخهٔ ثابت blog/excerpts.py در زمان این migration؛ عمداً import نمی‌شود تا تغییرات بعدی آن
+# ماژول نصب تازه را عوض نکند یا نشکند
+EXCERPT_FIELDS = ((200, "excerpt"), (400, "excerpt_long"))
+ELLIPSIS = "…"
+
+_WHITESPACE = re.compile(r"\s+")
+_BLOCK_TAG = re.compile(r"<(?=/?(?:p|div|br|li|ul|ol|h[1-6]|tr|td|th|table|blockquote)\b)", re.IGNORECASE)
+
+
+def _plain_text(content):
+    if not content:
+        return ""
+    text = html.unescape(strip_tags(_BLOCK_TAG.sub(r" \g<0>", content)))
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _truncate_text(text, length):
+    text = (text or "").strip()
+    if len(text) <= length:
+        return text
+    truncated = text[:length].rstrip()
+    last_space = truncated.rfind(" ")
+    if last_space > max(0, int(length * 0.4)):
+        truncated = truncated[:last_space]
+    return truncated.rstrip() + ELLIPSIS
+
+
+def fill_post_excerpts(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    db = schema_editor.connection.alias
+    fields = [field for _, field in EXCERPT_FIELDS]
+    qs = Post.objects.using(db).order_by("pk").filter(excerpt="").exclude(content="")
+    last_pk = 0
+    while True:
+        rows = list(qs.filter(pk__gt=last_pk).only("pk", "content", *fields)[:500])
+        if not rows:
+            return
+        for row in rows:
+            text = _plain_text(row.content)
+            for length, field in EXCERPT_FIELDS:
+                setattr(row, field, _truncate_text(text, length))
+        Post.objects.using(db).bulk_update(rows, fields)
+        last_pk = rows[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0014_codesequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=255,
+                verbose_name="گزیدهٔ متن",
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="excerpt_long",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=500,
+                verbose_name="گزیدهٔ بلند متن",
+            ),
+        ),
+        migrations.RunPython(fill_post_excerpts, migrations.RunPython.noop),
+    ]
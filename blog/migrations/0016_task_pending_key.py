@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0015_post_excerpts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="pending_key",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name="کلید در صف",
+            ),
+        ),
+    ]
@@ -12,12 +12,62 @@ from django.utils.translation import gettext_lazy as _
 import django_jalali.db.models as jmodels
 from django.utils import timezone
 from django.utils.encoding import force_str
-from django.utils.text import slugify
+from .caching import album_scope
+from .excerpts import EXCERPT_FIELDS, compute_excerpts, stored_excerpt
+from .persian import slug_base
+from .slugs import next_slug, save_with_unique_slug
 from django.utils.html import strip_tags
 from django.conf import settings
 import secrets
+from functools import partial
 from ckeditor.fields import RichTextField
 
+# ========================
+# Responsive images
+# ========================
+class ResponsiveImageMixin:
+    """
+    دسترسی به نسخه‌های تغییر اندازه‌یافتهٔ تصاویر (ساخته‌شده در blog/images.py).
+    image_variants: {field: {'source', 'hash', 'width', 'height', 'variants': {fmt: [[w, name], ...]}}}
+    نسخه‌ای که source آن با فایل فعلی فیلد یکی نباشد کهنه است و نادیده گرفته می‌شود.
+    """
+    IMAGE_FIELDS = ()
+
+    def _image_entry(self, field):
+        entry = (self.image_variants or {}).get(field)
+        file = getattr(self, field, None)
+        if not entry or not file or entry.get('source') != file.name:
+            return None
+        return entry
+
+    def image_variant_url(self, field, width=None, fmt='webp'):
+        """
+        آدرس کوچک‌ترین نسخهٔ دست‌کم به عرض width (یا بزرگ‌ترین نسخه)؛ None اگر نسخه‌ای نیست.
+        """
+        entry = self._image_entry(field)
+        sizes = entry['variants'].get(fmt) if entry else None
+        if not sizes:
+            return None
+        name = sizes[-1][1]
+        if width:
+            name = next((n for w, n in sizes if w >= width), name)
+        return getattr(self, field).storage.url(name)
+
+    def image_srcset(self, field, fmt='webp'):
+        entry = self._image_entry(field)
+        sizes = entry['variants'].get(fmt) if entry else None
+        if not sizes:
+            return ''
+        storage = getattr(self, field).storage
+        return ', '.join(f'{storage.url(n)} {w}w' for w, n in sizes)
+
+    def cache_scopes(self):
+        """
+        محدوده‌های نسخه (blog/caching.py) به جز محتوا که با عوض شدن نسخه‌های تصویر باید باطل شوند.
+        """
+        return ()
+
+
 # ========================
 # Category
 # ========================
@@ -27,6 +77,9 @@ class Category(models.Model):
     description = models.TextField(_('توضیحات'), blank=True)
     seo_title = models.CharField(_('عنوان سئو'), max_length=200, blank=True)
     seo_description = models.CharField(_('توضیحات سئو'), max_length=300, blank=True)
+    # شمارنده‌های denormalized؛ با سیگنال m2m_changed به‌روز می‌شوند (blog/stats.py)
+    post_count = models.PositiveIntegerField(_('تعداد پست‌ها'), default=0, editable=False)
+    album_count = models.PositiveIntegerField(_('تعداد آلبوم‌ها'), default=0, editable=False)
 
     class Meta:
         verbose_name = _("دسته‌بندی")
@@ -38,16 +91,8 @@ class Category(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            base = slugify(self.name or '', allow_unicode=True) or f'cat-{int(timezone.now().timestamp())}'
-            slug_candidate = base
-            counter = 1
-            qs = Category.objects.all()
-            if self.pk:
-                qs = qs.exclude(pk=self.pk)
-            while qs.filter(slug=slug_candidate).exists():
-                slug_candidate = f"{base}-{counter}"
-                counter += 1
-            self.slug = slug_candidate
+            save_with_unique_slug(self, slug_base(self.name, 'cat'), partial(super().save, *args, **kwargs))
+            return
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -63,7 +108,7 @@ class Category(models.Model):
 # ========================
 # Post
 # ========================
-class Post(models.Model):
+class Post(ResponsiveImageMixin, models.Model):
     title = models.CharField(_('عنوان'), max_length=200)
     slug = models.SlugField(_('نامک (slug)'), max_length=220, unique=True, blank=True, allow_unicode=True)
     content = models.TextField(_('متن'))
@@ -78,50 +123,52 @@ class Post(models.Model):
     title = models.CharField(max_length=255)
     summary = models.TextField(blank=True, null=True)
     content = RichTextField()
+    image_variants = models.JSONField(_('نسخه‌های تصویر'), default=dict, blank=True, editable=False)
+    # متن سادهٔ ابتدای content با برش روی مرز کلمه (blog/excerpts.py)؛ در save محاسبه می‌شود
+    excerpt = models.CharField(_('گزیدهٔ متن'), max_length=255, blank=True, default='', editable=False)
+    excerpt_long = models.CharField(_('گزیدهٔ بلند متن'), max_length=500, blank=True, default='', editable=False)
+
+    IMAGE_FIELDS = ('featured_image', 'cover')
 
     class Meta:
         verbose_name = _("پست")
         verbose_name_plural = _("پست‌ها")
         ordering = ['-created_at']
+        indexes = [
+            # timeline با keyset روی (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='blog_post_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     # -------- Helpers ----------
     def _generate_slug_base(self):
-        return slugify(self.title or '', allow_unicode=True) or f'post-{int(timezone.now().timestamp())}'
+        return slug_base(self.title, 'post')
 
     def _get_unique_slug(self, base_slug):
-        slug_candidate = base_slug
-        counter = 1
-        qs = Post.objects.all()
-        if self.pk:
-            qs = qs.exclude(pk=self.pk)
-        while qs.filter(slug=slug_candidate).exists():
-            slug_candidate = f"{base_slug}-{counter}"
-            counter += 1
-        return slug_candidate
+        return next_slug(Post, base_slug, exclude_pk=self.pk)
 
     def _generate_unique_code(self):
-        for _ in range(10):
-            n = secrets.randbelow(10**6)
-            code = str(n).zfill(6)
-            if not Post.objects.filter(code=code).exists():
-                return code
-        while True:
-            n = secrets.randbelow(10**6)
-            code = str(n).zfill(6)
-            if not Post.objects.filter(code=code).exists():
-                return code
+        from .codes import allocate_code
+        return allocate_code(type(self))
 
     def save(self, *args, **kwargs):
         # پاک‌سازی متن پست
         if self.content:
             self.content = self.content.replace('&zwnj;', '\u200c').replace('&nbsp;', ' ')
+        # گزیده‌ها همراه content؛ save(update_fields=[...]) بدون content آن‌ها را دست نمی‌زند
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            for field, value in compute_excerpts(self.content).items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *(field for _, field in EXCERPT_FIELDS)}
         if not self.code:
             self.code = self._generate_unique_code()
         if not self.slug:
-            self.slug = self._get_unique_slug(self._generate_slug_base())
+            save_with_unique_slug(self, self._generate_slug_base(), partial(super().save, *args, **kwargs))
+            return
         super().save(*args, **kwargs)
 
     @property
@@ -172,37 +219,15 @@ class MenuItem(models.Model):
         url_params: رشته‌ای مثل "pk=1,slug=abc" یا "1,abc" (اگر position-based).
         این متد تلاش می‌کند پارامترها را به صورت ساده اعمال کند. می‌توانید منطق را گسترش دهید.
         """
-        if self.named_url:
-            try:
-                # تلاش اول: پارامترها به صورت position-based اگر تنها مقادیر جداشده باشند
-                if self.url_params:
-                    parts = [p.strip() for p in self.url_params.split(',') if p.strip()]
-                    # اگر همه عددی بودند، تبدیل کن
-                    args = []
-                    kwargs = {}
-                    # تشخیص سریع: اگر شامل '=' باشد فرض kwargs
-                    if any('=' in p for p in parts):
-                        for p in parts:
-                            if '=' in p:
-                                k, v = p.split('=', 1)
-                                kwargs[k.strip()] = v.strip()
-                    else:
-                        args = parts
-                    return reverse(self.named_url, args=args, kwargs=kwargs)
-                else:
-                    return reverse(self.named_url)
-            except Exception:
-                # fallback به url فیلد
-                pass
-        if self.url:
-            return self.url
-        return '#'
+        from .menus import resolve_menu_url
+        # قالب‌ها درخت کامپایل‌شده و کش‌شدهٔ منو (blog/menus.py) را می‌خوانند، نه این متد را
+        return resolve_menu_url(self.named_url, self.url_params, self.url)
 
 
 # ========================
 # Album & AlbumImage
 # ========================
-class Album(models.Model):
+class Album(ResponsiveImageMixin, models.Model):
     title = models.CharField(_('عنوان آلبوم'), max_length=200)
     slug = models.SlugField(_('نامک (slug)'), max_length=220, unique=True, blank=True, allow_unicode=True)
     code = models.CharField(_('کد آلبوم'), max_length=6, blank=True, null=True, unique=True, db_index=True)
@@ -211,52 +236,37 @@ class Album(models.Model):
     categories = models.ManyToManyField('blog.Category', blank=True, related_name='albums', verbose_name=_('دسته‌ها'))
     order_instructions = models.TextField(_('توضیحات سفارش'), blank=True)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_('نویسنده'), on_delete=models.CASCADE, default=1)
+    image_variants = models.JSONField(_('نسخه‌های تصویر'), default=dict, blank=True, editable=False)
+
+    IMAGE_FIELDS = ('cover_image',)
 
     class Meta:
         verbose_name = _("آلبوم")
         verbose_name_plural = _("آلبوم‌ها")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='blog_album_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def _generate_unique_code(self):
-        for _ in range(10):
-            n = secrets.randbelow(10**6)
-            code = str(n).zfill(6)
-            if not Album.objects.filter(code=code).exists():
-                return code
-        while True:
-            n = secrets.randbelow(10**6)
-            code = str(n).zfill(6)
-            if not Album.objects.filter(code=code).exists():
-                return code
+        from .codes import allocate_code
+        return allocate_code(type(self))
 
     def save(self, *args, **kwargs):
         if self.order_instructions:
             self.order_instructions = self.order_instructions.replace('&zwnj;', '\u200c').replace('&nbsp;', ' ')
-        if not self.slug:
-            base_slug = slugify(self.title, allow_unicode=True) or f'album-{int(timezone.now().timestamp())}'
-            slug_candidate = base_slug
-            counter = 1
-            qs = Album.objects.all()
-            if self.pk:
-                qs = qs.exclude(pk=self.pk)
-            while qs.filter(slug=slug_candidate).exists():
-                slug_candidate = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug_candidate
         if not self.code:
             self.code = self._generate_unique_code()
 
-        super().save(*args, **kwargs)
-
-        # قانون: اگر cover_image خالی بود، عکس اول آلبوم را تنظیم کن
-        if not self.cover_image and self.images.exists():
-            first_image = self.images.order_by('order', 'id').first()
-            if first_image:
-                self.cover_image = first_image.image
-                super().save(update_fields=['cover_image'])
+        if not self.slug:
+            save_with_unique_slug(self, slug_base(self.title, 'album'), partial(super().save, *args, **kwargs))
+        else:
+            super().save(*args, **kwargs)
+        # قانون «اگر cover_image خالی بود، عکس اول آلبوم» در صف پس‌زمینه اجرا می‌شود
+        # (کار albums.select_cover در blog/jobs.py، با سیگنال post_save)
 
     @property
     def cover_url(self):
@@ -266,11 +276,14 @@ class Album(models.Model):
             return ''
 
 
-class AlbumImage(models.Model):
+class AlbumImage(ResponsiveImageMixin, models.Model):
     album = models.ForeignKey(Album, verbose_name=_('آلبوم'), on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(_('تصویر'), upload_to='albums/images/')
     caption = models.CharField(_('عنوان تصویر'), max_length=250, blank=True)
     order = models.PositiveSmallIntegerField(_('ترتیب'), default=0)
+    image_variants = models.JSONField(_('نسخه‌های تصویر'), default=dict, blank=True, editable=False)
+
+    IMAGE_FIELDS = ('image',)
 
     class Meta:
         verbose_name = _("تصویر آلبوم")
@@ -280,12 +293,120 @@ class AlbumImage(models.Model):
     def __str__(self):
         return f"{self.album.title} - image #{self.order}"
 
+    def cache_scopes(self):
+        return (album_scope(self.album_id),)
+
     @property
     def image_url(self):
         try:
             return self.image.url if self.image else ''
         except Exception:
             return ''
+# ========================
+# Search index
+# ========================
+class SearchDocument(models.Model):
+    """
+    متن پاک‌شده (بدون HTML و نرمال‌شده) پست‌ها و آلبوم‌ها برای جستجوی تمام‌متن.
+    روی SQLite یک جدول FTS5 (blog_search_fts) و روی MySQL ایندکس FULLTEXT (ngram)
+    روی همین جدول ساخته می‌شود؛ همگام‌سازی در blog/signals.py و blog/search.py.
+    """
+    KIND_POST = 'post'
+    KIND_ALBUM = 'album'
+    KIND_CHOICES = [
+        (KIND_POST, _('پست')),
+        (KIND_ALBUM, _('آلبوم')),
+    ]
+    kind = models.CharField(_('نوع'), max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField(_('شناسه'))
+    title = models.TextField(_('عنوان'), blank=True)
+    body = models.TextField(_('متن'), blank=True)
+    # شناسهٔ دسته‌ها به شکل ",1,5," برای فیلتر scope
+    categories = models.CharField(_('دسته‌ها'), max_length=500, blank=True)
+    created_at = models.DateTimeField(_('تاریخ ایجاد'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("سند جستجو")
+        verbose_name_plural = _("اسناد جستجو")
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='blog_searchdoc_kind_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+
+# ========================
+# Background tasks
+# ========================
+class Task(models.Model):
+    """
+    یک کار در صف پس‌زمینه (blog/tasks.py)؛ worker با update شرطی روی status آن را برمی‌دارد.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('در صف')),
+        (STATUS_RUNNING, _('در حال اجرا')),
+        (STATUS_DONE, _('انجام شد')),
+        (STATUS_FAILED, _('ناموفق')),
+    ]
+    name = models.CharField(_('نام کار'), max_length=100)
+    args = models.JSONField(_('آرگومان‌ها'), default=list, blank=True)
+    # نام + آرگومان‌ها؛ برای جلوگیری از کار تکراری در صف
+    key = models.CharField(_('کلید'), max_length=64, db_index=True)
+    # همان key تا وقتی کار یکتا در صف است، در غیر این صورت NULL؛ یکتایی آن را خود دیتابیس تضمین می‌کند
+    # (جایگزین قابل حمل unique index شرطی روی status که MySQL ندارد؛ NULLها با هم برخورد نمی‌کنند)
+    pending_key = models.CharField(_('کلید در صف'), max_length=64, null=True, blank=True, unique=True, editable=False)
+    status = models.CharField(_('وضعیت'), max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(_('تعداد تلاش'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('حداکثر تلاش'), default=3)
+    run_after = models.DateTimeField(_('اجرا پس از'), default=timezone.now)
+    locked_by = models.CharField(_('worker'), max_length=100, blank=True)
+    locked_at = models.DateTimeField(_('زمان برداشتن'), null=True, blank=True)
+    last_error = models.TextField(_('آخرین خطا'), blank=True)
+    created_at = models.DateTimeField(_('تاریخ ایجاد'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('به‌روز رسانی'), auto_now=True)
+
+    class Meta:
+        verbose_name = _("کار پس‌زمینه")
+        verbose_name_plural = _("کارهای پس‌زمینه")
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='blog_task_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+# ========================
+# Code allocation
+# ========================
+def _new_code_key():
+    return secrets.token_hex(16)
+
+
+class CodeSequence(models.Model):
+    """
+    شمارندهٔ تخصیص کد برای هر مدل (blog/codes.py)؛ کد = جایگشت کلیددار شمارنده در فضای ۶ رقمی.
+    """
+    scope = models.CharField(_('دامنه'), max_length=50, unique=True)
+    # کلید جایگشت؛ نباید بعد از اولین تخصیص عوض شود
+    key = models.CharField(_('کلید'), max_length=64, default=_new_code_key, editable=False)
+    next_index = models.PositiveIntegerField(_('شمارندهٔ بعدی'), default=0)
+    updated_at = models.DateTimeField(_('به‌روز رسانی'), auto_now=True)
+
+    class Meta:
+        verbose_name = _("شمارندهٔ کد")
+        verbose_name_plural = _("شمارنده‌های کد")
+
+    def __str__(self):
+        return f"{self.scope}: {self.next_index}"
+
+
 # ========================
 # SiteSetting / Footer / Ads
 # ========================
@@ -359,6 +480,34 @@ class FooterSetting(models.Model):
 # ========================
 # Advertising
 # ========================
+class AdQuerySet(models.QuerySet):
+    """
+    شرط «در حال نمایش» (همان is_currently_active) به صورت SQL تا با ایندکس
+    blog_ad_eligible_idx اجرا شود و نیازی به فیلتر کردن ردیف‌ها در پایتون نباشد.
+    """
+
+    @staticmethod
+    def currently_active_q(now=None):
+        now = now or timezone.now()
+        return (
+            models.Q(is_active=True)
+            & (models.Q(start_date__isnull=True) | models.Q(start_date__lte=now))
+            & (models.Q(end_date__isnull=True) | models.Q(end_date__gte=now))
+            # max_impressions خالی یا صفر یعنی بدون سقف
+            & (
+                models.Q(max_impressions__isnull=True)
+                | models.Q(max_impressions=0)
+                | models.Q(impressions_count__lt=models.F('max_impressions'))
+            )
+        )
+
+    def currently_active(self, now=None):
+        return self.filter(self.currently_active_q(now))
+
+    def not_currently_active(self, now=None):
+        return self.exclude(self.currently_active_q(now))
+
+
 class Ad(models.Model):
     GROUP_HEADER = 'header'
     GROUP_MAIN = 'main'
@@ -379,13 +528,21 @@ class Ad(models.Model):
     max_impressions = models.PositiveIntegerField(_('حداکثر نمایش (بار)'), null=True, blank=True)
     impressions_count = models.PositiveIntegerField(_('تعداد نمایش فعلی'), default=0, editable=False)
     clicks_count = models.PositiveIntegerField(_('تعداد کلیک‌ها'), default=0, editable=False)
+    # سهم نسبی در چرخش آگهی‌های یک گروه (blog/ads.py)
+    weight = models.PositiveSmallIntegerField(_('وزن نمایش'), default=1)
     created_at = jmodels.jDateTimeField(_('ایجاد شده در'), auto_now_add=True)
     updated_at = jmodels.jDateTimeField(_('به‌روز شده در'), auto_now=True)
 
+    objects = AdQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("آگهی")
         verbose_name_plural = _("آگهی‌ها")
         ordering = ['-created_at']
+        indexes = [
+            # انتخاب آگهی‌های قابل نمایش: group IN (...) AND is_active AND بازهٔ زمانی
+            models.Index(fields=['group', 'is_active', 'start_date', 'end_date'], name='blog_ad_eligible_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_group_display()})"
@@ -434,6 +591,10 @@ def short_summary(self, length=200, preserve_words=True):
     # اولویت: خلاصهٔ صریح (summary) سپس short_description
     text = (self.summary or self.short_description or '') if hasattr(self, 'summary') or hasattr(self, 'short_description') else ''
     if not text:
+        # گزیدهٔ ذخیره‌شده (بدون strip کل content)؛ فقط برای ردیف‌های backfill‌نشده از content
+        excerpt = stored_excerpt(self, length)
+        if excerpt is not None:
+            return excerpt
         text = strip_tags(getattr(self, 'content', '') or '')
 
     text = text.strip()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:02:27 2026
+
+Persian text normalization (search, slugs, code lookups)
+@author: Abbas Mahdavi
+"""
+
+# blog/persian.py
+import re
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+ZWNJ = '\u200c'
+
+# همهٔ جداول یک بار در import ساخته می‌شوند؛ str.translate و regex در C اجرا می‌شوند
+# و هیچ حلقهٔ کاراکتر به کاراکتر در پایتون نداریم.
+
+# ارقام فارسی و عربی -> لاتین
+_DIGITS = {
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ۰-۹
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ٠-٩
+}
+DIGITS_TABLE = str.maketrans(_DIGITS)
+
+NORMALIZE_TABLE = str.maketrans({
+    **_DIGITS,
+    # حروف عربی -> فارسی
+    '\u064a': '\u06cc',  # ي -> ی
+    '\u0649': '\u06cc',  # ى -> ی
+    '\u0643': '\u06a9',  # ك -> ک
+    '\u06c0': '\u0647',  # ۀ -> ه
+    '\u0629': '\u0647',  # ة -> ه
+    '\u0623': '\u0627',  # أ -> ا
+    '\u0625': '\u0627',  # إ -> ا
+    '\u0671': '\u0627',  # ٱ -> ا
+    # اعراب، تنوین، همزهٔ روی/زیر حرف و کشیده
+    **{chr(c): None for c in range(0x064B, 0x0656)},
+    '\u0670': None,
+    '\u0640': None,
+    # انواع نیم‌فاصله و کاراکترهای نامرئی
+    '\u200b': ZWNJ,  # zero-width space
+    '\u00ad': ZWNJ,  # soft hyphen
+    '\u200d': None,  # zero-width joiner
+    '\u200e': None, '\u200f': None,  # LRM / RLM
+    '\u202a': None, '\u202b': None, '\u202c': None, '\u202d': None, '\u202e': None,
+    '\ufeff': None,
+    # فاصله‌ها
+    '\u00a0': ' ', '\u2009': ' ', '\u202f': ' ', '\u3000': ' ',
+})
+
+# هر دنباله‌ای از فاصله/نیم‌فاصله که دست‌کم یک فاصله دارد -> یک فاصله؛
+# نیم‌فاصله‌های تکراری -> یک نیم‌فاصله
+_SPACE_RUN_RE = re.compile('[\\s\u200c]*\\s[\\s\u200c]*')
+_ZWNJ_RUN_RE = re.compile('\u200c{2,}')
+
+
+def normalize(text):
+    """
+    نرمال‌سازی متن فارسی برای ایندکس و مقایسه:
+    ی/ک عربی، ارقام، اعراب و کشیده، انواع نیم‌فاصله و فاصله‌ها.
+    """
+    if not text:
+        return ''
+    if '&' in text:
+        # entityهایی که CKEditor در متن می‌گذارد
+        text = text.replace('&zwnj;', ZWNJ).replace('&nbsp;', ' ')
+    text = _SPACE_RUN_RE.sub(' ', text.translate(NORMALIZE_TABLE))
+    if ZWNJ in text:
+        text = _ZWNJ_RUN_RE.sub(ZWNJ, text)
+    return text.strip(' ' + ZWNJ)
+
+
+def to_latin_digits(text):
+    """
+    فقط تبدیل ارقام فارسی/عربی به لاتین (برای کدهای پست و آلبوم در URL).
+    """
+    return (text or '').translate(DIGITS_TABLE)
+
+
+def slug_base(text, fallback_prefix):
+    """
+    پایهٔ slug از متن نرمال‌شده؛ اگر خالی شد از پیشوند و timestamp استفاده می‌شود.
+    """
+    return slugify(normalize(text), allow_unicode=True) or f'{fallback_prefix}-{int(timezone.now().timestamp())}'
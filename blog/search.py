@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:10:05 2026
+
+Pluggable full-text search (SQLite FTS5 / MySQL FULLTEXT ngram)
+@author: Abbas Mahdavi
+"""
+
+# blog/search.py
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import strip_tags, escape
+from django.utils.safestring import mark_safe
+
+from .models import Post, Album, SearchDocument
+from .persian import normalize
+
+# نشانه‌گذارهای موقت برجسته‌سازی (کاراکترهای Private Use که در متن عادی نمی‌آیند)؛
+# پس از escape کردن snippet به <mark> تبدیل می‌شوند.
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+
+SEARCH_LIMIT = 200
+SNIPPET_TOKENS = 24
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def html_to_text(value):
+    """
+    متن ساده از HTML ادیتور: حذف تگ‌ها، باز کردن entityها (مثل &zwnj; و &nbsp;).
+    """
+    return html.unescape(strip_tags(value or ''))
+
+
+def query_tokens(query):
+    return _TOKEN_RE.findall(normalize(query))
+
+
+# ---------------------------
+# Documents
+# ---------------------------
+def _category_ids(obj):
+    ids = sorted(c.pk for c in obj.categories.all())
+    return f",{','.join(str(i) for i in ids)}," if ids else ''
+
+
+def build_document(obj):
+    if isinstance(obj, Post):
+        kind = SearchDocument.KIND_POST
+        body = ' '.join(filter(None, [
+            obj.short_description,
+            obj.summary,
+            html_to_text(obj.content),
+        ]))
+        created_at = obj.created_at.togregorian() if hasattr(obj.created_at, 'togregorian') else obj.created_at
+    else:
+        kind = SearchDocument.KIND_ALBUM
+        body = html_to_text(obj.order_instructions)
+        created_at = obj.created_at
+    return {
+        'kind': kind,
+        'object_id': obj.pk,
+        'title': normalize(obj.title),
+        'body': normalize(body),
+        'categories': _category_ids(obj),
+        'created_at': created_at,
+    }
+
+
+def index_object(obj):
+    doc = build_document(obj)
+    SearchDocument.objects.update_or_create(
+        kind=doc.pop('kind'), object_id=doc.pop('object_id'), defaults=doc,
+    )
+
+
+def remove_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def refresh_categories(kind, object_ids):
+    model = Post if kind == SearchDocument.KIND_POST else Album
+    for obj in model.objects.filter(pk__in=list(object_ids)).prefetch_related('categories'):
+        SearchDocument.objects.filter(kind=kind, object_id=obj.pk).update(categories=_category_ids(obj))
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class BaseSearchBackend:
+    def search(self, query, kind=None, category_id=None, limit=SEARCH_LIMIT):
+        """
+        لیست (kind, object_id, snippet) به ترتیب رتبه؛ snippet شامل MARK_OPEN/MARK_CLOSE است.
+        """
+        raise NotImplementedError
+
+    def rebuild(self):
+        pass
+
+    def _filters(self, kind, category_id, alias='d'):
+        where, params = [], []
+        if kind:
+            where.append(f'{alias}.kind = %s')
+            params.append(kind)
+        if category_id:
+            where.append(f'{alias}.categories LIKE %s')
+            params.append(f'%,{int(category_id)},%')
+        return where, params
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    def _match(self, tokens):
+        # هر توکن به صورت عبارت prefix؛ نقل‌قول‌ها escape می‌شوند (ورودی کاربر هرگز syntax نیست)
+        return ' '.join('"%s"*' % t.replace('"', '""') for t in tokens)
+
+    def search(self, query, kind=None, category_id=None, limit=SEARCH_LIMIT):
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        where, params = self._filters(kind, category_id)
+        sql = (
+            "SELECT d.kind, d.object_id, "
+            "snippet(blog_search_fts, -1, %s, %s, '…', %s) "
+            "FROM blog_search_fts JOIN blog_searchdocument d ON d.id = blog_search_fts.rowid "
+            "WHERE blog_search_fts MATCH %s"
+            + ''.join(f' AND {w}' for w in where)
+            # عنوان وزن بیشتری از متن دارد
+            + " ORDER BY bm25(blog_search_fts, 10.0, 1.0) LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [MARK_OPEN, MARK_CLOSE, SNIPPET_TOKENS, self._match(tokens)] + params + [limit])
+            return cursor.fetchall()
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO blog_search_fts(blog_search_fts) VALUES ('rebuild')")
+
+
+class MySQLFullTextBackend(BaseSearchBackend):
+    def _against(self, tokens):
+        # BOOLEAN MODE: همهٔ توکن‌ها الزامی، هر کدام به صورت عبارت (سازگار با ngram)
+        return ' '.join('+"%s"' % t.replace('"', '') for t in tokens)
+
+    def search(self, query, kind=None, category_id=None, limit=SEARCH_LIMIT):
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        where, params = self._filters(kind, category_id)
+        against = self._against(tokens)
+        first = tokens[0]
+        # snippet و برجسته‌سازی هم در SQL و از متن ایندکس‌شده ساخته می‌شوند
+        sql = (
+            "SELECT d.kind, d.object_id, "
+            "REPLACE(SUBSTRING(d.body, GREATEST(LOCATE(%s, d.body) - 80, 1), 240), %s, CONCAT(%s, %s, %s)), "
+            "MATCH(d.title, d.body) AGAINST (%s IN BOOLEAN MODE) AS score "
+            "FROM blog_searchdocument d "
+            "WHERE MATCH(d.title, d.body) AGAINST (%s IN BOOLEAN MODE)"
+            + ''.join(f' AND {w}' for w in where)
+            + " ORDER BY score DESC LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                [first, first, MARK_OPEN, first, MARK_CLOSE, against, against] + params + [limit],
+            )
+            return [row[:3] for row in cursor.fetchall()]
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    fallback برای دیتابیس‌های دیگر: جستجوی ساده روی متن پاک‌شده (بدون HTML).
+    """
+
+    def search(self, query, kind=None, category_id=None, limit=SEARCH_LIMIT):
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        qs = SearchDocument.objects.all()
+        for t in tokens:
+            qs = qs.filter(Q(title__icontains=t) | Q(body__icontains=t))
+        if kind:
+            qs = qs.filter(kind=kind)
+        if category_id:
+            qs = qs.filter(categories__contains=f',{int(category_id)},')
+        return [(k, oid, '') for k, oid in qs.order_by('-created_at').values_list('kind', 'object_id')[:limit]]
+
+
+_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'mysql': MySQLFullTextBackend,
+}
+
+
+def get_backend():
+    return _BACKENDS.get(connection.vendor, SimpleSearchBackend)()
+
+
+def render_snippet(snippet):
+    if not snippet:
+        return ''
+    return mark_safe(escape(snippet).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>'))
+
+
+def search_objects(query, kind=None, category_id=None, limit=SEARCH_LIMIT, queryset=None):
+    """
+    جستجو در ایندکس و بازگرداندن اشیاء واقعی به ترتیب رتبه:
+    لیست (obj, snippet_html) برای پست‌ها یا آلبوم‌ها (با kind مشخص).
+    queryset (اختیاری) ستون‌ها/prefetch اشیاء را تعیین می‌کند (مثلاً blog/cards.py).
+    """
+    hits = get_backend().search(query, kind=kind, category_id=category_id, limit=limit)
+    model = Post if kind == SearchDocument.KIND_POST else Album
+    if queryset is None:
+        queryset = model.objects.all()
+    objs = queryset.in_bulk([oid for _, oid, _ in hits])
+    return [(objs[oid], render_snippet(snippet)) for _, oid, snippet in hits if oid in objs]
+
+
+def rebuild_index(batch_size=500):
+    """
+    بازسازی کامل جدول اسناد از روی پست‌ها و آلبوم‌ها. تعداد اسناد را برمی‌گرداند.
+    """
+    SearchDocument.objects.all().delete()
+    total = 0
+    for model in (Post, Album):
+        qs = model.objects.order_by('pk').prefetch_related('categories')
+        batch = []
+        for obj in qs.iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(**build_document(obj)))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            total += len(batch)
+    get_backend().rebuild()
+    return total
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+Cache invalidation signals for blog content
+@author: Abbas Mahdavi
+"""
+
+# blog/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .ads import clear_exhausted
+from .caching import CONTENT_SCOPE, album_scope, bump_version
+from .chrome import CHROME_SCOPE
+from .models import (
+    Post, Album, AlbumImage, Category,
+    SiteSetting, Menu, MenuItem, FooterLink, FooterIcon, Ad,
+    SearchDocument,
+)
+from . import jobs  # noqa: F401  (ثبت کارهای پس‌زمینه)
+from . import search
+from .images import needs_derivatives
+from .tasks import enqueue
+from .stats import COUNTER_FIELDS, adjust_category_counts
+
+
+# ---------- محتوا: هر تغییری در پست/آلبوم/دسته نسخهٔ محتوا را بالا می‌برد ----------
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=AlbumImage)
+@receiver(post_delete, sender=AlbumImage)
+def invalidate_content(sender, **kwargs):
+    bump_version(CONTENT_SCOPE)
+    enqueue('cache.warm_homepage')
+
+
+# دسته‌ها (و شمارنده‌هایشان) هم در محتوا و هم در سایدبار chrome دیده می‌شوند
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_version(CONTENT_SCOPE, CHROME_SCOPE)
+
+
+# API تصاویر آلبوم (blog/album_images.py) نسخهٔ جداگانهٔ هر آلبوم را دارد
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+def invalidate_album(sender, instance, **kwargs):
+    bump_version(album_scope(instance.pk))
+
+
+@receiver(post_save, sender=AlbumImage)
+@receiver(post_delete, sender=AlbumImage)
+def invalidate_album_images(sender, instance, **kwargs):
+    bump_version(album_scope(instance.album_id))
+
+
+# category_slug در payload آلبوم‌های دسته است؛ تغییر slug (یا حذف دسته) آن‌ها را هم باطل می‌کند
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._previous_slug = Category.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_albums(sender, instance, created, raw=False, **kwargs):
+    if raw or created or getattr(instance, '_previous_slug', instance.slug) == instance.slug:
+        return
+    album_ids = list(instance.albums.values_list('pk', flat=True))
+    if album_ids:
+        bump_version(*(album_scope(pk) for pk in album_ids))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_albums(sender, instance, **kwargs):
+    # ردیف‌های جدول واسط بدون m2m_changed حذف می‌شوند
+    instance._album_ids = list(instance.albums.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category_albums(sender, instance, **kwargs):
+    album_ids = getattr(instance, '_album_ids', None)
+    if album_ids:
+        bump_version(*(album_scope(pk) for pk in album_ids))
+
+
+@receiver(m2m_changed, sender=Album.categories.through)
+def invalidate_album_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # category_slug در payload آلبوم است
+    if not reverse:
+        bump_version(album_scope(instance.pk))
+    elif pk_set:
+        bump_version(*(album_scope(pk) for pk in pk_set))
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Album.categories.through)
+def invalidate_content_categories(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(CONTENT_SCOPE, CHROME_SCOPE)
+
+
+# ---------- chrome: تنظیمات سایت، منوها، فوتر و آگهی‌ها ----------
+@receiver(post_save, sender=SiteSetting)
+@receiver(post_delete, sender=SiteSetting)
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=FooterLink)
+@receiver(post_delete, sender=FooterLink)
+@receiver(post_save, sender=FooterIcon)
+@receiver(post_delete, sender=FooterIcon)
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+def invalidate_chrome(sender, **kwargs):
+    bump_version(CHROME_SCOPE)
+
+
+@receiver(post_save, sender=Ad)
+def reset_ad_exhausted(sender, instance, raw=False, **kwargs):
+    # سقف نمایش ممکن است بالا رفته باشد؛ موجودی جدید دوباره تصمیم می‌گیرد
+    if not raw:
+        clear_exhausted(instance.pk)
+
+
+# ---------- شمارنده‌های دسته‌بندی (post_count / album_count) ----------
+def _sync_category_counts(field, through, owner_field, instance, action, reverse, pk_set):
+    # pk_set در remove همهٔ شناسه‌های درخواست‌شده است، حتی آن‌هایی که اصلاً وصل نبوده‌اند؛
+    # پس ردیف‌های واقعاً موجود در جدول واسط پیش از حذف (pre_remove) خوانده می‌شوند
+    if reverse:
+        # instance یک Category است و pk_set شناسهٔ پست‌ها/آلبوم‌ها
+        if action == 'pre_clear':
+            instance._category_counts_cleared = through.objects.filter(category_id=instance.pk).count()
+        elif action == 'post_clear':
+            adjust_category_counts(field, [instance.pk], -getattr(instance, '_category_counts_cleared', 0))
+        elif action == 'post_add' and pk_set:
+            adjust_category_counts(field, [instance.pk], len(pk_set))
+        elif action == 'pre_remove' and pk_set:
+            instance._category_counts_removed = through.objects.filter(
+                category_id=instance.pk, **{f'{owner_field}__in': pk_set}
+            ).count()
+        elif action == 'post_remove':
+            adjust_category_counts(field, [instance.pk], -instance.__dict__.pop('_category_counts_removed', 0))
+        return
+    # instance یک Post/Album است و pk_set شناسهٔ دسته‌ها (در add فقط موارد واقعاً اضافه‌شده)
+    if action == 'pre_clear':
+        instance._category_counts_cleared = list(instance.categories.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        adjust_category_counts(field, getattr(instance, '_category_counts_cleared', []), -1)
+    elif action == 'post_add':
+        adjust_category_counts(field, pk_set, 1)
+    elif action == 'pre_remove' and pk_set:
+        instance._category_counts_removed = list(through.objects.filter(
+            category_id__in=pk_set, **{owner_field: instance.pk}
+        ).values_list('category_id', flat=True))
+    elif action == 'post_remove':
+        adjust_category_counts(field, instance.__dict__.pop('_category_counts_removed', []), -1)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def sync_post_category_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    _sync_category_counts(COUNTER_FIELDS['post'], sender, 'post_id', instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Album.categories.through)
+def sync_album_category_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    _sync_category_counts(COUNTER_FIELDS['album'], sender, 'album_id', instance, action, reverse, pk_set)
+
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=Album)
+def release_category_counts(sender, instance, **kwargs):
+    # حذف ردیف‌های جدول واسط هنگام delete سیگنال m2m_changed نمی‌فرستد
+    field = COUNTER_FIELDS['post'] if sender is Post else COUNTER_FIELDS['album']
+    adjust_category_counts(field, list(instance.categories.values_list('pk', flat=True)), -1)
+
+
+# ---------- ایندکس جستجو ----------
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Album)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    kind = SearchDocument.KIND_POST if sender is Post else SearchDocument.KIND_ALBUM
+    enqueue('search.index', kind, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Album)
+def remove_from_search_index(sender, instance, **kwargs):
+    kind = SearchDocument.KIND_POST if sender is Post else SearchDocument.KIND_ALBUM
+    search.remove_object(kind, instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Album.categories.through)
+def update_search_categories(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if reverse:
+        # instance یک Category است؛ اسناد پست‌ها/آلبوم‌های تغییرکرده به‌روز می‌شوند
+        kind = SearchDocument.KIND_POST if model is Post else SearchDocument.KIND_ALBUM
+        related = instance.posts if model is Post else instance.albums
+        if action == 'pre_clear':
+            instance._search_cleared_ids = list(related.values_list('pk', flat=True))
+        elif action == 'post_clear' and getattr(instance, '_search_cleared_ids', None):
+            enqueue('search.refresh_categories', kind, sorted(instance._search_cleared_ids))
+        elif action in ('post_add', 'post_remove') and pk_set:
+            enqueue('search.refresh_categories', kind, sorted(pk_set))
+        return
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        kind = SearchDocument.KIND_POST if isinstance(instance, Post) else SearchDocument.KIND_ALBUM
+        enqueue('search.refresh_categories', kind, [instance.pk])
+
+
+# ---------- کارهای سنگین ذخیره (در صف پس‌زمینه، blog/jobs.py) ----------
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=AlbumImage)
+def build_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or not needs_derivatives(instance):
+        return
+    enqueue('images.derivatives', instance._meta.label, instance.pk)
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=AlbumImage)
+def select_album_cover(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Album:
+        if not instance.cover_image:
+            enqueue('albums.select_cover', instance.pk)
+    else:
+        enqueue('albums.select_cover', instance.album_id)
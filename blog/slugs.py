@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:48:27 2026
+
+Unique slug allocation shared by Category, Post and Album
+@author: Abbas Mahdavi
+"""
+
+# blog/slugs.py
+from django.db import IntegrityError, transaction
+from django.db.models import Case, IntegerField, Max, Min, Value, When
+from django.db.models.functions import Cast, StrIndex, Substr
+
+# اگر ذخیرهٔ همزمان همان slug را گرفت، با پسوند بعدی دوباره تلاش می‌شود
+SLUG_RETRIES = 5
+
+
+def next_slug(model, base, exclude_pk=None):
+    """
+    اولین slug آزاد به شکل base، base-1، base-2، ... با یک کوئری: وجود base و بزرگ‌ترین پسوند
+    عددی base-N (پیمایش پیشوندی روی ایندکس یکتای slug) به جای یک .exists() برای هر شماره.
+    """
+    # بازهٔ [base, base.) فقط خود base و base-... را در بر دارد (کاراکترهای slug همه بعد از «-» هستند)
+    # و برخلاف LIKE در همهٔ دیتابیس‌ها با ایندکس یکتای slug پیمایش می‌شود
+    qs = model._default_manager.filter(slug__gte=base, slug__lt=f'{base}.')
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    # پسوندی که خودش خط تیره دارد (base-2-x از عنوان دیگری) شمرده نمی‌شود؛ پسوند غیرعددی (و خود base)
+    # در CAST صفر یا عدد ابتدای آن می‌شود که در بدترین حالت فقط یک شماره را جا می‌اندازد
+    found = qs.annotate(
+        suffix=Substr('slug', len(base) + 2),
+        hyphen=StrIndex('suffix', Value('-')),
+    ).aggregate(
+        first=Min('slug'),
+        top=Max(Case(When(hyphen=0, then=Cast('suffix', IntegerField())))),
+    )
+    if found['first'] != base:
+        return base
+    return f"{base}-{max(found['top'] or 0, 0) + 1}"
+
+
+def save_with_unique_slug(instance, base, save):
+    """
+    slug آزاد را روی instance می‌گذارد و save() را اجرا می‌کند؛ اگر ذخیرهٔ همزمانی همان slug را
+    زودتر گرفته باشد (IntegrityError روی slug)، slug بعدی امتحان می‌شود.
+    """
+    model = type(instance)
+    for attempt in range(SLUG_RETRIES):
+        instance.slug = next_slug(model, base, exclude_pk=instance.pk)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            taken = model._default_manager.filter(slug=instance.slug).exclude(pk=instance.pk).exists()
+            if not taken or attempt == SLUG_RETRIES - 1:
+                raise
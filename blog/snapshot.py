@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+Materialized, versioned homepage context for post_list
+@author: Abbas Mahdavi
+"""
+
+# blog/snapshot.py
+from functools import partial
+
+from django.db.models import Prefetch
+from django.urls import reverse
+
+from .caching import CONTENT_SCOPE, get_versioned, store_versioned
+from .cards import album_cards_queryset, featured_post_card, post_cards, post_cards_queryset
+from .helpers import _safe_image_url, _image_srcset
+from .models import Post, Album, Category
+from .stats import category_sidebar_list
+from .timeline import timeline_page
+
+HOMEPAGE_SNAPSHOT_KEY = 'blog:snapshot:homepage'
+# سقف آیتم‌های combined_items (۲۰ تازه‌ترین پست و آلبوم) تا اندازهٔ snapshot با رشد جدول‌ها بزرگ نشود
+HOMEPAGE_TIMELINE_LIMIT = 20
+HOMEPAGE_TAB_ALBUMS = 12
+
+
+def _homepage_posts(selected_category=None):
+    featured_post = None
+    other_posts_qs = []
+    try:
+        # انتخاب featured (در صورتی که فیلد featured داشته باشی)
+        featured_qs = post_cards_queryset(with_categories=False)
+        if hasattr(Post, 'featured'):
+            featured_post = featured_qs.filter(featured=True).order_by('-created_at').first()
+        if not featured_post:
+            featured_post = featured_qs.order_by('-created_at').first()
+
+        other_posts_qs = Post.objects.order_by('-created_at')
+        if featured_post:
+            other_posts_qs = other_posts_qs.exclude(pk=featured_post.pk)
+        if selected_category:
+            other_posts_qs = other_posts_qs.filter(categories=selected_category)
+        other_posts_qs = other_posts_qs[:7]
+    except Exception:
+        featured_post = None
+        other_posts_qs = []
+
+    # آماده‌سازی dictها برای قالب (امن)؛ دسته‌ها با prefetch و بدون متن کامل پست‌ها
+    try:
+        other_posts = post_cards(other_posts_qs)
+    except Exception:
+        other_posts = []
+    return {'featured_post': featured_post_card(featured_post), 'other_posts': other_posts}
+
+
+def _homepage_album_tabs():
+    # album_tabs: فقط دسته‌هایی که آلبوم دارند (خالی‌ها حذف می‌شوند)
+    # آلبوم‌های همهٔ دسته‌ها با یک کوئری: prefetch برش‌خورده (ROW_NUMBER روی هر دسته)
+    album_tabs = []
+    try:
+        tab_albums = album_cards_queryset(Album.objects.order_by('-created_at', '-id'))[:HOMEPAGE_TAB_ALBUMS]
+        categories = Category.objects.only('id', 'name', 'slug').order_by('name').prefetch_related(
+            Prefetch('albums', queryset=tab_albums, to_attr='tab_albums')
+        )
+        for cat in categories:
+            cat_albums = cat.tab_albums
+            if not cat_albums:
+                continue
+            cat_slug = getattr(cat, 'slug', '') or ''
+            album_url = reverse('blog:category_albums', args=[cat_slug]) if cat_slug else '#'
+            album_tabs.append({
+                'name': getattr(cat, 'name', str(cat)),
+                'slug': cat_slug,
+                'albums': [{
+                    'id': getattr(a, 'id', None),
+                    'title': getattr(a, 'title', str(a)),
+                    'cover_url': _safe_image_url(a, field_names=('cover_image', 'featured_image', 'image'), size='card') or '',
+                    'cover_srcset': _image_srcset(a, field_names=('cover_image',)),
+                    'code': getattr(a, 'code', getattr(a, 'pk', '')),
+                    'album_url': album_url,
+                } for a in cat_albums],
+            })
+    except Exception:
+        album_tabs = []
+    return {'album_tabs': album_tabs}
+
+
+def _homepage_categories():
+    # categories list for sidebar (شمارنده‌های denormalized، یک کوئری)
+    try:
+        categories_list = category_sidebar_list()
+    except Exception:
+        categories_list = []
+    return {'categories': categories_list}
+
+
+def _homepage_timeline():
+    # ترکیب تازه‌ترین پست‌ها و آلبوم‌ها پشت سر هم (براساس created_at)؛ فقط صفحهٔ اول timeline
+    try:
+        combined_items = timeline_page(limit=HOMEPAGE_TIMELINE_LIMIT)['items']
+    except Exception:
+        combined_items = []
+    return {'combined_items': combined_items}  # لیست ترکیبی برای قالب
+
+
+def homepage_parts(selected_category=None):
+    """
+    بخش‌های مستقل context صفحهٔ اصلی (هر کدام یک dict)؛ نسخهٔ async در blog/async_views.py
+    آن‌ها را همزمان اجرا می‌کند.
+    """
+    return [partial(_homepage_posts, selected_category), _homepage_album_tabs, _homepage_categories, _homepage_timeline]
+
+
+def build_homepage_context(selected_category=None):
+    """
+    ساخت کامل context صفحهٔ اصلی از دیتابیس (بدون کش).
+    featured_post و other_posts شامل 'short_summary' هستند؛
+    album_tabs فقط دسته‌هایی که آلبوم دارند؛
+    combined_items: ترکیب پست‌ها و آلبوم‌ها پشت سر هم براساس created_at.
+    """
+    context = {}
+    for part in homepage_parts(selected_category):
+        context.update(part())
+    return context
+
+
+def get_homepage_snapshot():
+    """
+    context صفحهٔ اصلی از snapshot نسخه‌دار؛ با هر تغییر Post/Album/Category
+    نسخهٔ محتوا بالا می‌رود (blog/signals.py) و اولین درخواست بعدی آن را بازسازی می‌کند.
+    در حالت عادی فقط یک خواندن از cache انجام می‌شود.
+    """
+    return get_versioned(HOMEPAGE_SNAPSHOT_KEY, CONTENT_SCOPE, build_homepage_context, timeout=None)
+
+
+def rebuild_homepage_snapshot():
+    context = build_homepage_context()
+    store_versioned(HOMEPAGE_SNAPSHOT_KEY, CONTENT_SCOPE, context, timeout=None)
+    return context
@@ -28,7 +28,11 @@ document.addEventListener('DOMContentLoaded', function () {
     const albumModalMore = modalEl.querySelector('#albumModalMore');
     const thumbContainer = modalEl.querySelector('#albumThumbnails');
 
+    // هر باز شدن modal شمارهٔ تازه می‌گیرد تا صفحه‌های دیررسیدهٔ آلبوم قبلی اضافه نشوند
+    let openToken = 0;
+
     modalEl.addEventListener('hidden.bs.modal', function () {
+        openToken++;
         if (carouselInner) carouselInner.innerHTML = '';
         if (albumModalTitle) albumModalTitle.textContent = '';
         if (albumModalDesc) albumModalDesc.textContent = '';
@@ -39,8 +43,11 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
-    async function fetchAlbumImages(albumId) {
-        const url = getAjaxUrl(albumId);
+    async function fetchAlbumImages(albumId, cursor) {
+        let url = getAjaxUrl(albumId);
+        if (cursor) {
+            url += (url.indexOf('?') === -1 ? '?' : '&') + 'cursor=' + encodeURIComponent(cursor);
+        }
         try {
             const resp = await fetch(url, { credentials: 'same-origin' });
             if (!resp.ok) return null;
@@ -55,27 +62,18 @@ document.addEventListener('DOMContentLoaded', function () {
         return String(s || '').replace(/[&<>"']/g, m => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[m]));
     }
 
-    function populateCarousel(data) {
-        if (!carouselInner) return;
-        carouselInner.innerHTML = '';
-        if (thumbContainer) thumbContainer.innerHTML = '';
-        if (albumModalTitle) albumModalTitle.textContent = data.title || '';
-        if (albumModalDesc) albumModalDesc.textContent = data.description || 'بدون توضیح';
-
-        const images = Array.isArray(data.images) ? data.images : [];
-        if (!images.length) {
-            carouselInner.innerHTML = '<div class="carousel-item active"><div class="text-center py-5 text-muted">تصویری یافت نشد.</div></div>';
-            return;
-        }
-
-        images.forEach((img, idx) => {
+    function appendImages(images, offset) {
+        images.forEach((img, i) => {
+            const idx = offset + i;
             const div = document.createElement('div');
             div.className = 'carousel-item' + (idx === 0 ? ' active' : '');
             const safeUrl = escapeHtml(img.url || '');
             const safeCap = escapeHtml(img.caption || '');
+            // ابعاد از سرور: جای تصویر پیش از بارگذاری رزرو می‌شود
+            const sizeAttrs = img.width && img.height ? ` width="${Number(img.width)}" height="${Number(img.height)}"` : '';
             div.innerHTML = `
                 <div class="d-flex justify-content-center align-items-center" style="height:70vh;">
-                    <img src="${safeUrl}" alt="${safeCap}" style="max-height:100%; max-width:100%; object-fit:contain;">
+                    <img src="${safeUrl}" alt="${safeCap}"${sizeAttrs} loading="lazy" style="max-height:100%; max-width:100%; width:auto; height:auto; object-fit:contain;">
                 </div>
                 ${safeCap ? `<div class="carousel-caption d-none d-md-block text-start"><p>${safeCap}</p></div>` : ''}
             `;
@@ -83,8 +81,9 @@ document.addEventListener('DOMContentLoaded', function () {
 
             if (thumbContainer) {
                 const thumb = document.createElement('img');
-                thumb.src = safeUrl;
-                thumb.alt = safeCap;
+                thumb.src = img.thumb || img.url || '';
+                thumb.alt = img.caption || '';
+                thumb.loading = 'lazy';
                 thumb.className = 'img-thumbnail';
                 thumb.style = 'width:80px; height:60px; object-fit:cover; cursor:pointer;';
                 thumb.addEventListener('click', () => {
@@ -95,6 +94,36 @@ document.addEventListener('DOMContentLoaded', function () {
                 thumbContainer.appendChild(thumb);
             }
         });
+    }
+
+    // صفحه‌های بعدی (بیش از ۵۰ تصویر) پس از نمایش صفحهٔ اول و به ترتیب اضافه می‌شوند
+    async function loadRemainingPages(albumId, data, token) {
+        let next = data.next;
+        let count = Array.isArray(data.images) ? data.images.length : 0;
+        while (next && token === openToken) {
+            const page = await fetchAlbumImages(albumId, next);
+            if (!page || token !== openToken) return;
+            const images = Array.isArray(page.images) ? page.images : [];
+            appendImages(images, count);
+            count += images.length;
+            next = page.next;
+        }
+    }
+
+    function populateCarousel(data) {
+        if (!carouselInner) return;
+        carouselInner.innerHTML = '';
+        if (thumbContainer) thumbContainer.innerHTML = '';
+        if (albumModalTitle) albumModalTitle.textContent = data.title || '';
+        if (albumModalDesc) albumModalDesc.textContent = data.description || 'بدون توضیح';
+
+        const images = Array.isArray(data.images) ? data.images : [];
+        if (!images.length) {
+            carouselInner.innerHTML = '<div class="carousel-item active"><div class="text-center py-5 text-muted">تصویری یافت نشد.</div></div>';
+            return;
+        }
+
+        appendImages(images, 0);
 
         const carEl = modalEl.querySelector('#albumCarousel');
         let bsCar = bootstrap.Carousel.getInstance(carEl);
@@ -111,6 +140,7 @@ document.addEventListener('DOMContentLoaded', function () {
         e.preventDefault();
         const albumId = trigger.getAttribute('data-album-id');
         if (!albumId) return;
+        const token = ++openToken;
 
         if (carouselInner) carouselInner.innerHTML = '<div class="carousel-item active"><div class="text-center py-5 text-muted">در حال بارگذاری...</div></div>';
         if (albumModalTitle) albumModalTitle.textContent = '';
@@ -122,6 +152,7 @@ document.addEventListener('DOMContentLoaded', function () {
         }
 
         const data = await fetchAlbumImages(albumId);
+        if (token !== openToken) return;
         if (!data) {
             if (carouselInner) carouselInner.innerHTML = '<div class="carousel-item active"><div class="text-center py-5 text-danger">خطا در بارگذاری آلبوم</div></div>';
             albumModal.show();
@@ -136,5 +167,6 @@ document.addEventListener('DOMContentLoaded', function () {
         }
 
         albumModal.show();
+        loadRemainingPages(albumId, data, token);
     });
 });
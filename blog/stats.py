@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:12 2026
+
+Denormalized per-category post/album counters
+@author: Abbas Mahdavi
+"""
+
+# blog/stats.py
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Category
+
+# نام فیلد شمارنده برای هر مدل (براساس related_name روی Category)
+COUNTER_FIELDS = {
+    'post': 'post_count',
+    'album': 'album_count',
+}
+
+
+def adjust_category_counts(field, category_ids, delta):
+    """
+    افزایش/کاهش اتمیک شمارندهٔ field برای دسته‌های داده‌شده (یک UPDATE).
+    """
+    if not category_ids or not delta:
+        return
+    if delta >= 0:
+        expr = F(field) + delta
+    else:
+        expr = Greatest(F(field) + delta, 0)
+    Category.objects.filter(pk__in=list(category_ids)).update(**{field: expr})
+
+
+def related_count(through):
+    """
+    تعداد ردیف‌های جدول واسط M2M برای هر دسته (subquery همبسته روی ایندکس category_id).
+    دو Count روی posts و albums در یک annotate هر دو جدول را join می‌کند و حاصل‌ضرب آن‌ها را می‌شمارد.
+    """
+    counts = (
+        through._default_manager.filter(category_id=OuterRef('pk')).order_by()
+        .values('category_id').annotate(n=Count('pk')).values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def reconcile_category_counts(dry_run=False):
+    """
+    شمارش دوبارهٔ پست‌ها/آلبوم‌های هر دسته و اصلاح شمارنده‌های ناهماهنگ.
+    لیست (category, old_posts, old_albums) اصلاح‌شده‌ها را برمی‌گرداند.
+    """
+    rows = Category.objects.annotate(
+        n_posts=related_count(Category.posts.through),
+        n_albums=related_count(Category.albums.through),
+    )
+    changed = []
+    for cat in rows:
+        if cat.post_count != cat.n_posts or cat.album_count != cat.n_albums:
+            changed.append((cat, cat.post_count, cat.album_count))
+            cat.post_count = cat.n_posts
+            cat.album_count = cat.n_albums
+    if changed and not dry_run:
+        Category.objects.bulk_update([c for c, _, _ in changed], ['post_count', 'album_count'])
+    return changed
+
+
+def category_sidebar_list():
+    """
+    لیست دسته‌ها برای سایدبار با یک کوئری ایندکس‌شده (بدون COUNT به ازای هر دسته).
+    """
+    return [{
+        'id': c['id'],
+        'name': c['name'],
+        'slug': c['slug'] or '',
+        'count': c['post_count'] + c['album_count'],
+    } for c in Category.objects.order_by('name').values('id', 'name', 'slug', 'post_count', 'album_count')]
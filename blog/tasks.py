@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:05:44 2026
+
+Database-backed background task queue (no external broker)
+@author: Abbas Mahdavi
+"""
+
+# blog/tasks.py
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# ثبت کارها: name -> (func, max_attempts, retry_delay)
+_TASKS = {}
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 30  # ثانیه؛ در هر تلاش دو برابر می‌شود
+
+
+def task(name, max_attempts=DEFAULT_MAX_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY):
+    """
+    ثبت یک تابع به عنوان کار پس‌زمینه. آرگومان‌ها باید قابل تبدیل به JSON باشند
+    و تابع باید idempotent باشد (ممکن است بیش از یک بار اجرا شود).
+    """
+    def decorator(func):
+        _TASKS[name] = (func, max_attempts, retry_delay)
+        return func
+    return decorator
+
+
+def _task_key(name, args):
+    raw = json.dumps([name, args], separators=(',', ':'), sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def enqueue(name, *args, delay=0, unique=True):
+    """
+    افزودن کار به صف (در همان تراکنش جاری). با unique=True اگر همین کار با همین
+    آرگومان‌ها هنوز در صف باشد، کار تازه‌ای ساخته نمی‌شود و None برمی‌گردد.
+    یکتایی با ستون یکتای pending_key در خود دیتابیس است (دو ذخیرهٔ همزمان هم یک کار می‌سازند)؛
+    کاری که پس از خطا یا از کار افتادن worker دوباره صف می‌شود pending_key ندارد و ممکن است
+    کنار نسخهٔ تازهٔ خودش اجرا شود، که چون کارها idempotent هستند بی‌ضرر است.
+    """
+    if name not in _TASKS:
+        raise KeyError(f"unknown task: {name}")
+    args = list(args)
+    key = _task_key(name, args)
+    try:
+        # savepoint: برخورد pending_key فقط همین INSERT را برمی‌گرداند، نه تراکنش درخواست را
+        with transaction.atomic():
+            job = Task.objects.create(
+                name=name,
+                args=args,
+                key=key,
+                pending_key=key if unique else None,
+                max_attempts=_TASKS[name][1],
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        return None
+    if settings.BLOG_TASKS_INLINE:
+        transaction.on_commit(_kick)
+    return job
+
+
+# ---------------------------
+# Execution
+# ---------------------------
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def _ready(now):
+    return Task.objects.filter(status=Task.STATUS_PENDING, run_after__lte=now).order_by('id')
+
+
+def claim(worker, limit=10):
+    """
+    برداشتن حداکثر limit کار آماده. هر کار با یک UPDATE شرطی برداشته می‌شود
+    (روی SQLite و MySQL یکسان کار می‌کند و دو worker یک کار را با هم برنمی‌دارند).
+    با آزاد شدن pending_key، enqueue همان کار در حین اجرا یک اجرای بعدی صف می‌کند.
+    """
+    now = timezone.now()
+    claimed = []
+    for pk in _ready(now).values_list('pk', flat=True)[:limit]:
+        updated = Task.objects.filter(pk=pk, status=Task.STATUS_PENDING).update(
+            status=Task.STATUS_RUNNING, pending_key=None, locked_by=worker[:100], locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def requeue_stale(lock_timeout=None):
+    """
+    کارهایی که worker آنها از کار افتاده (بیش از lock_timeout در حال اجرا) دوباره به صف برمی‌گردند؛
+    کاری که همهٔ تلاش‌هایش را مصرف کرده (مثلاً هر بار worker را از کار می‌اندازد) failed می‌شود.
+    تعداد کارهای دوباره صف‌شده را برمی‌گرداند.
+    """
+    lock_timeout = settings.BLOG_TASKS_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+    now = timezone.now()
+    stale = Task.objects.filter(status=Task.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=lock_timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.STATUS_FAILED, locked_by='', locked_at=None, updated_at=now,
+        last_error=f"worker lock expired after {lock_timeout}s on the last attempt",
+    )
+    if failed:
+        logger.warning("%s stale task(s) out of attempts marked failed", failed)
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Task.STATUS_PENDING, locked_by='', locked_at=None, updated_at=now,
+    )
+
+
+def run_task(pk):
+    """
+    اجرای یک کار برداشته‌شده؛ در صورت خطا تا max_attempts با تأخیر نمایی دوباره صف می‌شود.
+    خروجی: وضعیت نهایی کار.
+    """
+    job = Task.objects.filter(pk=pk).first()
+    if job is None:
+        return None
+    entry = _TASKS.get(job.name)
+    try:
+        if entry is None:
+            raise KeyError(f"unknown task: {job.name}")
+        entry[0](*job.args)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("task %s #%s failed (attempt %s/%s)", job.name, job.pk, job.attempts, job.max_attempts)
+        if entry is not None and job.attempts < job.max_attempts:
+            delay = entry[2] * 2 ** (job.attempts - 1)
+            status, run_after = Task.STATUS_PENDING, timezone.now() + timedelta(seconds=delay)
+        else:
+            status, run_after = Task.STATUS_FAILED, job.run_after
+        Task.objects.filter(pk=pk).update(
+            status=status, run_after=run_after, locked_by='', locked_at=None,
+            last_error=error[-5000:], updated_at=timezone.now(),
+        )
+        if status == Task.STATUS_PENDING and settings.BLOG_TASKS_INLINE:
+            _kick_later(delay)
+        return status
+    Task.objects.filter(pk=pk).update(
+        status=Task.STATUS_DONE, locked_by='', locked_at=None, updated_at=timezone.now(),
+    )
+    return Task.STATUS_DONE
+
+
+def run_claimed(pk):
+    """
+    نقطهٔ ورود executorها (thread یا process)؛ هر thread/پروسه اتصال دیتابیس خودش را دارد
+    و پس از کار آن را می‌بندد.
+    """
+    close_old_connections()
+    try:
+        return run_task(pk)
+    finally:
+        connections.close_all()
+
+
+def drain(worker=None, limit=None):
+    """
+    اجرای پشت سر هم کارهای آماده تا خالی شدن صف (یا رسیدن به limit). تعداد اجراشده‌ها.
+    """
+    worker = worker or worker_id()
+    done = 0
+    while limit is None or done < limit:
+        batch = claim(worker, limit=1)
+        if not batch:
+            break
+        run_task(batch[0])
+        done += 1
+    return done
+
+
+def purge(older_than_days=7):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Task.objects.filter(status=Task.STATUS_DONE, updated_at__lt=cutoff).delete()
+    return deleted
+
+
+# ---------------------------
+# Inline mode (لوکال، بدون worker جداگانه)
+# ---------------------------
+_inline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='blog-tasks')
+_inline_lock = threading.Lock()
+_inline_scheduled = False
+
+
+def _inline_drain():
+    global _inline_scheduled
+    with _inline_lock:
+        _inline_scheduled = False
+    close_old_connections()
+    try:
+        drain()
+    except Exception:
+        logger.exception("inline task drain failed")
+    finally:
+        connections.close_all()
+
+
+def _kick():
+    global _inline_scheduled
+    with _inline_lock:
+        if _inline_scheduled:
+            return
+        _inline_scheduled = True
+    _inline_executor.submit(_inline_drain)
+
+
+def _kick_later(delay):
+    timer = threading.Timer(delay, _kick)
+    timer.daemon = True
+    timer.start()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:40:51 2026
+
+Template tags for ad impression/click tracking
+@author: Abbas Mahdavi
+"""
+
+# blog/templatetags/ad_tags.py
+from django import template
+from django.urls import reverse
+
+from blog.ad_tracking import record_impression, client_ip
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def ad_impression(context, ad):
+    """
+    ثبت یک نمایش آگهی در بافر (blog/ad_tracking.py)؛ چیزی چاپ نمی‌کند.
+    """
+    ad_id = getattr(ad, 'pk', None)
+    if ad_id:
+        request = context.get('request')
+        record_impression(ad_id, client_ip(request) if request is not None else '')
+    return ''
+
+
+@register.simple_tag
+def ad_click_url(ad):
+    if not getattr(ad, 'link_url', ''):
+        return '#'
+    return reverse('blog:ad_click', args=[ad.pk])
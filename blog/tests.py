@@ -1,3 +1,462 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+"""
+Query-count regression tests for the blog views and caches
+@author: Abbas Mahdavi
+"""
 
-# Create your tests here.
+# blog/tests.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import chrome, tasks
+from .ad_tracking import client_ip
+from .cards import POST_CARDS_QUERIES, post_cards
+from .caching import album_scope, get_version
+from .instrumentation import QueryBudgetExceeded
+from .models import Post, Album, AlbumImage, Category, Task
+from .views import _get_common_context
+
+
+def reset_caches():
+    # cache مشترک و لایهٔ داخل پروسهٔ chrome؛ درخواست بعدی «سرد» است
+    cache.clear()
+    chrome._local_cache.clear()
+
+
+def count_queries(func, *args, **kwargs):
+    with CaptureQueriesContext(connection) as captured:
+        func(*args, **kwargs)
+    return len(captured)
+
+
+class BlogTestCase(TestCase):
+    """
+    داده‌های پایه: یک نویسنده و کمک‌تابع‌هایی برای ساختن دسته، پست و آلبوم با save() معمولی
+    (سیگنال‌ها، شمارنده‌ها و نسخه‌های cache همان مسیر واقعی را طی می‌کنند).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = get_user_model().objects.create_user('author', password='secret')
+
+    def setUp(self):
+        reset_caches()
+
+    def make_category(self, name):
+        return Category.objects.create(name=name)
+
+    def make_post(self, title, categories=(), **fields):
+        post = Post.objects.create(
+            title=title, content=f'<p>{title} متن نمونه</p>', author=self.author, **fields
+        )
+        if categories:
+            post.categories.set(categories)
+        return post
+
+    def make_album(self, title, categories=(), **fields):
+        album = Album.objects.create(title=title, author=self.author, **fields)
+        if categories:
+            album.categories.set(categories)
+        return album
+
+    def add_categories(self, start, count):
+        # هر دسته یک پست و یک آلبوم دارد تا در سایدبار و تب‌های آلبوم دیده شود
+        for i in range(start, start + count):
+            category = self.make_category(f'دسته {i}')
+            self.make_post(f'پست {i}', [category])
+            self.make_album(f'آلبوم {i}', [category])
+        # کارهای پس‌زمینهٔ صف‌شده (ایندکس جستجو و ...) در TestCase با on_commit اجرا نمی‌شوند
+        tasks.drain()
+
+
+class CategoryCountersQueryTests(BlogTestCase):
+    """
+    سایدبار دسته‌ها از شمارنده‌های denormalized خوانده می‌شود؛ تعداد کوئری به تعداد دسته‌ها بستگی ندارد.
+    """
+
+    def sidebar_queries(self):
+        reset_caches()
+        return count_queries(lambda: len(_get_common_context()['categories']))
+
+    def homepage_queries(self):
+        reset_caches()
+        return count_queries(self.client.get, reverse('blog:post_list'))
+
+    def test_sidebar_counters(self):
+        self.add_categories(0, 2)
+        self.assertEqual(
+            list(Category.objects.order_by('name').values_list('post_count', 'album_count')), [(1, 1), (1, 1)]
+        )
+        self.assertEqual([c['count'] for c in _get_common_context()['categories']], [2, 2])
+
+    def counts(self, category):
+        category.refresh_from_db()
+        return category.post_count, category.album_count
+
+    def test_removing_unattached_category_keeps_counters(self):
+        linked, other = self.make_category('دسته وصل'), self.make_category('دسته دیگر')
+        self.make_post('پست وصل', [linked])
+        self.make_album('آلبوم وصل', [linked])
+        post = self.make_post('پست دیگر', [other])
+        album = self.make_album('آلبوم دیگر', [other])
+        # حذف دسته‌ای که اصلاً به پست/آلبوم وصل نیست (هر دو جهت رابطه)
+        post.categories.remove(linked)
+        album.categories.remove(linked)
+        linked.posts.remove(post)
+        linked.albums.remove(album)
+        self.assertEqual(self.counts(linked), (1, 1))
+        self.assertEqual(self.counts(other), (1, 1))
+        # حذف واقعی همراه با شناسه‌ای که وصل نیست فقط یکی کم می‌کند
+        post.categories.remove(other, linked)
+        other.albums.remove(album, *Album.objects.filter(categories=linked))
+        self.assertEqual(self.counts(other), (0, 0))
+        self.assertEqual(self.counts(linked), (1, 1))
+
+    def test_common_context_fixed_query_count(self):
+        self.add_categories(0, 3)
+        baseline = self.sidebar_queries()
+        self.add_categories(3, 12)
+        reset_caches()
+        with self.assertNumQueries(baseline):
+            self.assertEqual(len(_get_common_context()['categories']), 15)
+
+    def test_post_list_fixed_query_count(self):
+        self.add_categories(0, 3)
+        baseline = self.homepage_queries()
+        self.add_categories(3, 12)
+        reset_caches()
+        with self.assertNumQueries(baseline):
+            response = self.client.get(reverse('blog:post_list'))
+        self.assertEqual(response.status_code, 200)
+
+
+
+class ViewQueryCountTests(BlogTestCase):
+    """
+    تعداد کوئری هر صفحه با cache سرد (بعد از پاک شدن همهٔ cacheها) و گرم (درخواست دوم).
+    هر افزایشی (کوئری تکراری در chrome، N+1 در لیست‌ها) این تست‌ها را می‌شکند؛
+    کاهش عمدی یعنی به‌روز کردن عدد همین‌جا.
+    """
+
+    # view -> (سرد، گرم)
+    QUERY_COUNTS = {
+        'post_list': (17, 0),
+        'post_detail': (15, 3),
+        'search': (12, 3),
+        'category_albums': (13, 4),
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.add_categories(0, 4)
+        post = Post.objects.order_by('pk').first()
+        category = Category.objects.order_by('pk').first()
+        self.urls = {
+            'post_list': reverse('blog:post_list'),
+            'post_detail': reverse('blog:object_by_code_with_slug', args=[post.code, post.slug]),
+            'search': reverse('blog:search') + '?q=پست',
+            'category_albums': reverse('blog:category_albums', args=[category.slug]),
+        }
+
+    def assertViewQueries(self, name):
+        cold, warm = self.QUERY_COUNTS[name]
+        url = self.urls[name]
+        reset_caches()
+        with self.assertNumQueries(cold):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(warm):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_list(self):
+        self.assertViewQueries('post_list')
+
+    def test_post_detail(self):
+        self.assertViewQueries('post_detail')
+
+    def test_search(self):
+        self.assertViewQueries('search')
+
+    def test_category_albums(self):
+        self.assertViewQueries('category_albums')
+
+
+class TaskQueueTests(TestCase):
+    """
+    یکتایی کارهای در صف با ستون یکتای pending_key در دیتابیس (نه فقط بررسی exists در پایتون).
+    """
+
+    def test_duplicate_enqueue_is_ignored(self):
+        first = tasks.enqueue('cache.warm_homepage')
+        self.assertIsNotNone(first)
+        self.assertIsNone(tasks.enqueue('cache.warm_homepage'))
+        self.assertEqual(Task.objects.filter(name='cache.warm_homepage').count(), 1)
+
+    def test_database_rejects_second_pending_row(self):
+        job = tasks.enqueue('cache.warm_homepage')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Task.objects.create(name=job.name, args=[], key=job.key, pending_key=job.key)
+
+    def test_claimed_task_can_be_queued_again(self):
+        job = tasks.enqueue('cache.warm_homepage')
+        self.assertEqual(tasks.claim('test-worker'), [job.pk])
+        self.assertIsNotNone(tasks.enqueue('cache.warm_homepage'))
+        self.assertEqual(Task.objects.filter(key=job.key).count(), 2)
+
+    def test_non_unique_enqueue(self):
+        tasks.enqueue('cache.warm_homepage', unique=False)
+        tasks.enqueue('cache.warm_homepage', unique=False)
+        self.assertEqual(Task.objects.filter(pending_key__isnull=True).count(), 2)
+
+    def test_stale_task_out_of_attempts_fails(self):
+        job = tasks.enqueue('cache.warm_homepage')
+        tasks.claim('test-worker')
+        stale_at = timezone.now() - timedelta(hours=1)
+        Task.objects.filter(pk=job.pk).update(locked_at=stale_at, max_attempts=2)
+        self.assertEqual(tasks.requeue_stale(lock_timeout=60), 1)
+        self.assertEqual(Task.objects.get(pk=job.pk).status, Task.STATUS_PENDING)
+
+        tasks.claim('test-worker')
+        Task.objects.filter(pk=job.pk).update(locked_at=stale_at)
+        with self.assertLogs('blog.tasks', 'WARNING'):
+            self.assertEqual(tasks.requeue_stale(lock_timeout=60), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.STATUS_FAILED)
+        self.assertTrue(job.last_error)
+
+    def test_admin_retry_keeps_queue_unique(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(admin)
+        failed = [tasks.enqueue('cache.warm_homepage') for _ in range(2)]
+        failed[1] = tasks.enqueue('cache.warm_homepage', unique=False)
+        Task.objects.filter(pk__in=[job.pk for job in failed]).update(
+            status=Task.STATUS_FAILED, pending_key=None,
+        )
+        self.client.post(reverse('admin:blog_task_changelist'), {
+            'action': 'retry_tasks', '_selected_action': [job.pk for job in failed],
+        })
+        pending = Task.objects.filter(status=Task.STATUS_PENDING)
+        self.assertEqual(pending.count(), 1)
+        self.assertEqual(pending.get().pending_key, failed[0].key)
+        self.assertIsNone(tasks.enqueue('cache.warm_homepage'))
+
+
+class ConditionalGetTests(BlogTestCase):
+    """
+    ETag صفحه‌های عمومی: درخواست دوباره با If-None-Match برابر 304 می‌گیرد و هر ویرایش محتوا
+    (حتی فیلدهایی که در مُهر دیتابیسی نیستند) ETag را عوض می‌کند.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.category = self.make_category('دکوراسیون')
+        self.make_post('پست نمونه', [self.category])
+        self.album = self.make_album('آلبوم نمونه', [self.category])
+        self.urls = [reverse('blog:post_list'), reverse('blog:category_albums', args=[self.category.slug])]
+
+    def etags(self):
+        etags = {}
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etags[url] = response.headers['ETag']
+        return etags
+
+    def assertFresh(self, etags):
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+
+    def assertStale(self, etags):
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response.headers['ETag'], etag, url)
+
+    def test_unchanged_page_is_not_modified(self):
+        self.assertFresh(self.etags())
+
+    def test_album_edit_changes_etag(self):
+        etags = self.etags()
+        self.album.title = 'آلبوم ویرایش‌شده'
+        self.album.save()
+        self.assertStale(etags)
+        self.assertContains(self.client.get(self.urls[0]), 'آلبوم ویرایش‌شده')
+
+    def test_album_image_edit_changes_etag(self):
+        image = AlbumImage.objects.create(album=self.album, image='albums/images/sample.jpg')
+        etags = self.etags()
+        image.caption = 'عنوان تازه'
+        image.save()
+        self.assertStale(etags)
+
+    def test_category_edit_changes_etag(self):
+        etags = self.etags()
+        self.category.description = 'توضیح تازه'
+        self.category.save()
+        self.assertStale(etags)
+
+
+class AlbumImagesCacheTests(BlogTestCase):
+    """
+    payload کش‌شدهٔ API تصاویر آلبوم (category_slug) با تغییر slug یا حذف دستهٔ آلبوم باطل می‌شود.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.category = self.make_category('آشپزخانه')
+        self.album = self.make_album('آلبوم آشپزخانه', [self.category])
+        self.url = reverse('blog:api_album_images', args=[self.album.pk])
+
+    def category_slug(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['category_slug']
+
+    def test_category_slug_change(self):
+        self.assertEqual(self.category_slug(), self.category.slug)
+        self.category.slug = 'kitchen'
+        self.category.save()
+        self.assertEqual(self.category_slug(), 'kitchen')
+
+    def test_category_delete(self):
+        self.assertEqual(self.category_slug(), self.category.slug)
+        self.category.delete()
+        self.assertEqual(self.category_slug(), '')
+
+    def test_other_category_edit_keeps_album_version(self):
+        self.category_slug()
+        version = get_version(album_scope(self.album.pk))
+        self.category.description = 'توضیح تازه'
+        self.category.save()
+        self.assertEqual(get_version(album_scope(self.album.pk)), version)
+
+
+class RequestMetricsTests(BlogTestCase):
+    """
+    RequestMetricsMiddleware: هدر Server-Timing و بودجهٔ کوئری (BLOG_QUERY_BUDGET_ACTION='raise' در تست‌ها).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.add_categories(0, 2)
+
+    @override_settings(BLOG_METRICS_SAMPLE_RATE=1, BLOG_METRICS_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        reset_caches()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('blog:post_list'))
+        timing = response.headers['Server-Timing']
+        self.assertIn(f'desc="{len(captured)} queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    @override_settings(BLOG_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_header(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('blog:post_list')).headers)
+
+    @override_settings(BLOG_QUERY_BUDGET_ACTION='raise', BLOG_QUERY_BUDGETS={'blog:post_list': 1})
+    def test_budget_exceeded_raises(self):
+        reset_caches()
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'blog:post_list'):
+            self.client.get(reverse('blog:post_list'))
+
+    @override_settings(BLOG_QUERY_BUDGET_ACTION='raise')
+    def test_pages_within_configured_budgets(self):
+        category = Category.objects.order_by('pk').first()
+        post = Post.objects.order_by('pk').first()
+        album = Album.objects.order_by('pk').first()
+        for url in (
+            reverse('blog:post_list'),
+            reverse('blog:object_by_code_with_slug', args=[post.code, post.slug]),
+            reverse('blog:object_by_code', args=[post.code]),
+            reverse('blog:search') + '?q=پست',
+            reverse('blog:category_albums', args=[category.slug]),
+            reverse('blog:ajax_album_images', args=[album.pk]),
+            reverse('blog:api_album_images', args=[album.pk]),
+            reverse('blog:ajax_timeline'),
+        ):
+            reset_caches()
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            # صفحه‌ای بدون بودجه بی‌صدا از این تست رد می‌شد (مثل کلید قدیمی blog:post_detail)
+            self.assertIn(response.resolver_match.view_name, settings.BLOG_QUERY_BUDGETS, url)
+
+
+class PostCardsQueryTests(BlogTestCase):
+    """
+    کارت‌های پست (blog/cards.py) و لیست‌هایی که از آن‌ها استفاده می‌کنند با هر تعداد پست همان تعداد کوئری دارند.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.category = self.make_category('نورپردازی')
+        self.other = self.make_category('مبلمان')
+        self.add_posts(0, 3)
+
+    def add_posts(self, start, count):
+        for i in range(start, start + count):
+            self.make_post(f'پست نور {i}', [self.category, self.other])
+        tasks.drain()
+
+    def list_urls(self):
+        # url -> تعداد کارت‌های posts به ازای n پست (در صفحهٔ دسته اولی پست ویژه است)
+        return {
+            reverse('blog:category_albums', args=[self.category.slug]): -1,
+            reverse('blog:search') + '?q=نور': 0,
+        }
+
+    def cold_queries(self, url):
+        reset_caches()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_post_cards_fixed_query_count(self):
+        with self.assertNumQueries(POST_CARDS_QUERIES):
+            cards = post_cards(Post.objects.order_by('-created_at'))
+        self.assertEqual(len(cards), 3)
+        self.add_posts(3, 12)
+        with self.assertNumQueries(POST_CARDS_QUERIES):
+            cards = post_cards(Post.objects.order_by('-created_at'))
+        self.assertEqual(len(cards), 15)
+        self.assertEqual(sorted(cards[0]['categories']), sorted([self.category.slug, self.other.slug]))
+
+    def test_list_views_fixed_query_count(self):
+        baseline = {url: self.cold_queries(url) for url in self.list_urls()}
+        self.add_posts(3, 12)
+        for url, offset in self.list_urls().items():
+            reset_caches()
+            with self.assertNumQueries(baseline[url]):
+                response = self.client.get(url)
+            self.assertEqual(len(response.context['posts']), 15 + offset, url)
+
+
+class ClientIpTests(SimpleTestCase):
+    """
+    X-Forwarded-For فقط از proxyهای مورد اعتماد پذیرفته می‌شود و سمت چپ جعلی آن نادیده می‌ماند.
+    """
+
+    def ip(self, remote, forwarded=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded is not None else {}
+        return client_ip(RequestFactory().get('/', REMOTE_ADDR=remote, **extra))
+
+    @override_settings(BLOG_TRUSTED_PROXIES=[])
+    def test_header_ignored_without_trusted_proxies(self):
+        self.assertEqual(self.ip('203.0.113.7', '1.2.3.4'), '203.0.113.7')
+
+    @override_settings(BLOG_TRUSTED_PROXIES=['127.0.0.1', '10.0.0.0/8'])
+    def test_rightmost_untrusted_address(self):
+        self.assertEqual(self.ip('127.0.0.1', '1.2.3.4, 198.51.100.9, 10.0.0.5'), '198.51.100.9')
+        self.assertEqual(self.ip('127.0.0.1'), '127.0.0.1')
+        # درخواست مستقیم (نه از proxy) نمی‌تواند IP خودش را با هدر عوض کند
+        self.assertEqual(self.ip('203.0.113.7', '1.2.3.4'), '203.0.113.7')
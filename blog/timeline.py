@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:02:48 2026
+
+Merged post/album timeline with keyset (cursor) pagination
+@author: Abbas Mahdavi
+"""
+
+# blog/timeline.py
+import base64
+import datetime
+import heapq
+import json
+
+import jdatetime
+from django.db.models import Q
+from django.utils import timezone
+
+from .helpers import _get_post_url, _get_album_url
+from .models import Post, Album
+
+TIMELINE_PAGE_SIZE = 20
+TIMELINE_MAX_PAGE_SIZE = 100
+
+# ترتیب نهایی: (created_at, rank, id) نزولی؛ rank برای شکستن تساوی زمان بین دو نوع است
+KIND_RANK = {'post': 1, 'album': 0}
+_FIELDS = ('id', 'title', 'slug', 'code', 'created_at')
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _as_datetime(value):
+    """
+    Post.created_at یک jdatetime است و Album.created_at یک datetime معمولی؛
+    برای مقایسه و cursor هر دو به datetime میلادی aware در منطقهٔ زمانی سایت تبدیل می‌شوند.
+    """
+    if value is None:
+        return None
+    if isinstance(value, jdatetime.datetime):
+        value = value.togregorian()
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localtime(value)
+
+
+def encode_cursor(created_at, kind, pk):
+    raw = json.dumps([created_at.isoformat(), kind, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ts, kind, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if kind not in KIND_RANK:
+            raise ValueError(kind)
+        return _as_datetime(datetime.datetime.fromisoformat(ts)), kind, int(pk)
+    except Exception as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _after_cursor(qs, kind, cursor):
+    """
+    فیلتر keyset: فقط ردیف‌هایی که در ترتیب نزولی بعد از cursor می‌آیند.
+    """
+    if cursor is None:
+        return qs
+    ts, cursor_kind, pk = cursor
+    rank, cursor_rank = KIND_RANK[kind], KIND_RANK[cursor_kind]
+    if rank < cursor_rank:
+        return qs.filter(created_at__lte=ts)
+    if rank > cursor_rank:
+        return qs.filter(created_at__lt=ts)
+    # created_at__lte جدا: بدون آن SQLite شرط OR را روی کل ایندکس (created_at, id) از ابتدا اسکن می‌کند
+    # و هزینهٔ هر صفحه با عمق cursor بالا می‌رود
+    return qs.filter(created_at__lte=ts).filter(Q(created_at__lt=ts) | Q(created_at=ts, pk__lt=pk))
+
+
+def _stream(qs, kind, cursor, limit):
+    rows = _after_cursor(qs, kind, cursor).only(*_FIELDS).order_by('-created_at', '-pk')[:limit]
+    rank = KIND_RANK[kind]
+    for obj in rows:
+        ts = _as_datetime(obj.created_at)
+        # کلید منفی (میکروثانیهٔ صحیح) برای merge نزولی با heapq.merge که صعودی است
+        yield (-((ts - _EPOCH) // _MICROSECOND), -rank, -obj.pk), kind, ts, obj
+
+
+def timeline_page(posts=None, albums=None, cursor=None, limit=TIMELINE_PAGE_SIZE):
+    """
+    یک صفحه از timeline ترکیبی پست‌ها و آلبوم‌ها.
+    از هر queryset حداکثر limit+1 ردیف (با ایندکس created_at) خوانده و با k-way merge
+    ادغام می‌شود؛ حافظه و زمان به اندازهٔ صفحه است نه کل جدول‌ها.
+    خروجی: {'items': [...], 'next_cursor': str یا None}
+    """
+    if isinstance(cursor, str):
+        cursor = decode_cursor(cursor) if cursor else None
+    limit = max(1, min(int(limit), TIMELINE_MAX_PAGE_SIZE))
+    posts = Post.objects.all() if posts is None else posts
+    albums = Album.objects.all() if albums is None else albums
+
+    merged = heapq.merge(
+        _stream(posts, 'post', cursor, limit + 1),
+        _stream(albums, 'album', cursor, limit + 1),
+        key=lambda row: row[0],
+    )
+    items = []
+    next_cursor = None
+    for _key, kind, ts, obj in merged:
+        if len(items) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last['timestamp'], last['kind'], last['id'])
+            break
+        items.append({
+            'kind': kind,
+            'id': obj.pk,
+            'title': obj.title,
+            'created_at': obj.created_at,
+            'url': _get_post_url(obj) if kind == 'post' else _get_album_url(obj),
+            'timestamp': ts,  # datetime میلادی aware برای هر دو نوع
+        })
+    return {'items': items, 'next_cursor': next_cursor}
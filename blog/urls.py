@@ -6,22 +6,35 @@ Created on Sat Sep 27 17:05:06 2025
 """
 
 # blog/urls.py
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
 from .views import user_dashboard
 
+# صفحه‌های پرخواندنی زیر ASGI نسخهٔ async دارند (BLOG_ASYNC_VIEWS در settings)
+page_views = async_views if settings.BLOG_ASYNC_VIEWS else views
+
 app_name = 'blog'
 
 urlpatterns = [
     # صفحهٔ جستجو
-    path('search/', views.search, name='search'),
+    path('search/', page_views.search, name='search'),
 
     # مسیرهای مرتبط با آلبوم‌ها و AJAX
-    path('ajax/album-images/<int:album_id>/', views.ajax_album_images, name='ajax_album_images'),
+    path('ajax/album-images/<int:album_id>/', page_views.ajax_album_images, name='ajax_album_images'),
+    path('api/v1/albums/<int:album_id>/images/', page_views.ajax_album_images, name='api_album_images'),
+    path('ajax/album-previews/', views.ajax_album_previews, name='ajax_album_previews'),
     path('album/<str:slug>/', views.album_detail, name='album_detail'),
+    path('ajax/timeline/', views.ajax_timeline, name='ajax_timeline'),
+
+    # کلیک آگهی (ثبت و ریدایرکت)
+    path('ads/<int:ad_id>/click/', views.ad_click, name='ad_click'),
+
+    # اندازه‌گیری درخواست‌ها (فقط staff)
+    path('ops/metrics/', views.ops_metrics, name='ops_metrics'),
 
     # دسته‌بندی
-    path('category/<str:slug>/', views.category_albums, name='category_albums'),
+    path('category/<str:slug>/', page_views.category_albums, name='category_albums'),
 
     # داشبورد کاربر
     path('dashboard/', user_dashboard, name='user_dashboard'),
@@ -43,7 +56,7 @@ urlpatterns = [
     path('post/<int:pk>/', views.post_detail_by_id, name='post_detail_by_id'),
 
     # صفحهٔ اصلی (همیشه آخر)
-    path('', views.post_list, name='post_list'),
-    path('ajax/category/<slug:slug>/', views.category_albums, name='ajax_category_content'),  # یا نام دلخواه
-    path('category/<slug:slug>/', views.category_albums, name='category_albums'),
+    path('', page_views.post_list, name='post_list'),
+    path('ajax/category/<slug:slug>/', page_views.category_albums, name='ajax_category_content'),  # یا نام دلخواه
+    path('category/<slug:slug>/', page_views.category_albums, name='category_albums'),
 ]
@@ -136,6 +136,8 @@ INSTALLED_APPS = [
 # Middleware
 # ------------------------
 MIDDLEWARE = [
+    # اول از همه تا زمان کل درخواست را اندازه بگیرد (blog/instrumentation.py)
+    'blog.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -173,11 +175,38 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 # ------------------------
 USE_SQLITE = os.environ.get('DJANGO_USE_SQLITE', '1').lower() in ('1', 'true', 'yes')
 
+# mysite/asgi.py این را روشن می‌کند؛ زیر ASGI هر درخواست همگام در thread تازه‌ای اجرا می‌شود
+# و اتصال ماندگار آن thread بعد از درخواست رها (و باز) می‌ماند
+RUNNING_ASGI = env_bool('DJANGO_ASGI', False)
+
+
+def env_max_age(name, default):
+    val = os.environ.get(name, default)
+    return None if str(val).lower() in ('none', 'forever') else int(val)
+
+
+# ------------------------
+# اتصال دیتابیس:
+# CONN_MAX_AGE: چند ثانیه اتصال بعد از درخواست برای درخواست‌های بعدی همان worker باز بماند
+# (0 = اتصال تازه برای هر درخواست، none = بدون محدودیت). پیش‌فرض برای MySQL زیر WSGI یک دقیقه
+# (کمتر از wait_timeout سرور)؛ برای SQLite و زیر ASGI صفر.
+# HEALTH_CHECKS: اتصال ماندگار پیش از استفاده در درخواست بعدی ping می‌شود (اتصالی که MySQL بسته است).
+# DB_POOL_SIZE: زیر ASGI با BLOG_ASYNC_VIEWS، کوئری‌های همزمان نماهای async در این تعداد thread ثابت
+# اجرا می‌شوند که هر کدام اتصال ماندگار خودش را دارد (blog/db_pool.py)؛ 0 = خاموش.
+# DB_POOL_RECYCLE: اتصال thread مخزن بعد از این چند ثانیه دوباره ساخته می‌شود.
+# ------------------------
+DB_CONN_MAX_AGE = env_max_age('DJANGO_DB_CONN_MAX_AGE', 0 if USE_SQLITE or RUNNING_ASGI else 60)
+DB_CONN_HEALTH_CHECKS = env_bool('DJANGO_DB_HEALTH_CHECKS', True)
+BLOG_DB_POOL_SIZE = int(os.environ.get('DJANGO_DB_POOL_SIZE', '0'))
+BLOG_DB_POOL_RECYCLE = int(os.environ.get('DJANGO_DB_POOL_RECYCLE', '300'))
+
 if USE_SQLITE:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         }
     }
 else:
@@ -189,6 +218,8 @@ else:
             'PASSWORD': os.environ.get('MYSQL_PASSWORD', ''),
             'HOST': os.environ.get('MYSQL_HOST', 'localhost'),
             'PORT': os.environ.get('MYSQL_PORT', '3306'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
             'OPTIONS': {
                 'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
                 'charset': 'utf8mb4',
@@ -196,6 +227,74 @@ else:
         }
     }
 
+# ------------------------
+# Cache: پیش‌فرض حافظهٔ محلی؛ روی هاست با چند worker یک backend مشترک تنظیم شود
+# (مثلاً FileBasedCache یا Redis) تا نسخه‌ها و snapshotها بین پروسه‌ها یکی باشند.
+# ------------------------
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'khanehazin'),
+        'TIMEOUT': int(os.environ.get('DJANGO_CACHE_TIMEOUT', '3600')),
+    }
+}
+
+# ------------------------
+# صف کارهای پس‌زمینه (blog/tasks.py): جدول blog_task در همین دیتابیس، بدون broker.
+# INLINE: کارها بعد از commit در یک thread داخل همین پروسه اجرا می‌شوند (لوکال)؛
+# روی هاست مقدار 0 بدهید و `python manage.py run_tasks` را جداگانه اجرا کنید.
+# ------------------------
+BLOG_TASKS_INLINE = env_bool('DJANGO_TASKS_INLINE', True)
+BLOG_TASKS_LOCK_TIMEOUT = int(os.environ.get('DJANGO_TASKS_LOCK_TIMEOUT', '600'))
+
+# ------------------------
+# HTTP cache صفحه‌های عمومی (blog/http_cache.py): ETag + پاسخ 304.
+# S_MAXAGE: چند ثانیه reverse proxy بدون پرسیدن از Django پاسخ را نگه دارد (0 = همیشه با ETag بپرسد؛
+# آگهی‌ها در هر رندر می‌چرخند و نمایششان ثبت می‌شود). STAMP_TTL: عمر مُهر دیتابیسی در cache.
+# ------------------------
+BLOG_HTTP_S_MAXAGE = int(os.environ.get('DJANGO_HTTP_S_MAXAGE', '0'))
+BLOG_HTTP_STAMP_TTL = int(os.environ.get('DJANGO_HTTP_STAMP_TTL', '5'))
+
+# ------------------------
+# proxyهای مورد اعتماد جلوی سایت (IP یا شبکهٔ CIDR، با کاما جدا)، مثلاً "127.0.0.1,10.0.0.0/8".
+# فقط وقتی درخواست از یکی از این‌ها برسد X-Forwarded-For برای IP بازدیدکنندهٔ آگهی‌ها
+# (blog/ad_tracking.py) خوانده می‌شود؛ خالی = همیشه REMOTE_ADDR.
+# ------------------------
+BLOG_TRUSTED_PROXIES = [p.strip() for p in os.environ.get('DJANGO_TRUSTED_PROXIES', '').split(',') if p.strip()]
+
+# ------------------------
+# نماهای async (blog/async_views.py) برای صفحهٔ اصلی، دسته، جستجو و تصاویر آلبوم.
+# فقط وقتی سایت با ASGI (mysite/asgi.py، مثلاً uvicorn) اجرا می‌شود روشن شود؛ زیر WSGI
+# هر view async یک event loop جدا می‌گیرد و از نسخهٔ همگام کندتر است.
+# ------------------------
+BLOG_ASYNC_VIEWS = env_bool('DJANGO_ASYNC_VIEWS', False)
+
+# ------------------------
+# اندازه‌گیری درخواست‌ها (blog/instrumentation.py): تعداد و زمان SQL، زمان رندر قالب و زمان کل برای
+# درصدی از درخواست‌ها (SAMPLE_RATE بین 0 و 1)، با هدر Server-Timing و هیستوگرام داخل پروسهٔ هر
+# URL name (JSON برای staff در /ops/metrics/).
+# QUERY_BUDGETS: حداکثر کوئری هر view (با cache خالی)؛ QUERY_BUDGET_ACTION: 'log' (هشدار در لاگ)،
+# 'raise' (برای تست‌ها: همهٔ درخواست‌ها اندازه‌گیری و QueryBudgetExceeded) یا 'off'.
+# ------------------------
+BLOG_METRICS_SAMPLE_RATE = float(os.environ.get('DJANGO_METRICS_SAMPLE_RATE', '1' if DEBUG else '0.05'))
+BLOG_METRICS_SERVER_TIMING = env_bool('DJANGO_METRICS_SERVER_TIMING', True)
+BLOG_QUERY_BUDGET_ACTION = os.environ.get('DJANGO_QUERY_BUDGET_ACTION', 'log')
+BLOG_QUERY_BUDGETS = {
+    'blog:post_list': 40,
+    # صفحهٔ پست همیشه از مسیرهای code (نه pk) سرو می‌شود
+    'blog:object_by_code_with_slug': 25,
+    'blog:object_by_code': 25,
+    # لیست‌های پست با blog/cards.py تعداد کوئری ثابت دارند (مستقل از تعداد پست‌ها)
+    'blog:category_albums': 25,
+    'blog:ajax_category_content': 25,
+    'blog:search': 20,
+    'blog:album_detail': 20,
+    'blog:ajax_album_images': 10,
+    'blog:api_album_images': 10,
+    'blog:ajax_album_previews': 10,
+    'blog:ajax_timeline': 10,
+}
+
 # ------------------------
 # Password Validators
 # ------------------------